@@ -0,0 +1,321 @@
+"""
+批量实验：实例 × 换电站布局 × 求解器 × 随机种子
+示例：
+    python -m <包名>.batch --instances C101 C102 \
+        --stations C101_Strategy0.txt C101_Strategy1_Centers.txt C101_Strategy2_Ring.txt \
+        --solvers alns ga --seeds 0 1 2 --time-limit 60 --workers 4 --out results.csv
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from .config import DataConfig
+from .data_process import load_instance, resolve_data_path
+from .utils.memory import MEMORY_COLUMNS, start_memory_profile
+from .utils.table_writer import TableWriter, read_table
+
+RESULT_COLUMNS = [
+    'job_id', 'instance', 'stations', 'solver', 'seed', 'status',
+    'total_cost', 'vehicles', 'distance', 'charges', 'runtime', 'error', 'routes',
+]
+NO_STATIONS = ('', '-', 'none')  # 表示使用实例文件自带的换电站
+DEFAULT_GRACE = 30.0  # 超出 time_limit 后等待求解器收尾的秒数，之后强制结束工作进程
+
+
+def job_id(instance, stations, solver, seed, overrides=None) -> str:
+    """
+    作业唯一标识，用于断点续跑时跳过已完成作业
+    前几段为可读的 实例名|换电站文件名|求解器|种子，末段为解析后绝对路径与参数覆盖的哈希，
+    因此不同目录下的同名文件、参数不同的重跑不会被误判为已完成
+    """
+    key = json.dumps([_resolved(instance), _resolved(stations) if stations else None, overrides or {}],
+                     sort_keys=True, default=str)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]
+    return f"{Path(str(instance)).name}|{Path(str(stations)).name if stations else '-'}|{solver}|{seed}|{digest}"
+
+
+def _resolved(path) -> str:
+    try:
+        return str(resolve_data_path(path).resolve())
+    except FileNotFoundError:
+        return str(path)
+
+
+def expand_grid(instances, stations=None, solvers=('alns',), seeds=(0,), overrides=None) -> list:
+    """展开实验网格，返回作业列表"""
+    stations = list(stations) if stations else [None]
+    jobs = []
+    for inst, st, solver, seed in itertools.product(instances, stations, solvers, seeds):
+        st = None if st is None or str(st).lower() in NO_STATIONS else str(st)
+        jobs.append({
+            'job_id': job_id(inst, st, solver, seed, overrides),
+            'instance': str(inst),
+            'stations': st,
+            'solver': solver,
+            'seed': int(seed),
+            'overrides': dict(overrides or {}),
+        })
+    return jobs
+
+
+def build_config(overrides) -> DataConfig:
+    cfg = DataConfig()
+    for key, value in (overrides or {}).items():
+        if not hasattr(cfg, key):
+            raise AttributeError(f"DataConfig 中不存在参数: {key}")
+        setattr(cfg, key, value)
+    return cfg
+
+
+def run_job(job: dict, quiet: bool = True, loader=load_instance) -> dict:
+    """
+    在工作进程中执行单个作业；异常被捕获并记入结果行
+    loader: 实例加载函数 loader(instance, stations=...)，求解服务中替换为带缓存的版本
+    开启 memory_profile 时，结果行的 'memory' 为各阶段内存统计（含实例加载）
+    """
+    from .utils.helpers import cost_breakdown
+
+    row = _job_row(job)
+    start = time.perf_counter()
+    mem = None
+    try:
+        random.seed(job['seed'])
+        try:
+            import numpy as np
+            np.random.seed(job['seed'])
+        except ImportError:
+            pass
+        cfg = build_config(job['overrides'])
+        mem, _ = start_memory_profile(cfg)
+        data = loader(job['instance'], stations=job['stations'])
+        if mem is not None:
+            mem.lap('load')
+        if cfg.telemetry_path and cfg.telemetry_run is None:
+            cfg.telemetry_run = job['job_id']
+        out = io.StringIO() if quiet else None
+        with contextlib.redirect_stdout(out) if quiet else contextlib.nullcontext():
+            solver = _make_solver(job['solver'], data, cfg)
+            routes = solver.solve()
+        routes = [[int(n) for n in r] for r in routes]
+        row.update(cost_breakdown(data, cfg, routes))
+        row.update(status='ok', error='', routes=json.dumps([r for r in routes if len(r) > 2]))
+    except Exception as e:
+        row.update(status='error', error=f"{type(e).__name__}: {e}", routes='')
+        if not quiet:
+            traceback.print_exc()
+    finally:
+        if mem is not None:
+            mem.stop()
+            row['memory'] = mem.summary()
+    row['runtime'] = round(time.perf_counter() - start, 3)
+    return row
+
+
+def _job_row(job):
+    row = {k: job[k] for k in ('job_id', 'instance', 'solver', 'seed')}
+    row['stations'] = job['stations'] or '-'
+    return row
+
+
+def hard_time_limit(job, grace=DEFAULT_GRACE):
+    """作业的强制时间上限（time_limit + grace），未设置 time_limit 时为 None"""
+    limit = (job['overrides'] or {}).get('time_limit')
+    return None if limit is None else float(limit) + grace
+
+
+def arm_watchdog(seconds):
+    """
+    在工作进程内启动看门狗：seconds 秒后直接结束本进程
+    求解器的 time_limit 只是协作式截止，个别阶段不检查时由看门狗兜底；
+    进程池随之报 BrokenProcessPool，由调用方重建进程池。只能在工作进程中调用
+    """
+    if seconds is None:
+        return None
+    timer = threading.Timer(seconds, os._exit, (1,))
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+def run_job_guarded(job, quiet=True, grace=DEFAULT_GRACE, loader=load_instance):
+    """在工作进程中执行作业，超过 hard_time_limit 时强制结束该进程"""
+    timer = arm_watchdog(hard_time_limit(job, grace))
+    try:
+        return run_job(job, quiet, loader)
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+
+def _make_solver(name, data, cfg):
+    name = name.lower()
+    if name == 'alns':
+        from .solver import ALNSSolver
+        return ALNSSolver(data, cfg)
+    if name == 'ga':
+        from .ga_solver import GASolver
+        return GASolver(data, cfg)
+    if name == 'memetic':
+        from .ga_solver import GASolver
+        return GASolver(data, cfg, memetic=True, workers=1)
+    if name == 'decomp':
+        from .decomposition import DecompositionSolver
+        return DecompositionSolver(data, cfg, workers=1)
+    raise ValueError(f"未知求解器: {name}（可选 alns / ga / memetic / decomp）")
+
+
+def run_batch(jobs, out_path, workers=None, resume=True, quiet=True, grace=DEFAULT_GRACE) -> list:
+    """
+    在进程池中执行作业，并将结果逐行写入 out_path（.csv / .jsonl / .parquet）
+    .parquet 结果在运行结束时才写出，中途崩溃无法续跑（见 TableWriter）
+    resume=True 时跳过结果表中 status 为 ok 的作业（超时、工作进程崩溃的作业记为 error，续跑时重试）
+    单个作业的时间上限为 overrides 中的 time_limit：求解器协作式遵守，超出 grace 秒仍未返回时强制结束
+    开启 memory_profile 的作业，其分阶段内存统计写入同目录的 <结果文件名>_memory 表
+    """
+    done = set()
+    if resume:
+        done = {str(r.get('job_id')) for r in read_table(out_path) if r.get('status') == 'ok'}
+    pending = [j for j in jobs if j['job_id'] not in done]
+    print(f"共 {len(jobs)} 个作业，已完成 {len(jobs) - len(pending)} 个，待运行 {len(pending)} 个")
+    if not pending:
+        return []
+
+    results = []
+    workers = workers or os.cpu_count() or 1
+    out = Path(out_path)
+    # 只有作业开启 memory_profile 时才创建内存统计表，避免截断已有文件
+    default = DataConfig().memory_profile
+    profiled = any((j['overrides'] or {}).get('memory_profile', default) for j in pending)
+    memory_path = out.with_name(f"{out.stem}_memory{out.suffix}")
+    memory_table = (TableWriter(memory_path, columns=MEMORY_COLUMNS, buffer_size=1, append=resume)
+                    if profiled else contextlib.nullcontext())
+    with TableWriter(out_path, columns=RESULT_COLUMNS, buffer_size=1, append=resume) as writer, \
+            memory_table as memory_writer:
+        def record(row):
+            for phase in row.pop('memory', None) or []:
+                memory_writer.write({'job_id': row['job_id'], **phase})
+            writer.write(row)
+            results.append(row)
+            _report(row, len(results), len(pending))
+
+        _run_pool(pending, workers, quiet, grace, record)
+    return results
+
+
+def _run_pool(pending, workers, quiet, grace, record):
+    """
+    同时运行至多 workers 个作业（提交即开始，便于判断超时）
+    工作进程异常退出（看门狗超时或内存不足等）时进程池整体失效：超过强制时间上限的作业记为超时，
+    其余同池作业重新提交一次；无法判断是哪个作业导致时全部记为 error
+    """
+    queue = [(job, 0) for job in pending]
+    queue.reverse()
+    pool = ProcessPoolExecutor(max_workers=workers)
+    running = {}  # future -> (作业, 开始时间, 已重试次数)
+    try:
+        while queue or running:
+            while queue and len(running) < workers:
+                job, retries = queue.pop()
+                running[pool.submit(run_job_guarded, job, quiet, grace)] = (job, time.perf_counter(), retries)
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            broken = []
+            for fut in finished:
+                job, start, retries = running.pop(fut)
+                try:
+                    record(fut.result())
+                except BrokenProcessPool:
+                    broken.append((job, start, retries))
+            if not broken:
+                continue
+            # 进程池已失效，其余运行中的作业也会随之失败
+            wait(running)
+            broken += list(running.values())
+            running.clear()
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = ProcessPoolExecutor(max_workers=workers)
+            now = time.perf_counter()
+            timed_out = [b for b in broken if (hard_time_limit(b[0], grace) or float('inf')) <= now - b[1]]
+            for item in broken:
+                job, start, retries = item
+                if item in timed_out:
+                    error = f"超过时间上限 {hard_time_limit(job, grace):g}s，已强制结束"
+                elif timed_out and retries == 0:
+                    queue.append((job, retries + 1))
+                    continue
+                else:
+                    error = "工作进程异常退出（可能内存不足）"
+                record({**_job_row(job), 'status': 'error', 'error': error, 'routes': '',
+                        'runtime': round(now - start, 3)})
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _report(row, finished, total):
+    cost = f"{row['total_cost']:.2f}" if row['status'] == 'ok' else row['error']
+    print(f"[{finished}/{total}] {row['job_id']}  {row['status']}  {cost}  ({row['runtime']:.1f}s)")
+
+
+def _parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ALNS / GA / 分解求解 批量实验")
+    parser.add_argument('--instances', nargs='+', required=True, help="实例文件或实例名（如 C101）")
+    parser.add_argument('--stations', nargs='*', default=None, help="换电站布局文件，'-' 表示使用实例自带换电站")
+    parser.add_argument('--solvers', nargs='+', default=['alns'], choices=['alns', 'ga', 'memetic', 'decomp'])
+    parser.add_argument('--seeds', nargs='+', type=int, default=[0])
+    parser.add_argument('--vehicles', type=int, default=None, help="可用车辆数")
+    parser.add_argument('--max-iter', type=int, default=None, help="最大迭代次数")
+    parser.add_argument('--time-limit', type=float, default=None, help="单个作业的求解时间上限(秒)")
+    parser.add_argument('--grace', type=float, default=DEFAULT_GRACE,
+                        help="超出时间上限后等待求解器收尾的秒数，之后强制结束该作业")
+    parser.add_argument('--set', nargs='*', default=[], metavar='KEY=VALUE', help="其他 DataConfig 参数")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default='results.csv')
+    parser.add_argument('--no-resume', action='store_true', help="忽略已有结果，重新运行全部作业")
+    parser.add_argument('--verbose', action='store_true', help="显示求解器输出")
+    parser.add_argument('--memory', action='store_true', help="按阶段记录内存峰值，写入 <结果文件名>_memory 表")
+    parser.add_argument('--render-dir', default=None, help="运行结束后将所有成功作业的路径图渲染到该目录")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    if args.vehicles is not None:
+        overrides['vehicle_num'] = args.vehicles
+    if args.max_iter is not None:
+        overrides['max_iter'] = args.max_iter
+    if args.time_limit is not None:
+        overrides['time_limit'] = args.time_limit
+    if args.memory:
+        overrides['memory_profile'] = True
+    for item in args.set:
+        key, _, value = item.partition('=')
+        overrides[key] = _parse_value(value)
+
+    instances = [str(resolve_data_path(i)) for i in args.instances]
+    stations = [s if s.lower() in NO_STATIONS else str(resolve_data_path(s)) for s in args.stations or []]
+    jobs = expand_grid(instances, stations, args.solvers, args.seeds, overrides)
+    run_batch(jobs, args.out, workers=args.workers, resume=not args.no_resume, quiet=not args.verbose,
+              grace=args.grace)
+    if args.render_dir:
+        from .visualization import render_results
+        images = render_results(args.out, args.render_dir, workers=args.workers)
+        print(f"已渲染 {len(images)} 张路径图至: {args.render_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+热点函数微基准：在固定路径上重复调用单个函数，报告每秒操作数，可保存基线并与基线对比
+- 固定路径：C101 各换电站布局文件，以及指定规模的合成实例（随机种子固定），
+  初始解由节约法构造，破坏/修复所用的移除集合以固定种子生成，多次运行结果可比
+- 每个基准重复 --repeat 轮、每轮至少运行 --min-time 秒，取最快一轮的 ops/s
+示例：
+    python -m <包名>.benchmark --save bench_baseline.json
+    python -m <包名>.benchmark --compare bench_baseline.json --only feasibility insert
+"""
+import argparse
+import json
+import platform
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .config import DataConfig
+from .data_process import build_vrp_data, load_instance
+from .initial_solution import build_initial_solution
+from .operators.destroy_ops import DESTROY_OPERATORS, VEHICLE_LEVEL_OPERATORS, random_remove
+from .operators.local_search import local_search_2opt, local_search_prune_stations
+from .operators.repair_ops import REPAIR_OPERATORS
+from .utils.helpers import (adjust_charge_stations, calculate_redundancy, evaluate_insertion_with_cs,
+                            route_feasibility_check, solution_cost)
+
+DEFAULT_INSTANCES = ['C101_Strategy0.txt', 'C101_Strategy1_Centers.txt', 'C101_Strategy2_Ring.txt']
+DEFAULT_SIZES = [200]
+REGRESSION = 0.9  # 低于基线该比例视为变慢
+
+
+def synthetic_instance(n_customers, n_stations=None, seed=0):
+    """合成实例：100×100 区域内均匀分布的客户、中心车场，换电站位于网格点上"""
+    rng = np.random.default_rng(seed)
+    if n_stations is None:
+        n_stations = max(4, n_customers // 10)
+    side = int(np.ceil(np.sqrt(n_stations)))
+    grid = (np.arange(side) + 0.5) * 100.0 / side
+    stations = np.array([(x, y) for x in grid for y in grid])[:n_stations]
+    xy = np.vstack([[50.0, 50.0], rng.uniform(0, 100, (n_customers, 2)), stations])
+    n = len(xy)
+    df = pd.DataFrame({
+        'CUST NO': np.arange(1, n + 1, dtype=float),
+        'XCOORD': xy[:, 0].round(2),
+        'YCOORD': xy[:, 1].round(2),
+        'DEMAND': np.concatenate([[0], rng.integers(10, 31, n_customers), np.zeros(n_stations)]).astype(float),
+        'READY TIME': 0.0,
+        'DUE TIME': 1e6,
+        'SERVICE TIME': np.concatenate([[0], np.full(n_customers, 10.0), np.zeros(n_stations)]),
+        'TYPE': ['depot'] + ['customer'] * n_customers + ['charging_station'] * n_stations,
+    })
+    return build_vrp_data(df)
+
+
+class Fixture:
+    """一个实例上的固定输入：初始解、若干路径、插入候选与破坏结果"""
+    def __init__(self, name, data, seed=0):
+        self.name = name
+        self.data = data
+        self.cfg = cfg = DataConfig()
+        cfg.init_method = 'savings'
+        cfg.vehicle_num = len(data.customer_ids)
+        routes = build_initial_solution(data, cfg)
+        used = [r for r in routes if len(r) > 2]
+        cfg.vehicle_num = len(used) + 2  # 保留两辆空车，与求解时的情形相近
+        self.solution = used + [[data.depot_id, data.depot_id]] * 2
+        self.routes = used
+        charges = set(data.charge_ids)
+        self.station_routes = [(r, i) for r in used for i, n in enumerate(r) if n in charges] or \
+                              [(r, len(r) - 1) for r in used]
+
+        rng = random.Random(seed)
+        self.insertions = []
+        for _ in range(50):
+            src, dst = rng.sample(range(len(used)), 2) if len(used) > 1 else (0, 0)
+            customers = [n for n in used[src] if n in set(data.customer_ids)]
+            self.insertions.append((used[dst], rng.choice(customers), rng.randint(1, len(used[dst]) - 1)))
+
+        random.seed(seed)
+        np.random.seed(seed)
+        self.q = max(1, int(0.1 * len(data.customer_ids)))
+        self.destroyed, self.removed = random_remove(data, cfg, self.solution, self.q)
+
+
+def _cycle(items):
+    state = {'i': 0}
+
+    def nxt():
+        item = items[state['i'] % len(items)]
+        state['i'] += 1
+        return item
+    return nxt
+
+
+def benchmarks(fx):
+    """(基准名, 单次操作) 列表"""
+    data, cfg = fx.data, fx.cfg
+    route = _cycle(fx.routes)
+    insertion = _cycle(fx.insertions)
+    station_route = _cycle(fx.station_routes)
+    cases = [
+        ('route_feasibility_check', lambda: route_feasibility_check(data, cfg, route())),
+        ('solution_cost', lambda: solution_cost(data, cfg, fx.solution)),
+        ('evaluate_insertion_with_cs', lambda: evaluate_insertion_with_cs(data, cfg, *insertion())),
+        ('adjust_charge_stations', lambda: adjust_charge_stations(data, cfg, station_route()[0])),
+        ('calculate_redundancy', lambda: calculate_redundancy(data, cfg, *station_route())),
+    ]
+    for op in DESTROY_OPERATORS:
+        q = 2 if op in VEHICLE_LEVEL_OPERATORS else fx.q
+        cases.append((f"destroy/{op.__name__}", lambda op=op, q=q: op(data, cfg, fx.solution, q)))
+    for op in REPAIR_OPERATORS:
+        cases.append((f"repair/{op.__name__}",
+                      lambda op=op: op(data, cfg, [list(r) for r in fx.destroyed], list(fx.removed))))
+    cases.append(('local_search_2opt', lambda: local_search_2opt(data, cfg, [list(r) for r in fx.solution])))
+    cases.append(('local_search_prune_stations',
+                  lambda: local_search_prune_stations(data, cfg, [list(r) for r in fx.solution])))
+    return cases
+
+
+def measure(fn, min_time=0.2, repeat=3, seed=0):
+    """返回最快一轮的每秒操作数；单次调用已超过 min_time 时只测一轮"""
+    best = 0.0
+    for _ in range(repeat):
+        random.seed(seed)
+        np.random.seed(seed)
+        n, start = 0, time.perf_counter()
+        while True:
+            fn()
+            n += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, n / elapsed)
+        if n == 1:
+            break
+    return best
+
+
+def run_benchmarks(fixtures, only=None, min_time=0.2, repeat=3):
+    results = {}
+    for fx in fixtures:
+        for name, fn in benchmarks(fx):
+            key = f"{fx.name}/{name}"
+            if only and not any(pat in key for pat in only):
+                continue
+            results[key] = measure(fn, min_time, repeat)
+            print(f"{key:<70} {results[key]:>12.1f} ops/s")
+    return results
+
+
+def save_baseline(results, path):
+    payload = {'python': platform.python_version(), 'numpy': np.__version__,
+               'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'results': results}
+    Path(path).write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+def compare(results, baseline_path):
+    """与基线对比，返回变慢的基准列表"""
+    baseline = json.loads(Path(baseline_path).read_text(encoding='utf-8'))['results']
+    slower = []
+    print(f"\n与基线对比（{baseline_path}）：")
+    for key, ops in results.items():
+        if key not in baseline:
+            print(f"{key:<70} {'(基线中无此项)':>12}")
+            continue
+        ratio = ops / baseline[key]
+        mark = '  变慢' if ratio < REGRESSION else ''
+        if ratio < REGRESSION:
+            slower.append(key)
+        print(f"{key:<70} {baseline[key]:>12.1f} -> {ops:>12.1f}  ×{ratio:.2f}{mark}")
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="热点函数微基准")
+    parser.add_argument('--instances', nargs='*', default=DEFAULT_INSTANCES)
+    parser.add_argument('--sizes', nargs='*', type=int, default=DEFAULT_SIZES, help="合成实例的客户数")
+    parser.add_argument('--only', nargs='*', default=None, help="只运行名称包含这些子串的基准")
+    parser.add_argument('--min-time', type=float, default=0.2, help="每轮最少运行秒数")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', default=None, help="将结果保存为基线 JSON")
+    parser.add_argument('--compare', default=None, help="与基线 JSON 对比")
+    args = parser.parse_args(argv)
+
+    fixtures = [Fixture(Path(inst).stem, load_instance(inst)) for inst in args.instances]
+    fixtures += [Fixture(f"synthetic{n}", synthetic_instance(n)) for n in args.sizes]
+    results = run_benchmarks(fixtures, args.only, args.min_time, args.repeat)
+    if args.save:
+        save_baseline(results, args.save)
+        print(f"基线已保存至: {args.save}")
+    if args.compare:
+        slower = compare(results, args.compare)
+        if slower:
+            print(f"共 {len(slower)} 项低于基线的 {REGRESSION:.0%}")
+
+
+if __name__ == "__main__":
+    main()
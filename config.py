@@ -6,9 +6,50 @@ class DataConfig:
         self.battery_cap = 400    # 电池容量
         self.base_energy = 1.7    # 基础能耗系数α
         self.load_energy = 0.04    # 负载能耗系数β
+        self.energy_model = 'linear'  # 能耗模型：linear / payload_curve（见 utils/energy_model.py）
+        self.payload_exponent = 1.5  # payload_curve 模型的载重指数 γ（γ = 1 时退化为线性）
         self.max_iter = 200      # 最大迭代次数
+        self.time_limit = None   # 求解时间上限(秒)，None 表示不限
+        # 时间窗：开启后按 READY/DUE/SERVICE TIME 检查到达时间，行驶时间 = 距离 / speed，换电站停留 swap_time
+        self.time_windows = False
+        self.speed = 1.0
+        self.swap_time = 10.0
+        self.init_method = 'insertion'  # 初始解构造方法：insertion(最近邻插入) / sweep(扫描法) / savings(节约法)
         # self.tabu_length = 50     # 禁忌表长度
 
+        # 模拟退火：init_temperature 为 None 时按初始成本标定，
+        # 使差 start_worse 比例的解以 start_accept 概率被接受，并在 max_iter 轮内降至初温的 end_temperature_ratio
+        self.init_temperature = None
+        self.start_worse = 0.05
+        self.start_accept = 0.5
+        self.end_temperature_ratio = 0.005
+        # 自适应破坏规模：每轮移除客户比例在 [destroy_min, destroy_max] 内调节
+        self.destroy_min = 0.1
+        self.destroy_max = 0.4
+        self.destroy_patience = 10  # 连续多少轮未改进最优解后扩大破坏规模
+        # Shaw 相关移除：相关度 = 距离、需求差、最近换电站是否相同 的加权和；randomness 越大越偏向最相关客户
+        self.shaw_distance_weight = 9
+        self.shaw_demand_weight = 2
+        self.shaw_station_weight = 3
+        self.shaw_randomness = 6
+        # SISR 串移除与 blink 插入：单串最多客户数；插入时每个候选位置被随机跳过的概率
+        self.sisr_max_string = 10
+        self.blink_rate = 0.01
+
+        # 差分校验：按比例抽样将可行性/成本/换电站修复与参考实现比较（见 utils/verify.py），0 表示关闭
+        self.verify_rate = 0.0
+        self.verify_seed = 0
+        self.verify_strict = False  # 发现不一致时立即抛出 AssertionError
+
+        # 内存分析：按阶段记录 tracemalloc 峰值与分配最多的代码行（见 utils/memory.py）
+        self.memory_profile = False
+        self.memory_top = 10        # 每个阶段保留的代码行数
+        self.memory_snapshots = 20  # 前多少次阶段切换拍摄快照（快照开销较大）
+
+        self.telemetry_path = None  # 逐迭代遥测文件(.jsonl/.parquet/.csv)，None 表示不记录；可含 {run} 占位符
+        self.telemetry_run = None   # 遥测记录中的运行标识
+        self.telemetry_buffer = 100  # 遥测缓冲条数，写满即落盘
+
         self.low_battery_threshold = 0.5  # 低电量阈值比例
         self.underutilized_threshold = 0.3  # 低利用率阈值比例
         self.safe_battery_margin = 0.10  # 新增：保留10%的安全电量
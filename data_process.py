@@ -1,67 +1,373 @@
+import argparse
+import json
+
 import numpy as np
 import pandas as pd
 from .data_structure import VRPData
 from pathlib import Path
 
-def load_data(file_path: str) -> VRPData:
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / "data"
+SOLOMON_DIR = DATA_DIR / "solomon_dataset"
+
+# 不同来源的列名统一映射（Solomon 原始 CSV 使用 "CUST NO." / "DUE DATE" 等写法）
+COLUMN_ALIASES = {
+    'CUST NO': 'CUST NO',
+    'CUSTNO': 'CUST NO',
+    'XCOORD': 'XCOORD',
+    'YCOORD': 'YCOORD',
+    'DEMAND': 'DEMAND',
+    'READY TIME': 'READY TIME',
+    'DUE DATE': 'DUE TIME',
+    'DUE TIME': 'DUE TIME',
+    'SERVICE TIME': 'SERVICE TIME',
+    'TYPE': 'TYPE',
+}
+NUMERIC_COLUMNS = ['CUST NO', 'XCOORD', 'YCOORD', 'DEMAND', 'READY TIME', 'DUE TIME', 'SERVICE TIME']
+
+# 编译实例格式（目录，后缀 .evrp）：每个数组一个 .npy 文件，以只读内存映射打开
+COMPILED_SUFFIX = '.evrp'
+COMPILED_VERSION = 1
+NODE_TYPES = ['depot', 'customer', 'charging_station']
+
+
+def resolve_data_path(file_path) -> Path:
     """
-    读取并预处理输入数据
+    解析数据文件路径：
+    依次尝试 原路径 -> data/ 目录 -> solomon_dataset 中的同名实例（支持 "C101" 简写）
+    """
+    path = Path(file_path)
+    if path.exists():
+        return path
+    candidate = DATA_DIR / path
+    if candidate.exists():
+        return candidate
+    stem = path.stem if path.suffix else path.name
+    matches = sorted(SOLOMON_DIR.rglob(f"{stem}.csv")) or sorted(SOLOMON_DIR.rglob(f"{stem}.txt"))
+    if matches:
+        return matches[0]
+    raise FileNotFoundError(f"找不到数据文件: {file_path}")
+
+
+def list_instances(pattern: str = "*") -> list:
+    """列出 solomon_dataset 中所有内置实例（同名实例优先取 .csv）"""
+    found = {}
+    for path in sorted(SOLOMON_DIR.rglob(f"{pattern}.*")):
+        if path.suffix.lower() not in ('.csv', '.txt'):
+            continue
+        if path.stem not in found or path.suffix.lower() == '.csv':
+            found[path.stem] = path
+    return [found[k] for k in sorted(found)]
+
+
+def read_node_table(file_path) -> pd.DataFrame:
+    """
+    读取节点表并统一列名，兼容两种格式：
+    - solomon_dataset：CUST NO. / XCOORD. / DUE DATE（部分为 UTF-16 制表符分隔）
+    - network/Strategy 文件：CUST NO / DUE TIME，可带 TYPE 列
+    """
+    path = resolve_data_path(file_path)
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    encoding = 'utf-16' if head[:2] in (b'\xff\xfe', b'\xfe\xff') else 'utf-8-sig'
+    with open(path, 'r', encoding=encoding) as f:
+        header = f.readline()
+    sep = '\t' if '\t' in header else ','
+
+    df = pd.read_csv(path, sep=sep, encoding=encoding, skipinitialspace=True)
+    df.columns = [_normalize_column(c) for c in df.columns]
+    missing = [c for c in NUMERIC_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path.name} 缺少必要列: {missing}")
+    for col in NUMERIC_COLUMNS:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            # 个别原始文件存在脏单元格（如 C104 中的 "0.00    1"），取首个数值字段
+            df[col] = pd.to_numeric(df[col].astype(str).str.split().str[0])
+    df[NUMERIC_COLUMNS] = df[NUMERIC_COLUMNS].astype(float)
+    df['CUST NO'] = df['CUST NO'].astype(int)
+
+    # TYPE 缺失或为空时：CUST NO 为 1 视为车场，其余视为客户
+    if 'TYPE' in df.columns:
+        types = df['TYPE'].astype(object).where(df['TYPE'].notna(), '').astype(str).str.strip().str.lower()
+    else:
+        types = pd.Series('', index=df.index)
+    types = types.where(types != '', 'customer')
+    types[df['CUST NO'] == 1] = 'depot'
+    df['TYPE'] = types
+    return df
+
+
+def _normalize_column(name) -> str:
+    key = ' '.join(str(name).replace('\ufeff', '').strip().rstrip('.').upper().split())
+    return COLUMN_ALIASES.get(key, key)
+
+
+def attach_stations(node_df: pd.DataFrame, stations) -> pd.DataFrame:
+    """
+    为实例挂载换电站布局（替换实例中原有的换电站）
     参数：
-        file_path: 数据文件路径
-    返回：
-        VRPData: 结构化数据对象
+        stations: 布局文件路径（取其中 TYPE 为 charging_station 的行）或 (x, y) 坐标序列
     """
+    base = node_df[node_df['TYPE'] != 'charging_station']
+    if isinstance(stations, (str, Path)):
+        layout = read_node_table(stations)
+        coords = layout.loc[layout['TYPE'] == 'charging_station', ['XCOORD', 'YCOORD']].to_numpy(dtype=float)
+    else:
+        coords = np.asarray(stations, dtype=float).reshape(-1, 2)
+
+    depot = base[base['TYPE'] == 'depot'].iloc[0]
+    start_id = int(base['CUST NO'].max()) + 1
+    stations_df = pd.DataFrame({
+        'CUST NO': np.arange(start_id, start_id + len(coords)),
+        'XCOORD': coords[:, 0].round(2),
+        'YCOORD': coords[:, 1].round(2),
+        'DEMAND': 0.0,
+        'READY TIME': depot['READY TIME'],   # 与车场一致，表示全天开放
+        'DUE TIME': depot['DUE TIME'],
+        'SERVICE TIME': 0.0,
+        'TYPE': 'charging_station',
+    })
+    return pd.concat([base, stations_df], ignore_index=True)
+
+
+def build_vrp_data(raw_df: pd.DataFrame) -> VRPData:
+    """由统一格式的节点表构建 VRPData（向量化实现，节点编号为车场置首后的行序）"""
     data = VRPData()
-    base_dir = Path(__file__).resolve().parent
-    data_path = base_dir / "data" / "C101_Strategy1_Centers.txt"
-    # 原始数据读取
-    raw_df = pd.read_csv(data_path)
+    depot_mask = (raw_df['TYPE'] == 'depot').to_numpy()
+    raw_df = pd.concat([raw_df[depot_mask].iloc[:1], raw_df[~depot_mask]], ignore_index=True)
     data.node_df = raw_df
-    
-    # 节点分类处理
-    depot = raw_df[raw_df['CUST NO'] == 1].iloc[0]
     data.depot_id = 0
-    data.coords = [(depot['XCOORD'], depot['YCOORD'])]  # 车场坐标
-    
-    for _, row in raw_df.iterrows():
-        if row['CUST NO'] == 1:
-            continue  # 跳过车场重复处理
-        
-        node_type = str(row['TYPE']).lower().strip()
-        data.coords.append((row['XCOORD'], row['YCOORD']))
-        
-        if node_type == 'charging_station':
-            data.charge_ids.append(row['CUST NO'] - 1)
-        else:
-            data.customer_ids.append(int(row['CUST NO'] - 1))
-    
+
+    xy = raw_df[['XCOORD', 'YCOORD']].to_numpy(dtype=float)
+    data.coords = list(zip(xy[:, 0].tolist(), xy[:, 1].tolist()))
+
+    is_charge = (raw_df['TYPE'] == 'charging_station').to_numpy(copy=True)
+    is_charge[0] = False
+    node_ids = np.arange(len(raw_df))
+    data.charge_ids = node_ids[is_charge].tolist()
+    data.customer_ids = node_ids[1:][~is_charge[1:]].tolist()
+
     # 构建距离矩阵
-    n = len(data.coords)
-    data.dist_matrix = np.zeros((n, n))
-    for i in range(n):
-        for j in range(n):
-            data.dist_matrix[i][j] = np.hypot(
-                data.coords[i][0]-data.coords[j][0],
-                data.coords[i][1]-data.coords[j][1]
-            )
-    
+    diff = xy[:, None, :] - xy[None, :, :]
+    data.dist_matrix = np.hypot(diff[..., 0], diff[..., 1])
+
     # 为每个客户计算最近充电站
-    for cust in data.customer_ids:
-        min_dist = float('inf')
-        nearest_station = None
-        
-        for chg in data.charge_ids:
-            d = data.dist_matrix[cust][chg]
-            if d < min_dist:
-                min_dist = d
-                nearest_station = chg
-        
-        if nearest_station is None:
-            data.nearest_charge[cust] = None
-        else:
-            data.nearest_charge[cust] = nearest_station
+    if data.charge_ids:
+        cust = np.asarray(data.customer_ids, dtype=int)
+        charge = np.asarray(data.charge_ids, dtype=int)
+        nearest = charge[np.argmin(data.dist_matrix[np.ix_(cust, charge)], axis=1)] if len(cust) else []
+        data.nearest_charge = dict(zip(data.customer_ids, np.asarray(nearest).tolist()))
+    else:
+        data.nearest_charge = {c: None for c in data.customer_ids}
 
     # 需求数据映射
-    data.demands = [0] + [row['DEMAND'] for _, row in raw_df.iterrows() if row['CUST NO'] != 1]
-    
-    return data
\ No newline at end of file
+    demands = raw_df['DEMAND'].to_numpy(dtype=float, copy=True)
+    demands[0] = 0.0
+    data.demands = demands.tolist()
+
+    # 时间窗数据（仅在 cfg.time_windows 开启时使用）
+    data.ready_times = raw_df['READY TIME'].to_numpy(dtype=float).tolist()
+    data.due_times = raw_df['DUE TIME'].to_numpy(dtype=float).tolist()
+    data.service_times = raw_df['SERVICE TIME'].to_numpy(dtype=float).tolist()
+    return data
+
+
+def subset_data(data: VRPData, node_ids) -> VRPData:
+    """
+    抽取子问题数据（用于分解求解）
+    参数：
+        node_ids: 原问题节点编号，首个须为车场
+    返回：
+        VRPData: 子问题数据，其节点 k 对应原问题节点 node_ids[k]
+    """
+    node_ids = list(node_ids)
+    if node_ids[0] != data.depot_id:
+        raise ValueError("子问题节点列表须以车场开头")
+    return build_vrp_data(data.node_df.iloc[node_ids].reset_index(drop=True))
+
+
+def add_customers(data: VRPData, customers):
+    """
+    向实例追加新客户（如动态到达的订单），原有节点编号不变
+    参数：
+        customers: 字典序列，含 x / y / demand，可选 ready_time / due_time / service_time
+    返回：
+        (新的 VRPData, 新客户编号列表)
+    """
+    customers = list(customers)
+    df = data.node_df
+    depot = df.iloc[0]
+    start_no = int(df['CUST NO'].max()) + 1
+    rows = pd.DataFrame({
+        'CUST NO': np.arange(start_no, start_no + len(customers)),
+        'XCOORD': [float(c['x']) for c in customers],
+        'YCOORD': [float(c['y']) for c in customers],
+        'DEMAND': [float(c['demand']) for c in customers],
+        'READY TIME': [float(c.get('ready_time', depot['READY TIME'])) for c in customers],
+        'DUE TIME': [float(c.get('due_time', depot['DUE TIME'])) for c in customers],
+        'SERVICE TIME': [float(c.get('service_time', 0.0)) for c in customers],
+        'TYPE': 'customer',
+    })
+    new_data = build_vrp_data(pd.concat([df, rows], ignore_index=True))
+    return new_data, list(range(len(df), len(df) + len(customers)))
+
+
+def restrict_customers(data: VRPData, customer_ids) -> VRPData:
+    """
+    只保留指定客户的数据视图（节点编号与距离矩阵不变，如动态取消订单后）
+    共享原数据的矩阵，不复制；按实例缓存的派生数据（以 _ 开头的属性）不沿用
+    """
+    view = VRPData()
+    view.__dict__.update({k: v for k, v in data.__dict__.items() if not k.startswith('_')})
+    keep = set(customer_ids)
+    view.customer_ids = [c for c in data.customer_ids if c in keep]
+    view.nearest_charge = {c: data.nearest_charge.get(c) for c in view.customer_ids}
+    return view
+
+
+def compile_instance(source, out_path=None, stations=None, n_neighbors=20) -> Path:
+    """
+    将实例编译为二进制格式（目录 <名称>.evrp），供多个工作进程以只读内存映射共享：
+        nodes_*.npy      节点表各列（TYPE 以 NODE_TYPES 的下标存储）
+        dist.npy         距离矩阵 (n, n) float64
+        neighbors.npy    每个节点按距离升序的前 k 个近邻 (n, k) int32（不含自身）
+        nearest_charge.npy  每个节点的最近换电站编号 (n,) int32，无换电站时为 -1
+        meta.json        版本、车场编号与规模
+    参数：
+        source: 实例路径/实例名，或已加载的 VRPData
+        out_path: 输出目录，默认与实例文件同目录、同名加 .evrp 后缀
+    """
+    if isinstance(source, VRPData):
+        data = source
+        if out_path is None:
+            raise ValueError("由 VRPData 编译时须指定 out_path")
+        name = 'VRPData'
+    else:
+        data = load_instance(source, stations=stations)
+        name = resolve_data_path(source).name
+        if out_path is None:
+            out_path = resolve_data_path(source).with_suffix(COMPILED_SUFFIX)
+    df = data.node_df
+    unknown = sorted({str(t) for t in df['TYPE']} - set(NODE_TYPES))
+    if unknown:
+        raise ValueError(f"{name}: TYPE 列含无法识别的节点类型 {unknown}（可选 {NODE_TYPES}）")
+    out = Path(out_path)
+    out.mkdir(parents=True, exist_ok=True)
+
+    for col in NUMERIC_COLUMNS:
+        np.save(out / f"nodes_{col.replace(' ', '_')}.npy", df[col].to_numpy(dtype=float))
+    np.save(out / "nodes_TYPE.npy", df['TYPE'].map(NODE_TYPES.index).to_numpy(dtype=np.int8))
+
+    dist = np.ascontiguousarray(data.dist_matrix, dtype=float)
+    np.save(out / "dist.npy", dist)
+    k = max(0, min(int(n_neighbors), len(dist) - 1))
+    # 对角线置为无穷大以排除自身；argpartition 取前 k 个后只对这 k 列排序
+    masked = dist.copy()
+    np.fill_diagonal(masked, np.inf)
+    if k > 0:
+        part = np.argpartition(masked, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(masked, part, axis=1), axis=1, kind='stable')
+        neighbors = np.take_along_axis(part, order, axis=1).astype(np.int32)
+    else:
+        neighbors = np.empty((len(dist), 0), dtype=np.int32)
+    np.save(out / "neighbors.npy", neighbors)
+    nearest = np.full(len(dist), -1, dtype=np.int32)
+    if data.charge_ids:
+        charge = np.asarray(data.charge_ids, dtype=int)
+        nearest[:] = charge[np.argmin(dist[:, charge], axis=1)]
+    np.save(out / "nearest_charge.npy", nearest)
+
+    meta = {'version': COMPILED_VERSION, 'depot_id': int(data.depot_id), 'nodes': len(dist),
+            'customers': len(data.customer_ids), 'stations': len(data.charge_ids), 'neighbors': k}
+    (out / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding='utf-8')
+    return out
+
+
+def is_compiled(file_path) -> bool:
+    path = Path(file_path)
+    return path.is_dir() and (path / "meta.json").exists()
+
+
+def open_compiled(path) -> VRPData:
+    """
+    以只读内存映射打开编译实例：距离矩阵与近邻表不复制进进程内存，
+    多个进程打开同一文件时共享操作系统页缓存中的同一份物理内存
+    """
+    path = Path(path)
+    meta = json.loads((path / "meta.json").read_text(encoding='utf-8'))
+    if meta.get('version') != COMPILED_VERSION:
+        raise ValueError(f"编译实例版本不兼容: {meta.get('version')}（当前 {COMPILED_VERSION}），请重新编译")
+
+    columns = {col: np.load(path / f"nodes_{col.replace(' ', '_')}.npy") for col in NUMERIC_COLUMNS}
+    types = np.load(path / "nodes_TYPE.npy")
+    node_df = pd.DataFrame(columns)
+    node_df['TYPE'] = np.asarray(NODE_TYPES, dtype=object)[types]
+
+    data = VRPData()
+    data.node_df = node_df
+    data.depot_id = meta['depot_id']
+    node_ids = np.arange(len(types))
+    data.customer_ids = node_ids[types == 1].tolist()
+    data.charge_ids = node_ids[types == 2].tolist()
+    data.coords = list(zip(columns['XCOORD'].tolist(), columns['YCOORD'].tolist()))
+    demands = columns['DEMAND'].copy()
+    demands[data.depot_id] = 0.0
+    data.demands = demands.tolist()
+    data.ready_times = columns['READY TIME'].tolist()
+    data.due_times = columns['DUE TIME'].tolist()
+    data.service_times = columns['SERVICE TIME'].tolist()
+    data.dist_matrix = np.load(path / "dist.npy", mmap_mode='r')
+    data.neighbors = np.load(path / "neighbors.npy", mmap_mode='r')
+    nearest = np.load(path / "nearest_charge.npy")
+    data.nearest_charge = {c: (int(nearest[c]) if nearest[c] >= 0 else None) for c in data.customer_ids}
+    return data
+
+
+def load_instance(file_path, stations=None) -> VRPData:
+    """
+    通用实例加载
+    参数：
+        file_path: 实例路径（network/Strategy 文件、Solomon CSV，或 "C101" 之类的实例名），
+                   或 compile_instance 生成的 .evrp 目录（内存映射打开）
+        stations: 可选，换电站布局文件或坐标序列，挂载到该实例上
+    返回：
+        VRPData: 结构化数据对象
+    """
+    if is_compiled(resolve_data_path(file_path)):
+        if stations is not None:
+            raise ValueError("编译实例已固定换电站布局，请在编译时指定 stations")
+        return open_compiled(resolve_data_path(file_path))
+    raw_df = read_node_table(file_path)
+    if stations is not None:
+        raw_df = attach_stations(raw_df, stations)
+    return build_vrp_data(raw_df)
+
+
+def load_data(file_path: str) -> VRPData:
+    """
+    读取并预处理输入数据
+    参数：
+        file_path: 数据文件路径（相对路径按 data/ 目录解析）
+    返回：
+        VRPData: 结构化数据对象
+    """
+    return load_instance(file_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="将实例编译为内存映射二进制格式（.evrp 目录）")
+    parser.add_argument('instances', nargs='+', help="实例文件或实例名")
+    parser.add_argument('--stations', default=None, help="挂载的换电站布局文件")
+    parser.add_argument('--out-dir', default=None, help="输出目录，默认与实例文件同目录")
+    parser.add_argument('--neighbors', type=int, default=20)
+    args = parser.parse_args(argv)
+    for inst in args.instances:
+        out = None
+        if args.out_dir:
+            out = Path(args.out_dir) / (resolve_data_path(inst).stem + COMPILED_SUFFIX)
+        path = compile_instance(inst, out, args.stations, args.neighbors)
+        print(f"已编译: {path}")
+
+
+if __name__ == "__main__":
+    main()
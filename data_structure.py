@@ -1,6 +1,3 @@
-import numpy as np
-import pandas as pd
-
 class VRPData:
     """问题数据容器"""
     def __init__(self):
@@ -11,5 +8,9 @@ class VRPData:
         self.dist_matrix = []     # 距离矩阵(numpy)
         self.demands = []         # 节点需求列表
         self.coords = []          # 节点坐标列表
+        self.ready_times = []     # 最早开始服务时间(READY TIME)
+        self.due_times = []       # 最晚开始服务时间(DUE TIME)
+        self.service_times = []   # 服务时间(SERVICE TIME)
 
-        self.nearest_charge = {}  # 最近充电站
\ No newline at end of file
+        self.nearest_charge = {}  # 最近充电站
+        self.neighbors = None     # 按距离升序的近邻表 (n, k)，编译实例打开时提供
\ No newline at end of file
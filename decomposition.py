@@ -0,0 +1,151 @@
+"""
+大规模实例的聚类分解求解：
+1. 按客户坐标做 K-Means 空间划分
+2. 每个簇连同附近换电站构成子问题，在进程池中并行 ALNS 求解
+3. 合并各簇路径，再以合并解为初始解做一轮短的全局 ALNS，平滑簇边界
+cfg.time_limit 为整个分解求解的时间上限：子问题阶段占 1 - global_share，全局平滑阶段使用剩余时间
+"""
+import copy
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .data_process import subset_data
+from .solver import ALNSSolver
+from .utils.helpers import solution_cost
+
+GLOBAL_ITER = 50  # 全局平滑阶段的默认迭代次数上限
+
+
+def partition_customers(data, n_clusters, random_state=0):
+    """
+    按客户坐标做 K-Means 划分
+    返回：
+        clusters: 每个簇的客户编号列表
+        centers: 簇中心坐标数组 (k, 2)
+    """
+    from sklearn.cluster import KMeans
+
+    customers = np.asarray(data.customer_ids, dtype=int)
+    xy = np.asarray(data.coords, dtype=float)[customers]
+    n_clusters = max(1, min(int(n_clusters), len(customers)))
+    kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init='auto')
+    labels = kmeans.fit_predict(xy)
+    clusters = [customers[labels == k].tolist() for k in range(n_clusters)]
+    return [c for c in clusters if c], kmeans.cluster_centers_
+
+
+def cluster_stations(data, clusters, centers):
+    """为每个簇分配附近换电站：距该簇中心最近的换电站 + 簇内客户各自的最近换电站"""
+    if not data.charge_ids:
+        return [[] for _ in clusters]
+    charge = np.asarray(data.charge_ids, dtype=int)
+    charge_xy = np.asarray(data.coords, dtype=float)[charge]
+    # 每个换电站归属于离它最近的簇中心
+    owner = np.argmin(np.hypot(charge_xy[:, None, 0] - centers[None, :, 0],
+                               charge_xy[:, None, 1] - centers[None, :, 1]), axis=1)
+    result = []
+    for k, members in enumerate(clusters):
+        stations = set(charge[owner == k].tolist())
+        stations.update(data.nearest_charge[c] for c in members if data.nearest_charge.get(c) is not None)
+        result.append(sorted(stations))
+    return result
+
+
+def _solve_subproblem(sub_data, sub_cfg, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    solver = ALNSSolver(sub_data, sub_cfg)
+    return solver.solve()
+
+
+def solve_decomposed(data, cfg, n_clusters=None, cluster_size=100, workers=None,
+                     sub_iter=None, global_iter=None, global_share=0.2, allow_extra_vehicles=False,
+                     random_state=0):
+    """
+    聚类分解求解
+    参数：
+        n_clusters: 簇数，默认按每簇约 cluster_size 个客户确定
+        workers: 子问题并行进程数，1 表示串行
+        sub_iter: 子问题的 ALNS 迭代次数，默认取 cfg.max_iter
+        global_iter: 全局平滑阶段的迭代次数，默认取 min(cfg.max_iter, GLOBAL_ITER)
+        global_share: 设置 cfg.time_limit 时留给全局平滑阶段的时间比例
+        allow_extra_vehicles: 合并解车辆数超过 cfg.vehicle_num 时是否放宽车辆数上限，否则抛出 ValueError
+    返回：
+        routes: 原问题编号下的路径列表
+    """
+    start = time.perf_counter()
+    time_limit = getattr(cfg, 'time_limit', None)
+    n_workers = 1 if workers == 1 else (workers or os.cpu_count() or 1)
+    if n_clusters is None:
+        n_clusters = math.ceil(len(data.customer_ids) / cluster_size)
+    clusters, centers = partition_customers(data, n_clusters, random_state)
+    stations = cluster_stations(data, clusters, centers)
+
+    # 子问题阶段的时间按轮次均分（进程数少于簇数时分多轮执行）
+    sub_limit = None
+    if time_limit is not None:
+        rounds = math.ceil(len(clusters) / min(n_workers, len(clusters)))
+        sub_limit = max(0.0, time_limit * (1 - global_share) - (time.perf_counter() - start)) / rounds
+
+    # 1. 构造子问题：每个子问题沿用完整车辆数上限（未用车辆合并时丢弃）；
+    #    按需求估计的车辆数在电量约束下可能不够，插入法构造初始解时会无法完成
+    tasks, mappings = [], []
+    for k, (members, st) in enumerate(zip(clusters, stations)):
+        node_ids = [data.depot_id] + members + st
+        sub_cfg = copy.copy(cfg)
+        if sub_iter is not None:
+            sub_cfg.max_iter = sub_iter
+        if sub_limit is not None:
+            sub_cfg.time_limit = sub_limit
+        tasks.append((subset_data(data, node_ids), sub_cfg, random_state + k))
+        mappings.append(node_ids)
+    print(f"分解为 {len(tasks)} 个子问题，客户数: {[len(c) for c in clusters]}")
+
+    # 2. 并行求解子问题
+    if n_workers == 1 or len(tasks) == 1:
+        sub_results = [_solve_subproblem(*t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            sub_results = list(pool.map(_solve_subproblem, *zip(*tasks)))
+
+    # 3. 合并路径（子问题编号映射回原问题编号）
+    merged = []
+    for routes, node_ids in zip(sub_results, mappings):
+        merged.extend([node_ids[n] for n in r] for r in routes if len(r) > 2)
+    print(f"合并后使用车辆 {len(merged)} 辆，成本 {solution_cost(data, cfg, merged):.2f}")
+
+    global_cfg = copy.copy(cfg)
+    if len(merged) > cfg.vehicle_num:
+        if not allow_extra_vehicles:
+            raise ValueError(f"合并解使用 {len(merged)} 辆车，超过可用车辆数 {cfg.vehicle_num}；"
+                             f"可增大 vehicle_num，或设置 allow_extra_vehicles=True 放宽上限")
+        print(f"警告：合并解使用 {len(merged)} 辆车，车辆数上限由 {cfg.vehicle_num} 放宽为 {len(merged)}")
+        global_cfg.vehicle_num = len(merged)
+
+    # 4. 全局 ALNS 平滑簇边界（短迭代，时间为总上限的剩余部分）
+    global_cfg.max_iter = min(cfg.max_iter, GLOBAL_ITER) if global_iter is None else global_iter
+    if time_limit is not None:
+        global_cfg.time_limit = time_limit - (time.perf_counter() - start)
+    merged += [[data.depot_id, data.depot_id] for _ in range(global_cfg.vehicle_num - len(merged))]
+    if global_cfg.max_iter <= 0 or (global_cfg.time_limit is not None and global_cfg.time_limit <= 0):
+        return merged
+    random.seed(random_state)
+    return ALNSSolver(data, global_cfg).solve(initial_solution=merged)
+
+
+class DecompositionSolver:
+    """与 ALNSSolver 调用习惯一致的分解求解器封装"""
+    def __init__(self, data, config, **kwargs):
+        self.data = data
+        self.cfg = config
+        self.kwargs = kwargs
+        self.best_solution = None
+
+    def solve(self):
+        self.best_solution = solve_decomposed(self.data, self.cfg, **self.kwargs)
+        return self.best_solution
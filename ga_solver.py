@@ -1,9 +1,73 @@
 import random
 import copy
-from .utils.helpers import solution_cost, route_feasibility_check, charging_insert
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .utils.helpers import (solution_cost, route_feasibility_check, charging_insert,
+                            handle_unassigned_customers, rearrange_empty_vehicles)
+from .utils.memory import start_memory_profile
+
+
+def educate(data, cfg, routes, moves=2, time_cap=0.5, destroy_degree=0.1, deadline=None):
+    """
+    个体教育（模因算法的局部改进）：2-opt -> 换电站剪枝 -> 至多 moves 次 ALNS 破坏/修复，
+    受单个体时间上限 time_cap(秒) 约束，破坏/修复仅在成本下降时接受。
+    deadline: 可选的全局 time.perf_counter() 截止时刻，教育时间取两者中较早者。
+    修复只用贪婪插入：后悔值插入单次耗时远超教育时间上限
+    """
+    from .operators.destroy_ops import DESTROY_OPERATORS, VEHICLE_LEVEL_OPERATORS
+    from .operators.repair_ops import greedy_cs_insert
+    from .operators.local_search import local_search_2opt, local_search_prune_stations
+
+    cap = time.perf_counter() + time_cap
+    deadline = cap if deadline is None else min(cap, deadline)
+    routes = local_search_2opt(data, cfg, [list(r) for r in routes], deadline)
+    if time.perf_counter() >= deadline:
+        return routes
+    routes = local_search_prune_stations(data, cfg, routes)
+
+    destroy_ops = [op for op in DESTROY_OPERATORS if op not in VEHICLE_LEVEL_OPERATORS]
+    q = max(1, int(destroy_degree * len(data.customer_ids)))
+    cost = solution_cost(data, cfg, routes)
+    for _ in range(moves):
+        if time.perf_counter() >= deadline:
+            break
+        destroyed, removed = random.choice(destroy_ops)(data, cfg, routes, q)
+        candidate = greedy_cs_insert(data, cfg, destroyed, removed)
+        candidate, has_unassigned = handle_unassigned_customers(data, cfg, candidate)
+        if has_unassigned:
+            continue
+        new_cost = solution_cost(data, cfg, candidate)
+        if new_cost < cost:
+            routes, cost = rearrange_empty_vehicles(candidate), new_cost
+    return routes
+
+
+_WORKER_SOLVER = None
+
+
+def _init_worker(data, cfg, options):
+    # 每个工作进程只接收一次实例数据，之后的任务仅传递染色体
+    global _WORKER_SOLVER
+    _WORKER_SOLVER = GASolver(data, cfg, **options)
+
+
+def _worker_evaluate(chromosome, seed, wall_deadline=None):
+    # 截止时刻以墙钟时间跨进程传递，在工作进程中换算回 perf_counter
+    deadline = None
+    if wall_deadline is not None:
+        deadline = time.perf_counter() + (wall_deadline - time.time())
+    return _WORKER_SOLVER.evaluate_one(chromosome, seed, deadline)
+
 
 class GASolver:
-    def __init__(self, data, config):
+    def __init__(self, data, config, memetic=False, educate_moves=2, educate_time=0.5, workers=1):
+        """
+        参数：
+            memetic: 模因模式，子代解码后用 educate 做局部改进，并将改进后的路径编码回染色体
+            educate_moves: 每个个体教育时的破坏/修复次数
+            educate_time: 每个个体的教育时间上限(秒)
+            workers: 模因模式下并行教育的进程数，1 表示串行
+        """
         self.data = data
         self.cfg = config
         
@@ -13,6 +77,11 @@ class GASolver:
         self.crossover_rate = 0.8          # 交叉概率
         self.mutation_rate = 0.2           # 变异概率
         self.tournament_size = 3           # 锦标赛选择规模
+
+        self.memetic = memetic
+        self.educate_moves = educate_moves
+        self.educate_time = educate_time
+        self.workers = workers
         
         self.best_solution = None
         self.best_cost = float('inf')
@@ -57,26 +126,54 @@ class GASolver:
             
         return routes
 
-    def evaluate(self, population):
-        """评估种群适应度，惩罚超出车辆数限制的解"""
-        scored_pop = []
-        for ind in population:
-            routes = self.decode(ind)
-            
-            # 计算客观成本
-            cost = solution_cost(self.data, self.cfg, routes)
-            
-            # 软约束硬惩罚：如果调用的车辆大于可用车辆数，给予巨额惩罚
-            used_vehicles = sum(1 for r in routes if len(r) > 2)
-            if used_vehicles > self.cfg.vehicle_num:
-                cost += (used_vehicles - self.cfg.vehicle_num) * 10000 
-            
-            scored_pop.append({'chromosome': ind, 'cost': cost, 'routes': routes})
-            
+    def encode(self, routes):
+        """编码：按路径顺序取出客户，得到巨型路线（换电站与车场由解码重新确定）"""
+        customers = set(self.data.customer_ids)
+        return [n for r in routes for n in r if n in customers]
+
+    def evaluate_one(self, chromosome, seed=None, deadline=None):
+        """
+        解码单个个体并计算带惩罚的成本；模因模式下先教育再编码回染色体
+        deadline: 全局 time.perf_counter() 截止时刻，已过截止时刻时只解码不教育
+        """
+        routes = self.decode(chromosome)
+        if self.memetic and (deadline is None or time.perf_counter() < deadline):
+            if seed is not None:
+                random.seed(seed)
+            routes = educate(self.data, self.cfg, routes, self.educate_moves, self.educate_time, deadline=deadline)
+            chromosome = self.encode(routes)
+
+        # 计算客观成本
+        cost = solution_cost(self.data, self.cfg, routes)
+        
+        # 软约束硬惩罚：如果调用的车辆大于可用车辆数，给予巨额惩罚
+        used_vehicles = sum(1 for r in routes if len(r) > 2)
+        if used_vehicles > self.cfg.vehicle_num:
+            cost += (used_vehicles - self.cfg.vehicle_num) * 10000 
+        return {'chromosome': chromosome, 'cost': cost, 'routes': routes, 'used': used_vehicles}
+
+    def evaluate(self, population, pool=None, known=None, deadline=None):
+        """
+        评估种群适应度，惩罚超出车辆数限制的解
+        known: 上一代的评估结果（按染色体索引），精英等重复个体不再重新解码/教育
+        deadline: 全局 time.perf_counter() 截止时刻，传给每个个体的教育
+        """
+        known = known or {}
+        todo = [ind for ind in population if tuple(ind) not in known]
+        if pool is not None:
+            seeds = [random.randrange(2**31) for _ in todo]
+            wall = None if deadline is None else time.time() + (deadline - time.perf_counter())
+            results = list(pool.map(_worker_evaluate, todo, seeds, [wall] * len(todo)))
+        else:
+            results = [self.evaluate_one(ind, deadline=deadline) for ind in todo]
+        results = iter(results)
+        scored_pop = [known[tuple(ind)] if tuple(ind) in known else next(results) for ind in population]
+
+        for ind in scored_pop:
             # 记录全局最优 (只有合法解才记录)
-            if cost < self.best_cost and used_vehicles <= self.cfg.vehicle_num:
-                self.best_cost = cost
-                self.best_solution = copy.deepcopy(routes)
+            if ind['cost'] < self.best_cost and ind['used'] <= self.cfg.vehicle_num:
+                self.best_cost = ind['cost']
+                self.best_solution = copy.deepcopy(ind['routes'])
                 
         return scored_pop
 
@@ -125,7 +222,30 @@ class GASolver:
 
     def solve(self):
         """对外暴露的求解入口，与 ALNSSolver 保持相同的调用习惯"""
-        print(">>> 启动遗传算法 (GA) 求解器...")
+        print(">>> 启动模因算法 (GA + ALNS 教育) 求解器..." if self.memetic else ">>> 启动遗传算法 (GA) 求解器...")
+        pool = None
+        if self.memetic and self.workers != 1:
+            options = {'memetic': True, 'educate_moves': self.educate_moves, 'educate_time': self.educate_time}
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                       initargs=(self.data, self.cfg, options))
+        try:
+            return self._solve(pool)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def _solve(self, pool):
+        start_time = time.perf_counter()
+        time_limit = getattr(self.cfg, 'time_limit', None)
+        mem, own_mem = start_memory_profile(self.cfg)
+        try:
+            return self._evolve(pool, start_time, time_limit, mem)
+        finally:
+            if own_mem:
+                print(mem.report())
+                mem.stop()
+
+    def _evolve(self, pool, start_time, time_limit, mem):
         
         # 1. 初始化种群 (随机打乱所有客户点)
         population = []
@@ -134,10 +254,20 @@ class GASolver:
             ind = copy.copy(customer_list)
             random.shuffle(ind)
             population.append(ind)
-            
-        # 2. 演化迭代
+        if mem is not None:
+            mem.lap('population')
+
+        # 2. 演化迭代（第 0 代总会评估以得到可返回的解，超过截止时刻的个体只解码不教育）
+        deadline = None if time_limit is None else start_time + time_limit
+        known = {}
         for gen in range(self.generations):
-            scored_pop = self.evaluate(population)
+            if deadline is not None and gen > 0 and time.perf_counter() >= deadline:
+                print(f"GA 达到时间上限 {time_limit}s，提前结束于第 {gen} 代")
+                break
+            scored_pop = self.evaluate(population, pool, known, deadline)
+            known = {tuple(ind['chromosome']): ind for ind in scored_pop}
+            if mem is not None:
+                mem.lap('evaluate')
             
             # 按成本升序排列
             scored_pop.sort(key=lambda x: x['cost'])
@@ -161,6 +291,8 @@ class GASolver:
                 new_population.extend([c1, c2])
                 
             population = new_population[:self.pop_size]
+            if mem is not None:
+                mem.lap('breed')
             
             # 打印收敛过程
             if gen % 10 == 0 or gen == self.generations - 1:
@@ -168,6 +300,7 @@ class GASolver:
                 
         # 最终可能会产生空缺客户问题（极少情况），可套用您的后处理防抖
         from .utils.helpers import handle_unassigned_customers
-        self.best_solution, _ = handle_unassigned_customers(self.data, self.cfg, self.best_solution)
+        if self.best_solution is not None:
+            self.best_solution, _ = handle_unassigned_customers(self.data, self.cfg, self.best_solution)
         
         return self.best_solution
\ No newline at end of file
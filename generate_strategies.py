@@ -1,130 +1,165 @@
-import pandas as pd
-import numpy as np
-from sklearn.cluster import KMeans
-import math
+"""
+换电站布局生成：
+- centers: 换电站位于客户 K-Means 聚类中心（原策略 1）
+- ring:    换电站位于按车场极角排序后相邻聚类中心的中点（原策略 2）
+- hybrid:  centers 与 ring 的并集
+聚类结果按 (实例文件, 修改时间, K, 随机种子) 缓存，可选落盘到 cache_dir，
+扫描大量布局时不会重复聚类，也无需写出布局文件即可直接加载实例。
+
+命令行（在包的上级目录执行）：
+    python -m <包名>.generate_strategies --instance data/C101network.txt --k 10
+"""
+import argparse
+import hashlib
 import os
+from pathlib import Path
+
+import numpy as np
 
-# === 配置路径 ===
-# 请确保输入文件路径正确
-input_file = 'data/C101network.txt' 
-output_dir = 'data'
-
-def read_solomon_data(filepath):
-    """读取原始Solomon格式数据"""
-    # 这里的 names 对应您 C101network.txt 中的列名
-    # 注意：原始文件第一行可能是列名，需要正确跳过或读取
-    try:
-        df = pd.read_csv(filepath)
-    except Exception:
-        # 如果读取失败，尝试作为纯文本读取并处理
-        df = pd.read_csv(filepath, delimiter=',')
-        
-    # 清洗列名（去除空格）
-    df.columns = [c.strip() for c in df.columns]
-    return df
-
-def add_charging_stations(original_df, station_coords, strategy_name):
-    """构建包含新充电站的DataFrame"""
-    df = original_df.copy()
-    
-    # 1. 为原始数据添加 TYPE 列
-    # 车场 (ID 1) 为 'depot'，其余为 'customer'
-    df['TYPE'] = df['CUST NO'].apply(lambda x: 'depot' if x == 1 else 'customer')
-    
-    # 2. 获取车场的时间窗信息（通常充电站时间窗与车场一致，表示全天开放）
-    depot_row = df[df['CUST NO'] == 1].iloc[0]
-    depot_ready = depot_row['READY TIME']
-    depot_due = depot_row['DUE TIME']
-    
-    # 3. 创建新充电站节点
-    new_rows = []
-    max_id = df['CUST NO'].max()
-    
-    for i, (x, y) in enumerate(station_coords):
-        new_id = max_id + 1 + i
-        new_row = {
-            'CUST NO': new_id,
-            'XCOORD': round(x, 2),
-            'YCOORD': round(y, 2),
-            'DEMAND': 0.0,             # 充电站无需求
-            'READY TIME': depot_ready, # 与车场一致
-            'DUE TIME': depot_due,     # 与车场一致
-            'SERVICE TIME': 0.0,       # 充电站服务时间设为0（或根据需要调整）
-            'TYPE': 'charging_station' # 关键字段，适配 data_process.py
-        }
-        new_rows.append(new_row)
-        
-    # 4. 合并数据
-    stations_df = pd.DataFrame(new_rows)
-    final_df = pd.concat([df, stations_df], ignore_index=True)
-    
-    return final_df
-
-def save_data(df, filename):
+from .data_process import DATA_DIR, attach_stations, load_instance, read_node_table, resolve_data_path
+
+_CENTER_CACHE = {}
+_LAYOUT_CACHE = {}
+
+
+def _instance_key(instance):
+    path = resolve_data_path(instance).resolve()
+    return str(path), path.stat().st_mtime_ns
+
+
+def customer_coords(instance):
+    """实例中客户坐标 (n, 2)，同时返回车场坐标"""
+    df = read_node_table(instance)
+    depot = df[df['TYPE'] == 'depot'].iloc[0]
+    xy = df.loc[df['TYPE'] == 'customer', ['XCOORD', 'YCOORD']].to_numpy(dtype=float)
+    return xy, np.array([depot['XCOORD'], depot['YCOORD']], dtype=float)
+
+
+def resolve_k(instance, k, random_state=42):
+    """k 为 'auto' 时按轮廓系数自动选择聚类数（结果缓存）"""
+    if k != 'auto':
+        return int(k)
+    key = (*_instance_key(instance), 'auto', random_state)
+    if key not in _CENTER_CACHE:
+        from .utils.auto_cluster_customers import select_cluster_count
+        xy, _ = customer_coords(instance)
+        _CENTER_CACHE[key] = select_cluster_count(xy, random_state=random_state)[0]
+    return _CENTER_CACHE[key]
+
+
+def cluster_centers(instance, k=10, random_state=42, cache_dir=None):
+    """
+    客户 K-Means 聚类中心（带缓存）
+    参数：
+        k: 聚类数，'auto' 表示自动选择
+        cache_dir: 可选，聚类结果落盘目录，跨进程/跨运行复用
+    """
+    k = resolve_k(instance, k, random_state)
+    key = (*_instance_key(instance), k, random_state)
+    if key in _CENTER_CACHE:
+        return _CENTER_CACHE[key]
+
+    cache_file = None
+    if cache_dir is not None:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        cache_file = Path(cache_dir) / f"{Path(key[0]).stem}_k{k}_{digest}.npy"
+        if cache_file.exists():
+            _CENTER_CACHE[key] = np.load(cache_file)
+            return _CENTER_CACHE[key]
+
+    from sklearn.cluster import KMeans
+    xy, _ = customer_coords(instance)
+    kmeans = KMeans(n_clusters=int(k), random_state=random_state, n_init='auto')
+    kmeans.fit(xy)
+    centers = kmeans.cluster_centers_
+    centers.setflags(write=False)
+    _CENTER_CACHE[key] = centers
+
+    if cache_file is not None:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        np.save(cache_file, centers)
+    return centers
+
+
+def ring_midpoints(centers, depot_xy):
+    """按相对车场的极角排序聚类中心，返回相邻中心（首尾相连成环）的中点"""
+    vectors = centers - np.asarray(depot_xy)
+    ordered = centers[np.argsort(np.arctan2(vectors[:, 1], vectors[:, 0]))]
+    return (ordered + np.roll(ordered, -1, axis=0)) / 2
+
+
+def _centers_layout(centers, depot_xy):
+    return np.array(centers)  # 复制一份，避免与聚类缓存共享
+
+
+def _hybrid_layout(centers, depot_xy):
+    return np.vstack([centers, ring_midpoints(centers, depot_xy)])
+
+
+LAYOUT_STRATEGIES = {
+    'centers': _centers_layout,
+    'ring': ring_midpoints,
+    'hybrid': _hybrid_layout,
+}
+
+
+def generate_layout(instance, strategy='centers', k=10, random_state=42, cache_dir=None):
+    """
+    生成换电站布局坐标
+    参数：
+        instance: 实例文件或实例名
+        strategy: LAYOUT_STRATEGIES 中的策略名
+        k: 聚类数，'auto' 表示自动选择
+    返回：
+        np.ndarray: 换电站坐标 (m, 2)
+    """
+    if strategy not in LAYOUT_STRATEGIES:
+        raise ValueError(f"未知布局策略: {strategy}（可选 {list(LAYOUT_STRATEGIES)}）")
+    k = resolve_k(instance, k, random_state)
+    key = (*_instance_key(instance), strategy, k, random_state)
+    if key not in _LAYOUT_CACHE:
+        centers = cluster_centers(instance, k, random_state, cache_dir)
+        _, depot_xy = customer_coords(instance)
+        layout = LAYOUT_STRATEGIES[strategy](centers, depot_xy)
+        layout.setflags(write=False)
+        _LAYOUT_CACHE[key] = layout
+    return _LAYOUT_CACHE[key]
+
+
+def load_layout_instance(instance, strategy='centers', k=10, random_state=42, cache_dir=None):
+    """直接加载挂载了生成布局的实例（不写出布局文件）"""
+    return load_instance(instance, stations=generate_layout(instance, strategy, k, random_state, cache_dir))
+
+
+def save_layout(instance, station_coords, filename, output_dir=DATA_DIR):
     """保存为适配 data_process.py 读取的 CSV 格式"""
+    df = attach_stations(read_node_table(instance), station_coords)
     save_path = os.path.join(output_dir, filename)
     # 保持浮点数格式
     df.to_csv(save_path, index=False, float_format='%.2f')
     print(f"文件已生成: {save_path} (节点总数: {len(df)})")
-
-# === 主逻辑 ===
-
-# 1. 读取数据
-print("正在读取原始数据...")
-# 注意：根据您提供的文件内容，它是逗号分隔的
-df_raw = read_solomon_data(input_file)
-
-# 准备聚类数据 (排除车场)
-customers = df_raw[df_raw['CUST NO'] != 1].copy()
-X = customers[['XCOORD', 'YCOORD']].values
-depot = df_raw[df_raw['CUST NO'] == 1].iloc[0]
-depot_coords = (depot['XCOORD'], depot['YCOORD'])
-
-# 2. 执行聚类 (K=10)
-print("正在执行 K-Means 聚类...")
-kmeans = KMeans(n_clusters=10, random_state=42, n_init='auto')
-customers['Cluster'] = kmeans.fit_predict(X)
-centers = kmeans.cluster_centers_
-
-# === 策略 1: 充电站位于聚类中心 ===
-print("\n生成策略 1 数据 (Cluster Centers)...")
-strategy1_coords = centers
-df_strat1 = add_charging_stations(df_raw, strategy1_coords, "Strategy1")
-save_data(df_strat1, 'C101_Strategy1_Centers.txt')
-
-
-# === 策略 2: 充电站位于相邻聚类之间的环状位置 ===
-print("\n生成策略 2 数据 (Ring Midpoints)...")
-
-# 计算每个中心相对于车场的角度，以便按环状排序
-center_vectors = centers - np.array(depot_coords)
-angles = np.arctan2(center_vectors[:, 1], center_vectors[:, 0]) # 返回弧度 (-pi, pi)
-
-# 获取排序后的索引
-sorted_indices = np.argsort(angles)
-sorted_centers = centers[sorted_indices]
-
-# 计算相邻中心的中点
-strategy2_coords = []
-n_centers = len(sorted_centers)
-
-# 您提到要 9 个充电站。
-# 通常 10 个聚类形成闭环会有 10 个间隔。
-# 这里我生成所有 10 个间隔的中点。如果您严格只需要 9 个，可以切片 [:9]
-# 但为了保持环的完整性，建议使用 10 个。
-# 如果必须是 9 个，请解开下面注释的一行：
-# range_limit = n_centers - 1 
-range_limit = n_centers 
-
-for i in range(range_limit):
-    p1 = sorted_centers[i]
-    p2 = sorted_centers[(i + 1) % n_centers] # 取模以连接最后一个和第一个
-    
-    mid_x = (p1[0] + p2[0]) / 2
-    mid_y = (p1[1] + p2[1]) / 2
-    strategy2_coords.append((mid_x, mid_y))
-
-df_strat2 = add_charging_stations(df_raw, strategy2_coords, "Strategy2")
-save_data(df_strat2, 'C101_Strategy2_Ring.txt')
-
-print("\n处理完成。请修改 main.py 或 config.py 中的数据文件路径以运行实验。")
\ No newline at end of file
+    return save_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成换电站布局文件")
+    parser.add_argument('--instance', default=str(DATA_DIR / 'C101network.txt'))
+    parser.add_argument('--k', default='10', help="聚类数，auto 表示按轮廓系数自动选择")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--strategies', nargs='+', default=['centers', 'ring'], choices=list(LAYOUT_STRATEGIES))
+    parser.add_argument('--out-dir', default=str(DATA_DIR))
+    args = parser.parse_args(argv)
+    args.k = resolve_k(args.instance, args.k, args.seed)
+
+    # 与原脚本一致的文件命名：C101_Strategy1_Centers.txt / C101_Strategy2_Ring.txt
+    names = {'centers': 'Strategy1_Centers', 'ring': 'Strategy2_Ring', 'hybrid': 'Strategy3_Hybrid'}
+    prefix = Path(args.instance).stem.replace('network', '')
+    for strategy in args.strategies:
+        print(f"\n生成 {strategy} 布局 (K={args.k})...")
+        coords = generate_layout(args.instance, strategy, args.k, args.seed)
+        suffix = names[strategy] if args.k == 10 else f"{names[strategy]}_K{args.k}"
+        save_layout(args.instance, coords, f"{prefix}_{suffix}.txt", args.out_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,18 @@
 import copy
+import heapq
+import math
+import numpy as np
 from .utils.helpers import route_feasibility_check,solution_cost,charging_insert
+from .utils.route_state import RouteState
+from .utils.time_windows import get_time_windows
+
+
+def build_initial_solution(data, cfg):
+    """按 cfg.init_method 选择初始解构造方法"""
+    method = getattr(cfg, 'init_method', 'insertion')
+    if method not in INIT_METHODS:
+        raise ValueError(f"未知初始解构造方法: {method}（可选 {list(INIT_METHODS)}）")
+    return INIT_METHODS[method](data, cfg)
 
 def generate_initial_solution(data, cfg):
     depot = data.depot_id
@@ -108,16 +121,208 @@ def generate_initial_solution(data, cfg):
     return routes
 
 def nearest_neighbor_sort(data, remaining_customers, depot):
-    sorted_customers = []
-    current = depot
-    unvisited = set(remaining_customers)
-    while unvisited:
-        nearest, min_dist = None, float('inf')
-        for node in unvisited:
-            d = data.dist_matrix[current][node]
-            if d < min_dist:
-                min_dist, nearest = d, node
-        sorted_customers.append(nearest)
-        unvisited.remove(nearest)
-        current = nearest
-    return sorted_customers
+    """最近邻排序：每步对当前节点到未访问客户的距离行做一次向量化 argmin"""
+    customers = np.asarray(list(remaining_customers), dtype=int)
+    if len(customers) == 0:
+        return []
+    sub = np.asarray(data.dist_matrix)[np.ix_(customers, customers)].copy()
+    np.fill_diagonal(sub, np.inf)
+    dist_row = np.asarray(data.dist_matrix)[depot, customers].astype(float)
+    sorted_idx = []
+    for _ in range(len(customers)):
+        k = int(np.argmin(dist_row))
+        sorted_idx.append(k)
+        sub[:, k] = np.inf
+        dist_row = sub[k]
+    return customers[sorted_idx].tolist()
+
+
+def _sweep_order(data):
+    """按相对车场的极角排序客户，并从最大角度间隙处开始扫描"""
+    customers = np.asarray(data.customer_ids, dtype=int)
+    xy = np.asarray(data.coords, dtype=float)
+    vec = xy[customers] - xy[data.depot_id]
+    angles = np.arctan2(vec[:, 1], vec[:, 0])
+    order = np.argsort(angles, kind='stable')
+    gaps = np.diff(np.concatenate([angles[order], [angles[order[0]] + 2 * math.pi]]))
+    start = (int(np.argmax(gaps)) + 1) % len(order)
+    return customers[np.roll(order, -start)].tolist()
+
+
+TW_SWEEP_SECTORS = 4  # 时间窗扫描的扇区数：扇区过窄时 DUE TIME 排序作用有限，所需车辆反而更多
+
+
+def _tw_sweep_order(data, cfg):
+    """开启时间窗时：极角序列均分为 TW_SWEEP_SECTORS 个扇区，扇区内按 DUE TIME 升序"""
+    order = _sweep_order(data)
+    tw = get_time_windows(data, cfg)
+    size = max(1, math.ceil(len(order) / TW_SWEEP_SECTORS))
+    return [c for k in range(0, len(order), size)
+            for c in sorted(order[k:k + size], key=lambda c: tw.due[c])]
+
+
+def _tw_sweep_routes(data, cfg):
+    """时间窗扫描：每个客户追加到增量距离最小的可行已开路径末尾，都不可行时启用新车"""
+    states = []
+    for cust in _tw_sweep_order(data, cfg):
+        best, best_delta = None, float('inf')
+        for state in states:
+            ok, delta = state.append_delta(cust)
+            if ok and delta < best_delta:
+                best, best_delta = state, delta
+        if best is not None:
+            best.append(cust)
+            continue
+        if not any(state.try_append(cust) for state in states):
+            state = RouteState(data, cfg)
+            if not state.try_append(cust):
+                raise ValueError(f"客户 {cust} 无法由单车单独服务（容量、电量或时间窗不满足）")
+            states.append(state)
+    return [state.route() for state in states]
+
+
+def generate_sweep_solution(data, cfg):
+    """
+    扫描法构造初始解（O(n log n) 排序 + 每客户 O(换电段数) 的增量可行性判断）：
+    按极角顺序依次将客户追加到当前车辆末尾，电量不足时经由最近换电站补能，
+    容量或电量无法满足时启用下一辆车。
+    开启时间窗时按扇区内的 DUE TIME 顺序，将客户追加到增量最小的可行已开路径；
+    所需车辆仍超过上限时改用节约法构造。
+    """
+    depot = data.depot_id
+    if not data.customer_ids:
+        return [[depot, depot] for _ in range(cfg.vehicle_num)]
+    if get_time_windows(data, cfg) is not None:
+        routes = _tw_sweep_routes(data, cfg)
+        if len(routes) > cfg.vehicle_num:
+            print(f"扫描法需要 {len(routes)} 辆车，超过可用车辆数 {cfg.vehicle_num}，改用节约法构造初始解")
+            return generate_savings_solution(data, cfg)
+        return routes + [[depot, depot] for _ in range(cfg.vehicle_num - len(routes))]
+    routes = []
+    state = RouteState(data, cfg)
+    for cust in _sweep_order(data):
+        if state.try_append(cust):
+            continue
+        if state.is_empty:
+            raise ValueError(f"客户 {cust} 无法由单车单独服务（容量或电量不足）")
+        routes.append(state.route())
+        state = RouteState(data, cfg)
+        if not state.try_append(cust):
+            raise ValueError(f"客户 {cust} 无法由单车单独服务（容量或电量不足）")
+    routes.append(state.route())
+
+    if len(routes) > cfg.vehicle_num:
+        raise ValueError(f"扫描法需要 {len(routes)} 辆车，超过可用车辆数 {cfg.vehicle_num}")
+    return routes + [[depot, depot] for _ in range(cfg.vehicle_num - len(routes))]
+
+
+def _savings_heap(data):
+    """向量化计算节约值矩阵 s_ij = d_0i + d_0j - d_ij，取正值构成最大堆"""
+    customers = np.asarray(data.customer_ids, dtype=int)
+    dist = np.asarray(data.dist_matrix, dtype=float)
+    d0 = dist[data.depot_id, customers]
+    savings = d0[:, None] + d0[None, :] - dist[np.ix_(customers, customers)]
+    iu, ju = np.triu_indices(len(customers), k=1)
+    values = savings[iu, ju]
+    keep = values > 0
+    heap = list(zip((-values[keep]).tolist(), customers[iu[keep]].tolist(), customers[ju[keep]].tolist()))
+    heapq.heapify(heap)
+    return heap
+
+
+def _merge_with_station(data, cfg, a, b):
+    """直接合并电量不足时，在合并路径上插入一个换电站；成本下降才接受"""
+    merged = a.route()[:-1] + b.nodes[1:] + [data.depot_id]
+    success, new_route = charging_insert(data, cfg, merged)
+    if not success:
+        return None
+    if solution_cost(data, cfg, [new_route]) >= solution_cost(data, cfg, [a.route(), b.route()]):
+        return None
+    return RouteState.from_route(data, cfg, new_route)
+
+
+def _reversed(data, cfg, state):
+    """路径反向后的状态（无时间窗时反向路径仍合法，电量由 from_route 按新载重重新计算）"""
+    return RouteState.from_route(data, cfg, state.route()[::-1])
+
+
+def generate_savings_solution(data, cfg):
+    """
+    考虑电量的 Clarke-Wright 节约法构造初始解：
+    1. 每个客户单独成路（单独往返电量不足时经由最近换电站）
+    2. 按节约值从大到小（堆）尝试在端点客户处合并两条路径，端点客户缓存于 head / tail；
+       未开启时间窗时也尝试尾-尾、首-首相接（将其中一条路径反向）
+    3. 路径端点可能是插入的换电站，合并前按实际端点（RouteState.last）重算节约值，
+       变小则按新值放回堆中；容量/电量由 RouteState 增量判断
+    4. 仅当直接合并电量不足时，才在合并路径上插入换电站
+    """
+    depot = data.depot_id
+    if not data.customer_ids:
+        return [[depot, depot] for _ in range(cfg.vehicle_num)]
+    charges = set(data.charge_ids)
+    reversible = get_time_windows(data, cfg) is None
+    states, owner, head, tail = {}, {}, {}, {}
+    for cust in data.customer_ids:
+        state = RouteState(data, cfg)
+        if not state.try_append(cust):
+            raise ValueError(f"客户 {cust} 无法由单车单独服务（容量或电量不足）")
+        states[cust] = state
+        owner[cust] = cust
+        head[cust] = tail[cust] = cust
+
+    heap = _savings_heap(data)
+    while heap:
+        neg_saving, i, j = heapq.heappop(heap)
+        ri, rj = owner[i], owner[j]
+        if ri == rj:
+            continue
+        # 只能在路径端点处相接，flip 为需要反向的路径
+        if tail[ri] == i and head[rj] == j:
+            first, second, flip = ri, rj, None
+        elif tail[rj] == j and head[ri] == i:
+            first, second, flip = rj, ri, None
+        elif reversible and tail[ri] == i and tail[rj] == j:
+            first, second, flip = ri, rj, rj
+        elif reversible and head[ri] == i and head[rj] == j:
+            first, second, flip = ri, rj, ri
+        else:
+            continue
+        a, b = states[first], states[second]
+        if a.load + b.load > cfg.car_capacity:
+            continue
+        if flip == first:
+            a = _reversed(data, cfg, a)
+        elif flip == second:
+            b = _reversed(data, cfg, b)
+        ok, saving = a.merge_delta(b)
+        if ok:
+            if saving < -neg_saving - 1e-9:
+                if saving > 0:
+                    heapq.heappush(heap, (-saving, i, j))
+                continue
+            a.merge(b)
+            states[first] = a
+        else:
+            merged = _merge_with_station(data, cfg, a, b)
+            if merged is None:
+                continue
+            states[first] = merged
+        for node in b.nodes[1:]:
+            if node not in charges:
+                owner[node] = first
+        new_head = tail[first] if flip == first else head[first]
+        new_tail = head[second] if flip == second else tail[second]
+        head[first], tail[first] = new_head, new_tail
+        del states[second], head[second], tail[second]
+
+    routes = [state.route() for state in states.values()]
+    if len(routes) > cfg.vehicle_num:
+        raise ValueError(f"节约法需要 {len(routes)} 辆车，超过可用车辆数 {cfg.vehicle_num}")
+    return routes + [[depot, depot] for _ in range(cfg.vehicle_num - len(routes))]
+
+
+INIT_METHODS = {
+    'insertion': generate_initial_solution,
+    'sweep': generate_sweep_solution,
+    'savings': generate_savings_solution,
+}
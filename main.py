@@ -2,12 +2,13 @@ from .config import DataConfig
 from .data_process import load_data
 from .solver import ALNSSolver
 from .ga_solver import GASolver
-from .visualization import visualize_solution, print_cost_breakdown, plot_convergence
 import os
-from .visualization import print_routes
 
 
 def main():
+    # 绘图依赖(matplotlib)仅在输出结果时才需要，延迟导入以加快启动
+    from .visualization import visualize_solution, print_cost_breakdown, plot_convergence, print_routes
+
     # 1. 加载数据
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     vrp_data = load_data("C101_Strategy1_Centers.txt")
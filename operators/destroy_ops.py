@@ -30,44 +30,184 @@ def random_remove(data, cfg, solution, q=20):
             
     return destroyed, removed
 
+def _customer_mask(data):
+    """节点是否为客户的布尔数组（缓存在 data 上）"""
+    mask = getattr(data, '_customer_mask', None)
+    if mask is None:
+        mask = np.zeros(len(data.dist_matrix), dtype=bool)
+        mask[np.asarray(data.customer_ids, dtype=int)] = True
+        data._customer_mask = mask
+    return mask
+
+def relatedness_matrix(data, cfg):
+    """
+    Shaw 相关度矩阵（值越小越相关，缓存在 data 上）：
+    R[i, j] = w_d × 距离/最大距离 + w_q × |需求差|/最大需求 + w_s × [最近换电站不同]
+    """
+    key = (cfg.shaw_distance_weight, cfg.shaw_demand_weight, cfg.shaw_station_weight)
+    cache = data.__dict__.setdefault('_relatedness', {})
+    if key not in cache:
+        dist = np.asarray(data.dist_matrix, dtype=float)
+        demand = np.asarray(data.demands, dtype=float)
+        station = np.full(len(dist), -1)
+        for c, s in data.nearest_charge.items():
+            station[c] = -1 if s is None else s
+        rel = key[0] * dist / max(dist.max(), 1e-9)
+        rel += key[1] * np.abs(demand[:, None] - demand[None, :]) / max(demand.max(), 1e-9)
+        rel += key[2] * (station[:, None] != station[None, :])
+        cache[key] = rel
+    return cache[key]
+
+def _remove_customers(solution, customers):
+    """从各路径中删去指定客户（换电站保留）"""
+    customers = set(customers)
+    return [[n for n in route if n not in customers] for route in solution]
+
+def shaw_remove(data, cfg, solution, q=20):
+    """
+    相关移除（Shaw）：随机选一个种子客户，此后每次从已移除客户中随机取一个，
+    按相关度排序剩余客户，以 rand^p 偏向最相关者选择下一个移除对象
+    """
+    routed = np.array([n for route in solution for n in route[1:-1]], dtype=int)
+    routed = routed[_customer_mask(data)[routed]]
+    q = min(q, len(routed))
+    if q == 0:
+        return [list(r) for r in solution], []
+    rel = relatedness_matrix(data, cfg)
+    # alive 标记 routed 中尚未移除的客户，已移除者的相关度置为无穷大，不再复制候选数组
+    alive = np.ones(len(routed), dtype=bool)
+    first = random.randrange(len(routed))
+    alive[first] = False
+    removed = [int(routed[first])]
+    for n_alive in range(len(routed) - 1, len(routed) - q, -1):
+        ref = random.choice(removed)
+        values = np.where(alive, rel[ref, routed], np.inf)
+        # 第 k 相关的剩余客户：argpartition 为 O(n)，无需完整排序
+        k = int(random.random() ** cfg.shaw_randomness * n_alive)
+        pick = int(np.argpartition(values, k)[k])
+        alive[pick] = False
+        removed.append(int(routed[pick]))
+    return _remove_customers(solution, removed), removed
+
+def _customer_adjacency(data):
+    """每个节点按距离升序排列的客户列表 (n, 客户数)（缓存在 data 上）"""
+    adj = getattr(data, '_customer_adjacency', None)
+    if adj is None:
+        customers = np.asarray(data.customer_ids, dtype=int)
+        dist = np.asarray(data.dist_matrix, dtype=float)
+        adj = customers[np.argsort(dist[:, customers], axis=1, kind='stable')]
+        data._customer_adjacency = adj
+    return adj
+
+def _nearby_customers(data, node):
+    """
+    按距离升序逐个给出 node 附近的客户（node 为客户时先给出自身）
+    编译实例先读只读映射的近邻表 data.neighbors，用尽后只对 node 这一行距离排序，
+    不在进程内建立 (n, 客户数) 的邻接矩阵；普通实例使用缓存的 _customer_adjacency
+    """
+    neighbors = getattr(data, 'neighbors', None)
+    if neighbors is None:
+        yield from _customer_adjacency(data)[node].tolist()
+        return
+    is_customer = _customer_mask(data)
+    seen = set()
+    for c in [node] + neighbors[node].tolist():
+        if is_customer[c]:
+            seen.add(c)
+            yield c
+    customers = np.asarray(data.customer_ids, dtype=int)
+    for c in customers[np.argsort(data.dist_matrix[node, customers], kind='stable')].tolist():
+        if c not in seen:
+            yield c
+
+def _cut_string(data, route, customer, length):
+    """
+    从路径中删去包含 customer 的一段长度为 length 的连续客户串（起点随机）
+    串内的换电站保留，删除后相邻重复的换电站只保留一个；路径不再有客户时置空
+    返回：(新路径, 被删客户)
+    """
+    is_customer = _customer_mask(data)
+    positions = [i for i, n in enumerate(route) if is_customer[n]]
+    k = positions.index(route.index(customer))
+    first = random.randint(max(0, k - length + 1), min(k, len(positions) - length))
+    cut = [route[i] for i in positions[first:first + length]]
+    cut_set = set(cut)
+    kept = [n for n in route if n not in cut_set]
+    if len(kept) == len(route) - len(positions):
+        return [data.depot_id, data.depot_id], cut
+    kept = [n for i, n in enumerate(kept) if i == 0 or n != kept[i-1]]
+    return kept, cut
+
+def string_remove(data, cfg, solution, q=20):
+    """
+    SISR 串移除（slack induction by string removals）：以随机种子客户为中心，
+    沿其近邻依次在尚未破坏的路径上各删去一段连续客户串，
+    串数与串长按平均移除量 q 和路径平均客户数随机确定，每次只触及少数几条相邻路径的短片段
+    """
+    is_customer = _customer_mask(data)
+    owner = {n: r_idx for r_idx, route in enumerate(solution) for n in route[1:-1] if is_customer[n]}
+    destroyed = [list(r) for r in solution]
+    if not owner:
+        return destroyed, []
+
+    used = sum(1 for r in solution if len(r) > 2)
+    max_len = min(cfg.sisr_max_string, len(owner) / used)
+    max_strings = 4 * q / (1 + max_len) - 1
+    n_strings = max(1, int(random.uniform(1, max(1.0, max_strings) + 1)))  # q 较小时至少移除一串
+    seed = random.choice(list(owner))
+    removed, ruined = [], set()
+    for c in _nearby_customers(data, seed):
+        if len(ruined) >= n_strings:
+            break
+        r_idx = owner.get(int(c))
+        if r_idx is None or r_idx in ruined:
+            continue
+        on_route = int(is_customer[destroyed[r_idx]].sum())
+        length = int(random.uniform(1, min(max_len, on_route) + 1))
+        destroyed[r_idx], cut = _cut_string(data, destroyed[r_idx], int(c), length)
+        removed.extend(cut)
+        ruined.add(r_idx)
+    return destroyed, removed
+
 def worst_energy_remove(data, cfg, solution, q=20):
-    """高能耗节点移除：避免索引越界"""
-    energy_cost = {}
-    
-    # 1. 评估移除每个【客户节点】能节省的能耗（距离）
+    """高能耗节点移除：按移除客户节省的距离降序，移除前 q 个（每条路径一次向量化计算）"""
+    dist = np.asarray(data.dist_matrix)
+    is_customer = _customer_mask(data)
+
+    # 1. 评估移除每个【客户节点】能节省的能耗（距离），跳过换电站
+    keys, savings = [], []
     for route_idx, route in enumerate(solution):
-        if len(route) <= 2: 
+        if len(route) <= 2:
             continue
-        for pos in range(1, len(route)-1):  
-            # 核心修复：跳过换电站，只评估移除客户的能耗差
-            if route[pos] not in data.customer_ids:
-                continue
-                
-            prev, curr, next_ = route[pos-1], route[pos], route[pos+1]
-            original = data.dist_matrix[prev][curr] + data.dist_matrix[curr][next_]
-            detour = data.dist_matrix[prev][next_]
-            energy_cost[(route_idx, pos)] = original - detour 
-    
-    # 2. 按能耗差降序排序
-    sorted_items = sorted(energy_cost.items(), key=lambda x: -x[1])[:q]
-    
+        r = np.asarray(route, dtype=int)
+        prev, curr, next_ = r[:-2], r[1:-1], r[2:]
+        saving = dist[prev, curr] + dist[curr, next_] - dist[prev, next_]
+        pos = np.flatnonzero(is_customer[curr])
+        keys.extend((route_idx, int(p) + 1) for p in pos)
+        savings.append(saving[pos])
+    if not keys:
+        return [list(r) for r in solution], []
+
+    # 2. 按节省量降序取前 q 个
+    top = np.argsort(-np.concatenate(savings), kind='stable')[:q]
     removal_plan = defaultdict(list)
-    for (route_idx, pos), _ in sorted_items:
+    for k in top:
+        route_idx, pos = keys[k]
         removal_plan[route_idx].append(pos)
-    
+
     destroyed = copy.deepcopy(solution)
     removed = []
-    
+
     # 3. 执行实际移除操作
     for route_idx in removal_plan:
         for pos in sorted(removal_plan[route_idx], reverse=True):
             removed.append(destroyed[route_idx].pop(pos))
-    
+
     # 4. 路径格式安全兜底
     for route in destroyed:
         if len(route) < 2 or route[0] != data.depot_id or route[-1] != data.depot_id:
             route[:] = [data.depot_id, data.depot_id]
-    
+
     return destroyed, removed
 
 def underutilized_vehicle_destroy(data, cfg, solution, q=2):
@@ -135,5 +275,8 @@ def underutilized_vehicle_destroy(data, cfg, solution, q=2):
 
     return destroyed_solution, removed_customers
 
-DESTROY_OPERATORS = [random_remove, worst_energy_remove, underutilized_vehicle_destroy]
+DESTROY_OPERATORS = [random_remove, worst_energy_remove, underutilized_vehicle_destroy, shaw_remove,
+                     string_remove]
+# 参数 q 表示破坏车辆数（而非客户数）的算子
+VEHICLE_LEVEL_OPERATORS = {underutilized_vehicle_destroy}
 
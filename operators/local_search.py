@@ -1,14 +1,18 @@
+import time
 from ..utils.helpers import route_feasibility_check, solution_cost, adjust_charge_stations
 from copy import deepcopy
 
-def local_search_2opt(data, cfg, solution):
+def local_search_2opt(data, cfg, solution, deadline=None):
     """
     对每条路径进行 2-opt 优化。
     注意：无人机路径包含充电站，交换节点可能会导致电量不可行，
     所以每次 swap 后必须 check feasibility。
+    deadline: 可选的 time.perf_counter() 截止时刻，在每个候选翻转前检查，到时返回当前改进结果
     """
     improved = True
     while improved:
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
         improved = False
         for r_idx, route in enumerate(solution):
             if len(route) < 4: continue # 节点太少不需要优化
@@ -17,6 +21,8 @@ def local_search_2opt(data, cfg, solution):
             # 遍历所有可能的切断点 i 和 j
             for i in range(1, len(route) - 2):
                 for j in range(i + 1, len(route) - 1):
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        return solution
                     # 执行 2-opt 翻转： route[i:j+1] 翻转
                     new_route = route[:i] + route[i:j+1][::-1] + route[j+1:]
                     
@@ -1,5 +1,9 @@
+import random
 from copy import deepcopy
+
+import numpy as np
 from ..utils.helpers import route_feasibility_check, solution_cost, adjust_charge_stations, charging_insert, evaluate_insertion_with_cs
+from ..utils.screening import RouteScreen
 
 # def greedy_insert(data, cfg, destroyed, removed):
 #     for customer in removed:
@@ -219,11 +223,14 @@ def greedy_cs_insert(data, cfg, destroyed, removed):
         best_route_idx, best_route_obj = None, None
         
         for route_idx, route in enumerate(destroyed):
+            screen = RouteScreen(data, cfg, route)
+            if screen.reject_route(customer):
+                continue
             # 获取原路径成本
             orig_cost = solution_cost(data, cfg, [route]) if len(route) > 2 else 0
             
             for pos in range(1, len(route)):
-                new_cost, new_route = evaluate_insertion_with_cs(data, cfg, route, customer, pos)
+                new_cost, new_route = evaluate_insertion_with_cs(data, cfg, route, customer, pos, screen)
                 if new_route is not None:
                     increase = new_cost - orig_cost
                     if increase < best_cost_increase:
@@ -256,12 +263,15 @@ def regret_2_cs_insert(data, cfg, destroyed, removed):
             costs = [] # 存储合法的插入结果 (cost_increase, route_idx, new_route_obj)
             
             for route_idx, route in enumerate(destroyed):
+                screen = RouteScreen(data, cfg, route)
+                if screen.reject_route(customer):
+                    continue
                 orig_cost = solution_cost(data, cfg, [route]) if len(route) > 2 else 0
                 best_inc_for_this_route = float('inf')
                 best_route_for_this_veh = None
                 
                 for pos in range(1, len(route)):
-                    new_cost, new_route = evaluate_insertion_with_cs(data, cfg, route, customer, pos)
+                    new_cost, new_route = evaluate_insertion_with_cs(data, cfg, route, customer, pos, screen)
                     if new_route is not None:
                         inc = new_cost - orig_cost
                         if inc < best_inc_for_this_route:
@@ -317,9 +327,12 @@ def cs_risk_priority_insert(data, cfg, destroyed, removed):
         best_route_idx, best_route_obj = None, None
         
         for route_idx, route in enumerate(destroyed):
+            screen = RouteScreen(data, cfg, route)
+            if screen.reject_route(customer):
+                continue
             orig_cost = solution_cost(data, cfg, [route]) if len(route) > 2 else 0
             for pos in range(1, len(route)):
-                new_cost, new_route = evaluate_insertion_with_cs(data, cfg, route, customer, pos)
+                new_cost, new_route = evaluate_insertion_with_cs(data, cfg, route, customer, pos, screen)
                 if new_route is not None:
                     inc = new_cost - orig_cost
                     if inc < best_cost_increase:
@@ -337,4 +350,89 @@ def cs_risk_priority_insert(data, cfg, destroyed, removed):
 
     return destroyed
 
-REPAIR_OPERATORS = [greedy_cs_insert, regret_2_cs_insert, cs_risk_priority_insert]
+# blink 插入中直接插入全部不可行时，按绕行距离升序最多尝试换电站调整的候选数
+BLINK_CS_TRIES = 3
+# SISR 的待插入客户排序方式及其抽取权重：随机 / 需求降序 / 离车场由远到近 / 由近到远
+BLINK_ORDERS = (('random', 4), ('demand', 4), ('far', 2), ('close', 1))
+
+def _blink_order(data, customers):
+    kind = random.choices([k for k, _ in BLINK_ORDERS], weights=[w for _, w in BLINK_ORDERS])[0]
+    customers = list(customers)
+    if kind == 'random':
+        random.shuffle(customers)
+    elif kind == 'demand':
+        customers.sort(key=lambda c: -data.demands[c])
+    else:
+        depot_dist = data.dist_matrix[data.depot_id]
+        customers.sort(key=lambda c: depot_dist[c], reverse=(kind == 'far'))
+    return customers
+
+def blink_insert(data, cfg, destroyed, removed):
+    """
+    blink 贪婪插入（与 SISR 串移除配对）：候选位置按绕行成本一次向量化求出，
+    每个位置以概率 cfg.blink_rate 被随机跳过，然后按成本升序逐个检查，第一个可行位置即插入；
+    直接插入均不可行时，对成本最低的几个候选用换电站调整修复
+    """
+    dist = np.asarray(data.dist_matrix)
+    for customer in _blink_order(data, removed):
+        costs, keys = [], []
+        empty_seen = False
+        for route_idx, route in enumerate(destroyed):
+            if len(route) <= 2:
+                if empty_seen:  # 空车彼此等价，只评估一辆
+                    continue
+                empty_seen = True
+            r = np.asarray(route, dtype=int)
+            detour = cfg.distance_cost * (dist[r[:-1], customer] + dist[customer, r[1:]] - dist[r[:-1], r[1:]])
+            if len(route) <= 2:
+                detour = detour + cfg.vehicle_fixed_cost
+            pos = np.array([p for p in range(len(detour)) if random.random() >= cfg.blink_rate], dtype=int)
+            costs.append(detour[pos])
+            keys.extend((route_idx, int(p) + 1) for p in pos)
+        if not keys:
+            continue
+
+        inserted = False
+        screens, fallback = {}, []
+        for k in np.argsort(np.concatenate(costs), kind='stable'):
+            route_idx, pos = keys[k]
+            route = destroyed[route_idx]
+            screen = screens.get(route_idx)
+            if screen is None:
+                screen = screens[route_idx] = RouteScreen(data, cfg, route)
+                if screen.reject_route(customer):
+                    screens[route_idx] = False
+                    continue
+            elif screen is False:
+                continue
+            level = screen.check(customer, pos)
+            if level == 2:
+                new_route = route[:pos] + [customer] + route[pos:]
+                if route_feasibility_check(data, cfg, new_route)[0]:
+                    destroyed[route_idx] = new_route
+                    inserted = True
+                    break
+            if level > 0 and len(fallback) < BLINK_CS_TRIES:
+                fallback.append((route_idx, pos))
+        if inserted:
+            continue
+
+        best_increase, best_route_idx, best_route_obj = float('inf'), None, None
+        for route_idx, pos in fallback:
+            route = destroyed[route_idx]
+            new_cost, new_route = evaluate_insertion_with_cs(data, cfg, route, customer, pos)
+            if new_route is not None:
+                increase = new_cost - (solution_cost(data, cfg, [route]) if len(route) > 2 else 0)
+                if increase < best_increase:
+                    best_increase, best_route_idx, best_route_obj = increase, route_idx, new_route
+        if best_route_idx is not None:
+            destroyed[best_route_idx] = best_route_obj
+        else:
+            # 开启新车逻辑；车辆耗尽时留给外层 handle_unassigned_customers 处理
+            empty_route_idx = next((i for i, r in enumerate(destroyed) if len(r) <= 2), None)
+            if empty_route_idx is not None:
+                destroyed[empty_route_idx] = [data.depot_id, customer, data.depot_id]
+
+    return destroyed
+
+REPAIR_OPERATORS = [greedy_cs_insert, regret_2_cs_insert, cs_risk_priority_insert, blink_insert]
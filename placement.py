@@ -0,0 +1,179 @@
+"""
+换电站选址优化：候选布局生成 -> 代理模型筛选 -> 少量布局完整求解
+1. 候选：generate_strategies 中的 centers / ring / hybrid 策略 × 多个 K × 随机扰动
+2. 筛选：
+   - bound：能量下界/覆盖度指标，毫秒级
+   - ga / alns：短时求解（少量代数/迭代，受 time_limit 约束）
+3. 仅对排名靠前的布局做完整 ALNS 求解，在进程池中并行
+
+命令行（在包的上级目录执行）：
+    python -m <包名>.placement --instance C101 --ks 6 8 10 12 14 --jitter 3 --top 5
+"""
+import argparse
+import copy
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .config import DataConfig
+from .data_process import load_instance
+from .generate_strategies import LAYOUT_STRATEGIES, generate_layout
+from .utils.table_writer import TableWriter
+
+UNREACHABLE_PENALTY = 1e6  # 每个无法往返任何补能点的客户的惩罚
+
+
+def propose_layouts(instance, ks=(8, 10, 12), strategies=('centers', 'ring'), seeds=(42,),
+                    jitter=0, jitter_scale=3.0, random_state=0):
+    """
+    生成候选布局
+    参数：
+        jitter: 每个基础布局额外生成的随机扰动版本数
+        jitter_scale: 扰动的坐标标准差
+    返回：
+        候选列表，每项为 {'name', 'strategy', 'k', 'seed', 'coords'}
+    """
+    rng = np.random.default_rng(random_state)
+    candidates = []
+    for strategy in strategies:
+        for k in ks:
+            for seed in seeds:
+                base = np.asarray(generate_layout(instance, strategy, k, seed))
+                name = f"{strategy}_k{k}_s{seed}"
+                candidates.append({'name': name, 'strategy': strategy, 'k': k, 'seed': seed, 'coords': base})
+                for j in range(jitter):
+                    coords = base + rng.normal(0.0, jitter_scale, size=base.shape)
+                    candidates.append({'name': f"{name}_j{j}", 'strategy': strategy, 'k': k, 'seed': seed,
+                                       'coords': coords})
+    return candidates
+
+
+def layout_bound(data, cfg):
+    """
+    代理指标（越小越好）：
+    - 客户 c 所在的电量段必须从某个补能点(车场/换电站)出发并回到补能点，
+      能耗下界为 2·α·d_min(c)；超过电池容量的客户计为不可达并重罚
+    - 其余部分以 Σ α·d_min(c) 衡量换电站对客户的覆盖程度，
+      另加每个换电站的一次充电费用作为布局规模的代价
+    """
+    points = np.asarray([data.depot_id] + list(data.charge_ids), dtype=int)
+    cust = np.asarray(data.customer_ids, dtype=int)
+    d_min = data.dist_matrix[np.ix_(cust, points)].min(axis=1)
+    unreachable = int(np.count_nonzero(2 * cfg.base_energy * d_min > cfg.battery_cap))
+    access = float(cfg.base_energy * d_min.sum())
+    return access + len(data.charge_ids) * cfg.charging_cost / max(len(cust), 1) + unreachable * UNREACHABLE_PENALTY
+
+
+def _evaluate(instance, coords, cfg, method, seed):
+    """在工作进程中评估单个布局，返回成本"""
+    import contextlib
+    import io
+    from .utils.helpers import solution_cost
+
+    data = load_instance(instance, stations=coords)
+    if method == 'bound':
+        return layout_bound(data, cfg)
+    random.seed(seed)
+    np.random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if method == 'ga':
+            from .ga_solver import GASolver
+            solver = GASolver(data, cfg)
+        elif method == 'alns':
+            from .solver import ALNSSolver
+            solver = ALNSSolver(data, cfg)
+        else:
+            raise ValueError(f"未知评估方式: {method}（可选 bound / ga / alns）")
+        routes = solver.solve()
+    if routes is None:
+        return float('inf')
+    from .utils.helpers import check_unassigned_customers
+    missing = len(check_unassigned_customers(data, routes))
+    return solution_cost(data, cfg, routes) + missing * UNREACHABLE_PENALTY
+
+
+def evaluate_layouts(instance, candidates, cfg, method='bound', workers=None, seed=0, key='score'):
+    """批量评估候选布局，结果写入每个候选的 key 字段，返回按该字段升序排列的列表"""
+    args = [(instance, c['coords'], cfg, method, seed) for c in candidates]
+    if method == 'bound' or workers == 1:
+        scores = [_evaluate(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            scores = list(pool.map(_evaluate, *zip(*args)))
+    for cand, score in zip(candidates, scores):
+        cand[key] = score
+    return sorted(candidates, key=lambda c: c[key])
+
+
+def optimize_placement(instance, cfg, candidates=None, screen='ga', screen_keep=20, top_n=5,
+                       screen_iter=10, screen_time=10.0, workers=None, seed=0):
+    """
+    代理筛选 + 完整求解的选址流程
+    参数：
+        screen: 第二阶段短时求解方式（ga / alns），为 None 时仅使用 bound 指标
+        screen_keep: 通过 bound 初筛进入短时求解的布局数
+        top_n: 最终完整求解的布局数
+        screen_iter / screen_time: 短时求解的迭代数与时间上限
+    返回：
+        完整求解后的布局列表（按 cost 升序）
+    """
+    if candidates is None:
+        candidates = propose_layouts(instance)
+    ranked = evaluate_layouts(instance, candidates, cfg, 'bound', key='bound')
+    print(f"bound 初筛：{len(candidates)} 个候选，保留 {min(screen_keep, len(ranked))} 个")
+    ranked = ranked[:screen_keep]
+
+    if screen:
+        short_cfg = copy.copy(cfg)
+        short_cfg.max_iter = screen_iter
+        short_cfg.time_limit = screen_time
+        ranked = evaluate_layouts(instance, ranked, short_cfg, screen, workers, seed, key='surrogate')
+        print(f"{screen} 短时求解筛选：保留前 {min(top_n, len(ranked))} 个")
+
+    finalists = ranked[:top_n]
+    evaluate_layouts(instance, finalists, cfg, 'alns', workers, seed, key='cost')
+    return sorted(finalists, key=lambda c: c['cost'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="换电站选址优化（代理筛选 + 完整求解）")
+    parser.add_argument('--instance', default='C101')
+    parser.add_argument('--strategies', nargs='+', default=['centers', 'ring'], choices=list(LAYOUT_STRATEGIES))
+    parser.add_argument('--ks', nargs='+', type=int, default=[8, 10, 12])
+    parser.add_argument('--seeds', nargs='+', type=int, default=[42])
+    parser.add_argument('--jitter', type=int, default=0, help="每个基础布局的扰动版本数")
+    parser.add_argument('--screen', default='ga', choices=['ga', 'alns', 'none'])
+    parser.add_argument('--screen-keep', type=int, default=20)
+    parser.add_argument('--screen-iter', type=int, default=10)
+    parser.add_argument('--screen-time', type=float, default=10.0)
+    parser.add_argument('--top', type=int, default=5)
+    parser.add_argument('--vehicles', type=int, default=15)
+    parser.add_argument('--max-iter', type=int, default=None)
+    parser.add_argument('--time-limit', type=float, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default=None, help="结果表路径（.csv / .jsonl / .parquet）")
+    args = parser.parse_args(argv)
+
+    cfg = DataConfig()
+    cfg.vehicle_num = args.vehicles
+    if args.max_iter is not None:
+        cfg.max_iter = args.max_iter
+    cfg.time_limit = args.time_limit
+
+    candidates = propose_layouts(args.instance, args.ks, args.strategies, args.seeds, args.jitter)
+    results = optimize_placement(args.instance, cfg, candidates, None if args.screen == 'none' else args.screen,
+                                 args.screen_keep, args.top, args.screen_iter, args.screen_time, args.workers)
+    print("\n[选址结果]")
+    for r in results:
+        print(f"{r['name']:<24} 换电站 {len(r['coords']):>3} 个  完整求解成本 {r['cost']:.2f}")
+    if args.out:
+        with TableWriter(args.out, append=False) as writer:
+            for r in results:
+                row = {k: v for k, v in r.items() if k != 'coords'}
+                row['coords'] = np.round(r['coords'], 2).tolist()
+                writer.write(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+动态订单的增量重优化（热启动）：
+1. 从现有方案中删除取消的客户，清理因此多余的换电站与空路径
+2. 用修复算子把新客户插入现有路径，插不进的由空车承接
+3. 以该方案为初始解运行一轮短时 ALNS（小破坏规模 + 时间上限，仅用贪婪修复：
+   后悔值修复单次即需数秒，会超出动态更新的时间预算）
+节点编号与原实例保持一致，新客户编号追加在末尾。
+"""
+import copy
+import time
+
+from .data_process import add_customers, restrict_customers
+from .operators.local_search import local_search_prune_stations
+from .operators.repair_ops import greedy_cs_insert
+from .solver import ALNSSolver
+from .utils.helpers import handle_unassigned_customers, rearrange_empty_vehicles, solution_cost
+
+
+def _drop_customers(data, solution, cancelled):
+    """删除客户；不再服务任何客户的路径置空，连续重复的换电站只保留一个"""
+    cancelled = set(cancelled)
+    customers = set(data.customer_ids)
+    routes = []
+    for route in solution:
+        kept = [n for n in route if n not in cancelled]
+        if not any(n in customers for n in kept):
+            kept = [data.depot_id, data.depot_id]
+        else:
+            kept = [n for i, n in enumerate(kept) if i == 0 or n != kept[i-1]]
+        routes.append(kept)
+    return routes
+
+
+def reoptimize(data, cfg, solution, added=(), cancelled=(), time_limit=0.5, max_iter=50,
+               destroy_max=0.1):
+    """
+    在现有方案上处理新增/取消的客户并做短时重优化
+    参数：
+        solution: 当前方案（路径列表，节点编号对应 data）
+        added: 新增客户，可以是 data 中尚未被服务的客户编号，或含 x / y / demand 的字典
+        cancelled: 取消的客户编号
+        time_limit / max_iter: 短时 ALNS 的时间与迭代上限，time_limit=0 时只做插入不做搜索
+        destroy_max: 短时 ALNS 的最大破坏比例（小扰动，保持方案稳定）
+    返回：
+        (data, routes)：新增字典客户时 data 为追加了新节点的实例；
+        data.customer_ids 只含仍需服务的客户
+    """
+    start = time.perf_counter()
+    new_nodes = [c for c in added if isinstance(c, dict)]
+    added = [int(c) for c in added if not isinstance(c, dict)]
+    if new_nodes:
+        data, new_ids = add_customers(data, new_nodes)
+        added += new_ids
+
+    # 1. 删除取消的客户
+    customers = set(data.customer_ids)
+    served = {n for r in solution for n in r if n in customers}
+    routes = _drop_customers(data, solution, cancelled)
+    active = restrict_customers(data, (served | set(added)) - set(cancelled))
+    routes = local_search_prune_stations(active, cfg, routes)
+
+    # 2. 插入新客户；修复算子插不进的由空车承接
+    routes += [[data.depot_id, data.depot_id] for _ in range(cfg.vehicle_num - len(routes))]
+    to_insert = [c for c in added if c not in served and c not in set(cancelled)]
+    routes = greedy_cs_insert(active, cfg, routes, list(to_insert))
+    routes, has_unassigned = handle_unassigned_customers(active, cfg, routes)
+    if has_unassigned:
+        print("重优化：车辆不足，部分新客户未能安排")
+    routes = rearrange_empty_vehicles(routes)
+    print(f"重优化：新增 {len(to_insert)} 个、取消 {len(set(cancelled))} 个客户，"
+          f"插入后成本 {solution_cost(active, cfg, routes):.2f}（{time.perf_counter() - start:.3f}s）")
+
+    # 3. 短时 ALNS
+    remaining = time_limit - (time.perf_counter() - start)
+    if has_unassigned or remaining <= 0 or max_iter <= 0:
+        return active, routes
+    short_cfg = copy.copy(cfg)
+    short_cfg.time_limit = remaining
+    short_cfg.max_iter = max_iter
+    short_cfg.destroy_min = min(cfg.destroy_min, destroy_max)
+    short_cfg.destroy_max = destroy_max
+    solver = ALNSSolver(active, short_cfg)
+    solver.repair_ops, solver.repair_weights = [greedy_cs_insert], [1]
+    return active, solver.solve(initial_solution=routes)
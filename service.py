@@ -0,0 +1,289 @@
+"""
+本地求解服务：常驻进程中缓存已加载的实例，求解作业在进程池中执行
+- 传输：HTTP/1.1（TCP 或 Unix 域套接字），请求与响应均为 JSON，无外部依赖
+- 实例缓存：工作进程按 (实例文件, 修改时间, 换电站) 缓存 VRPData（LRU），
+  --preload 的实例在工作进程启动时即装入缓存
+- 时间预算：time_limit 传给求解器做协作式截止，超过 time_limit + grace 仍未返回时
+  工作进程内的看门狗结束该进程（batch.arm_watchdog）并响应 504；进程池随之失效并重建，
+  同池中被波及的其他请求响应 503，可直接重试
+- 参数覆盖：仅接受 SERVICE_OVERRIDES 中的模型与算法参数；遥测、内存分析、差分检查等
+  会写文件或显著拖慢求解的参数不对外开放
+
+命令行（在包的上级目录执行）：
+    python -m <包名>.service --port 8765 --workers 4 --preload C101_Strategy1_Centers.txt
+    python -m <包名>.service --unix /tmp/evrp.sock
+
+接口：
+    GET  /health      服务状态
+    GET  /instances   可用实例（data/ 下的网络文件与内置 Solomon 实例）
+    POST /solve       {"instance", "stations", "solver", "seed", "time_limit", "max_iter", "overrides"}
+                      返回 batch.run_job 的结果行，routes 为路径列表
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import socket
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .batch import DEFAULT_GRACE, hard_time_limit, job_id, run_job_guarded
+from .data_process import DATA_DIR, list_instances, load_instance, resolve_data_path
+
+MAX_BODY = 16 * 1024 * 1024
+WATCHDOG_SLACK = 5.0  # 看门狗应已结束进程后，事件循环再等待的秒数
+SERVICE_OVERRIDES = frozenset({
+    'vehicle_num', 'car_capacity', 'battery_cap', 'base_energy', 'load_energy', 'energy_model', 'payload_exponent',
+    'max_iter', 'time_limit', 'time_windows', 'speed', 'swap_time', 'init_method',
+    'init_temperature', 'start_worse', 'start_accept', 'end_temperature_ratio',
+    'destroy_min', 'destroy_max', 'destroy_patience',
+    'shaw_distance_weight', 'shaw_demand_weight', 'shaw_station_weight', 'shaw_randomness',
+    'sisr_max_string', 'blink_rate',
+    'low_battery_threshold', 'underutilized_threshold', 'safe_battery_margin',
+    'vehicle_fixed_cost', 'distance_cost', 'charging_cost',
+})
+
+_INSTANCE_CACHE = OrderedDict()
+_CACHE_SIZE = 16
+
+
+def _cache_key(instance, stations):
+    path = resolve_data_path(instance).resolve()
+    if stations is None or isinstance(stations, (str, os.PathLike)):
+        st = None if stations is None else str(resolve_data_path(stations).resolve())
+    else:
+        st = json.dumps(stations)
+    return str(path), path.stat().st_mtime_ns, st
+
+
+def cached_instance(instance, stations=None):
+    """带 LRU 缓存的 load_instance（每个进程各自一份）"""
+    key = _cache_key(instance, stations)
+    if key in _INSTANCE_CACHE:
+        _INSTANCE_CACHE.move_to_end(key)
+        return _INSTANCE_CACHE[key]
+    data = load_instance(instance, stations=stations)
+    _INSTANCE_CACHE[key] = data
+    while len(_INSTANCE_CACHE) > _CACHE_SIZE:
+        _INSTANCE_CACHE.popitem(last=False)
+    return data
+
+
+def _init_worker(cache_size, preload):
+    global _CACHE_SIZE
+    _CACHE_SIZE = cache_size
+    for instance, stations in preload:
+        cached_instance(instance, stations)
+
+
+def _solve_job(job, grace):
+    row = run_job_guarded(job, quiet=True, grace=grace, loader=cached_instance)
+    row['routes'] = json.loads(row['routes']) if row['routes'] else []
+    return row
+
+
+def build_job(request):
+    """将 /solve 请求体转换为 batch 作业；字段不合法时抛出 ValueError"""
+    if not isinstance(request, dict) or 'instance' not in request:
+        raise ValueError("请求必须是包含 instance 字段的 JSON 对象")
+    instance = request['instance']
+    stations = request.get('stations')
+    resolve_data_path(instance)
+    if isinstance(stations, str):
+        resolve_data_path(stations)
+    solver = request.get('solver', 'alns')
+    seed = int(request.get('seed', 0))
+    overrides = request.get('overrides') or {}
+    if not isinstance(overrides, dict):
+        raise ValueError("overrides 必须是 JSON 对象")
+    overrides = dict(overrides)
+    for key in ('time_limit', 'max_iter', 'vehicle_num', 'init_method'):
+        if request.get(key) is not None:
+            overrides[key] = request[key]
+    rejected = sorted(set(overrides) - SERVICE_OVERRIDES)
+    if rejected:
+        raise ValueError(f"不允许通过服务设置的参数: {', '.join(rejected)}")
+    return {
+        'job_id': job_id(instance, stations if isinstance(stations, str) else None, solver, seed, overrides),
+        'instance': str(instance),
+        'stations': stations,
+        'solver': solver,
+        'seed': seed,
+        'overrides': overrides,
+    }
+
+
+class SolveService:
+    """asyncio 求解服务：连接处理在事件循环中，求解在进程池中"""
+    def __init__(self, workers=None, cache_size=16, preload=(), grace=DEFAULT_GRACE):
+        self._pool_args = dict(max_workers=workers, initializer=_init_worker, initargs=(cache_size, list(preload)))
+        self.pool = ProcessPoolExecutor(**self._pool_args)
+        self.grace = grace
+        self.stats = {'solved': 0, 'failed': 0, 'running': 0, 'recycled': 0}
+
+    async def handle(self, reader, writer):
+        try:
+            status, body = await self._dispatch(reader)
+        except Exception as e:  # 请求解析失败等
+            status, body = 400, {'error': f"{type(e).__name__}: {e}"}
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        reason = http.client.responses.get(status, '')
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode('latin-1') + payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _dispatch(self, reader):
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        if not request_line:
+            raise ValueError("空请求")
+        method, path, _ = request_line.split(' ', 2)
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY:
+            return 413, {'error': "请求体过大"}
+        body = await reader.readexactly(length) if length else b''
+
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok', **self.stats}
+        if method == 'GET' and path == '/instances':
+            names = sorted(p.name for p in DATA_DIR.glob('*.txt')) + [p.stem for p in list_instances()]
+            return 200, {'instances': names}
+        if method == 'POST' and path == '/solve':
+            try:
+                job = build_job(json.loads(body or b'{}'))
+            except (ValueError, FileNotFoundError, TypeError) as e:
+                return 400, {'error': f"{type(e).__name__}: {e}"}
+            return await self.solve(job)
+        return 404, {'error': f"未知接口: {method} {path}"}
+
+    async def solve(self, job):
+        loop = asyncio.get_running_loop()
+        timeout = hard_time_limit(job, self.grace)
+        self.stats['running'] += 1
+        start = loop.time()
+        try:
+            try:
+                pool = self.pool
+                future = loop.run_in_executor(pool, _solve_job, job, self.grace)
+            except BrokenProcessPool:
+                # 进程池已因其他作业超时失效但尚未重建
+                self._recycle(pool)
+                pool = self.pool
+                future = loop.run_in_executor(pool, _solve_job, job, self.grace)
+            row = await asyncio.wait_for(future, None if timeout is None else timeout + WATCHDOG_SLACK)
+        except (asyncio.TimeoutError, BrokenProcessPool) as e:
+            self.stats['failed'] += 1
+            self._recycle(pool)
+            if isinstance(e, asyncio.TimeoutError) or (timeout is not None and loop.time() - start >= timeout):
+                return 504, {'error': f"求解超过时间预算 {timeout:g}s，已终止", 'job_id': job['job_id']}
+            return 503, {'error': "工作进程异常退出，请重试", 'job_id': job['job_id']}
+        finally:
+            self.stats['running'] -= 1
+        self.stats['solved' if row['status'] == 'ok' else 'failed'] += 1
+        return 200, row
+
+    def _recycle(self, pool):
+        """进程池失效（看门狗结束了超时作业的进程，或工作进程崩溃）后，新请求改用新进程池"""
+        if pool is self.pool:
+            self.pool = ProcessPoolExecutor(**self._pool_args)
+            self.stats['recycled'] += 1
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+async def serve(host='127.0.0.1', port=8765, unix_path=None, **kwargs):
+    service = SolveService(**kwargs)
+    if unix_path:
+        server = await asyncio.start_unix_server(service.handle, path=unix_path)
+        where = unix_path
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+        where = f"http://{host}:{server.sockets[0].getsockname()[1]}"
+    print(f"求解服务已启动：{where}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+        if unix_path and os.path.exists(unix_path):
+            os.unlink(unix_path)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class ServiceClient:
+    """求解服务的本地客户端（标准库 http.client）"""
+    def __init__(self, host='127.0.0.1', port=8765, unix_path=None, timeout=None):
+        self.host, self.port, self.unix_path, self.timeout = host, port, unix_path, timeout
+
+    def _request(self, method, path, body=None):
+        if self.unix_path:
+            conn = _UnixHTTPConnection(self.unix_path, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            payload = None if body is None else json.dumps(body).encode('utf-8')
+            conn.request(method, path, body=payload, headers={'Content-Type': 'application/json'})
+            resp = conn.getresponse()
+            result = json.loads(resp.read() or b'{}')
+        finally:
+            conn.close()
+        if resp.status != 200:
+            raise RuntimeError(f"求解服务返回 {resp.status}: {result.get('error')}")
+        return result
+
+    def health(self):
+        return self._request('GET', '/health')
+
+    def instances(self):
+        return self._request('GET', '/instances')['instances']
+
+    def solve(self, instance, stations=None, solver='alns', seed=0, time_limit=None, max_iter=None, **overrides):
+        return self._request('POST', '/solve', {
+            'instance': instance, 'stations': stations, 'solver': solver, 'seed': seed,
+            'time_limit': time_limit, 'max_iter': max_iter, 'overrides': overrides,
+        })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地求解服务")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help="Unix 域套接字路径（指定后不监听 TCP）")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache-size', type=int, default=16, help="每个工作进程缓存的实例数")
+    parser.add_argument('--preload', nargs='*', default=[], help="启动时装入缓存的实例")
+    parser.add_argument('--grace', type=float, default=DEFAULT_GRACE)
+    args = parser.parse_args(argv)
+    preload = [(inst, None) for inst in args.preload]
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, workers=args.workers, cache_size=args.cache_size,
+                          preload=preload, grace=args.grace))
+    except KeyboardInterrupt:
+        print("求解服务已停止")
+
+
+if __name__ == "__main__":
+    main()
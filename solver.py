@@ -1,10 +1,15 @@
-from .initial_solution import generate_initial_solution
-from .operators.destroy_ops import DESTROY_OPERATORS
+from .initial_solution import build_initial_solution
+from .operators.destroy_ops import DESTROY_OPERATORS, VEHICLE_LEVEL_OPERATORS
 from .operators.repair_ops import REPAIR_OPERATORS
 from .operators.local_search import local_search_2opt, local_search_prune_stations
 from .utils.helpers import solution_cost, handle_unassigned_customers, rearrange_empty_vehicles
-from .utils.adaptive import select_operator, update_weights, acceptance_criterion, temperature
-import random
+from .utils.screening import reset_screen_stats, format_screen_stats
+from .utils.telemetry import open_telemetry, solution_stats, PhaseTimer
+from .utils.verify import start_verification
+from .utils.memory import start_memory_profile
+from .utils.adaptive import (select_operator, update_weights, acceptance_criterion, temperature,
+                             calibrate_temperature, cooling_rate, DestroySizeController)
+import time
 
 class ALNSSolver:
     def __init__(self, data, config):
@@ -12,49 +17,134 @@ class ALNSSolver:
         self.cfg = config
         self.destroy_ops = DESTROY_OPERATORS
         self.repair_ops = REPAIR_OPERATORS
-        self.destroy_weights = [5, 20, 0]
-        self.repair_weights = [10, 10]
+        self.destroy_weights = [5, 20, 0, 20, 20]
+        self.repair_weights = [10, 10, 0, 10]
         self.best_solution = None
         self.current_solution = None
         self.history = [] # 用于记录每轮的最佳成本
 
-    def solve(self):
-        self.current_solution = generate_initial_solution(self.data, self.cfg)
-        self.best_solution = self.current_solution.copy()
-        # 记录初始成本
-        self.history.append(solution_cost(self.data, self.cfg, self.best_solution))
+    def solve(self, initial_solution=None):
+        """
+        执行 ALNS 求解
+        参数：
+            initial_solution: 可选的初始解（如分解求解合并后的路径），为空时构造初始解
+        """
+        start_time = time.perf_counter()
+        reset_screen_stats()
+        mem, own_mem = start_memory_profile(self.cfg)
+        telemetry = verifier = None
+        try:
+            time_limit = getattr(self.cfg, 'time_limit', None)
+            if initial_solution is not None:
+                self.current_solution = [list(r) for r in initial_solution]
+            else:
+                self.current_solution = build_initial_solution(self.data, self.cfg)
+            if mem is not None:
+                mem.lap('initial')
+            self.best_solution = self.current_solution.copy()
+            # 记录初始成本
+            self.history.append(solution_cost(self.data, self.cfg, self.best_solution))
 
-        for iter in range(self.cfg.max_iter):
-            d_idx = select_operator(self.destroy_weights)
-            r_idx = select_operator(self.repair_weights)
-            
-            q = random.randint(int(0.15 * len(self.data.customer_ids)), int(0.3 * len(self.data.customer_ids)))
+            # 退火温度按初始成本标定；破坏规模由控制器自适应调节
+            t0, cooling = self._annealing_schedule(self.history[0])
+            sizer = DestroySizeController(len(self.data.customer_ids), self.cfg.destroy_min, self.cfg.destroy_max,
+                                          patience=self.cfg.destroy_patience)
 
-            destroyed, removed = self.destroy_ops[d_idx](self.data, self.cfg, self.current_solution)
-            new_solution = self.repair_ops[r_idx](self.data, self.cfg, destroyed, removed)
+            iterations = 0
+            telemetry = open_telemetry(self.cfg)
+            verifier = start_verification(self.cfg)
+            for iter in range(self.cfg.max_iter):
+                if time_limit is not None and time.perf_counter() - start_time >= time_limit:
+                    print(f"达到时间上限 {time_limit}s，提前结束于迭代{iter}")
+                    break
+                iterations += 1
+                timer = PhaseTimer() if telemetry is not None else None
+                d_idx = select_operator(self.destroy_weights)
+                r_idx = select_operator(self.repair_weights)
+                
+                q = sizer.sample()
+                destroyed, removed = self._destroy(d_idx, q)
+                if timer is not None:
+                    timer.lap('t_destroy')
+                if mem is not None:
+                    mem.lap('destroy')
+                new_solution = self.repair_ops[r_idx](self.data, self.cfg, destroyed, removed)
+                if timer is not None:
+                    timer.lap('t_repair')
+                if mem is not None:
+                    mem.lap('repair')
 
-            new_solution = local_search_2opt(self.data, self.cfg, new_solution)
+                new_solution = local_search_2opt(self.data, self.cfg, new_solution)
 
-            new_solution = local_search_prune_stations(self.data, self.cfg, new_solution)
+                new_solution = local_search_prune_stations(self.data, self.cfg, new_solution)
+                if timer is not None:
+                    timer.lap('t_local')
+                if mem is not None:
+                    mem.lap('local_search')
 
-            #解的后处理（含重新排列解）
-            new_solution, has_unassigned = handle_unassigned_customers(self.data, self.cfg, new_solution)
-            if has_unassigned:
-                print(f"迭代{iter}：存在未分配客户，无人机资源不足")
-                return self.current_solution
-            new_solution = rearrange_empty_vehicles(new_solution)
+                #解的后处理（含重新排列解）
+                new_solution, has_unassigned = handle_unassigned_customers(self.data, self.cfg, new_solution)
+                if has_unassigned:
+                    print(f"迭代{iter}：存在未分配客户，无人机资源不足")
+                    return self.current_solution
+                new_solution = rearrange_empty_vehicles(new_solution)
 
-            curr_cost = solution_cost(self.data, self.cfg, self.current_solution)
-            new_cost = solution_cost(self.data, self.cfg, new_solution)
-            
-            self.history.append(solution_cost(self.data, self.cfg, self.best_solution))
+                curr_cost = solution_cost(self.data, self.cfg, self.current_solution)
+                new_cost = solution_cost(self.data, self.cfg, new_solution)
+                
+                self.history.append(solution_cost(self.data, self.cfg, self.best_solution))
+
+                update_weights(self.destroy_weights, self.repair_weights, d_idx, r_idx, new_cost - curr_cost)
+                temp = temperature(iter, t0, cooling)
+                accepted = acceptance_criterion(new_cost, curr_cost, temp)
+                new_best = False
+                if accepted:
+                    self.current_solution = new_solution
+                    if new_cost < solution_cost(self.data, self.cfg, self.best_solution):
+                        self.best_solution = new_solution
+                        new_best = True
+                sizer.update(new_best)
+                if mem is not None:
+                    mem.lap('post')
 
-            update_weights(self.destroy_weights, self.repair_weights, d_idx, r_idx, new_cost - curr_cost)
-            if acceptance_criterion(new_cost, curr_cost, temperature(iter)):
-                self.current_solution = new_solution
-                if new_cost < solution_cost(self.data, self.cfg, self.best_solution):
-                    self.best_solution = new_solution
+                if telemetry is not None:
+                    timer.lap('t_post')
+                    vehicles, charges = solution_stats(self.data, new_solution)
+                    telemetry.write({
+                        'run': getattr(self.cfg, 'telemetry_run', None), 'iteration': iter,
+                        'elapsed': time.perf_counter() - start_time,
+                        'destroy': self.destroy_ops[d_idx].__name__, 'repair': self.repair_ops[r_idx].__name__,
+                        'q': len(removed), 'current_cost': curr_cost, 'new_cost': new_cost,
+                        'best_cost': solution_cost(self.data, self.cfg, self.best_solution),
+                        'temperature': temp, 'accepted': accepted, 'new_best': new_best,
+                        'vehicles': vehicles, 'charges': charges, **timer.times,
+                    })
+        finally:
+            if telemetry is not None:
+                telemetry.close()
+            if verifier is not None:
+                verifier.uninstall()
+                print(verifier.report())
+            if own_mem:
+                print(mem.report())
+                mem.stop()
         
-        print(f"算法结束，共迭代 {self.cfg.max_iter} 次，最终最佳成本为 {solution_cost(self.data, self.cfg, self.best_solution):.2f}")
+        print(f"算法结束，共迭代 {iterations} 次，最终最佳成本为 {solution_cost(self.data, self.cfg, self.best_solution):.2f}")
+        print(f"插入候选下界筛选：{format_screen_stats()}")
 
         return self.best_solution
+
+    def _annealing_schedule(self, initial_cost):
+        """返回 (初始温度, 降温系数)"""
+        t0 = self.cfg.init_temperature
+        if t0 is None:
+            t0 = calibrate_temperature(initial_cost, self.cfg.start_worse, self.cfg.start_accept)
+        return t0, cooling_rate(t0, t0 * self.cfg.end_temperature_ratio, self.cfg.max_iter)
+
+    def _destroy(self, d_idx, q):
+        """按客户数 q 调用破坏算子；车辆级算子按平均每车客户数换算为车辆数"""
+        op = self.destroy_ops[d_idx]
+        if op in VEHICLE_LEVEL_OPERATORS:
+            used = sum(1 for r in self.current_solution if len(r) > 2)
+            q = max(1, round(q * used / max(1, len(self.data.customer_ids))))
+        return op(self.data, self.cfg, self.current_solution, q)
@@ -18,8 +18,63 @@ def update_weights(destroy_w, repair_w, di, ri, improvement):
         destroy_w[di] *= 0.9
         repair_w[ri] *= 0.9
 
-def temperature(iteration):
-    return 1000.0 * (0.97 ** iteration)
+def temperature(iteration, t0=1000.0, cooling=0.97):
+    return t0 * (cooling ** iteration)
 
 def acceptance_criterion(new_cost, current_cost, temp):
-    return (new_cost < current_cost) or (random.random() < math.exp((current_cost - new_cost)/temp))
+    """模拟退火接受准则；温度非正时退化为只接受改进解（纯贪婪）"""
+    if new_cost < current_cost:
+        return True
+    if temp <= 0:
+        return False
+    return random.random() < math.exp((current_cost - new_cost)/temp)
+
+
+def calibrate_temperature(initial_cost, worse_ratio=0.05, accept_prob=0.5):
+    """
+    按初始解成本标定初始温度：比当前解差 worse_ratio 的新解以 accept_prob 的概率被接受
+    T0 = -worse_ratio × 初始成本 / ln(accept_prob)
+    初始成本或 worse_ratio 为 0 时返回 0（纯贪婪接受）
+    """
+    if not 0 < accept_prob < 1:
+        raise ValueError(f"start_accept 须在 (0, 1) 内: {accept_prob}")
+    if worse_ratio < 0:
+        raise ValueError(f"start_worse 不能为负: {worse_ratio}")
+    return max(0.0, -worse_ratio * initial_cost / math.log(accept_prob))
+
+
+def cooling_rate(t0, t_end, iterations):
+    """使温度在 iterations 轮内由 t0 几何降至 t_end 的降温系数；t0 非正（纯贪婪）时返回 1"""
+    if t0 <= 0:
+        return 1.0
+    return (t_end / t0) ** (1.0 / max(1, iterations))
+
+
+class DestroySizeController:
+    """
+    自适应破坏规模：移除比例 degree 在 [low, high] 内调节
+    - 找到新最优解：收缩（集中强化当前区域）
+    - 连续 patience 轮未改进最优解：扩张（跳出局部最优）
+    每轮移除数在 degree × 客户数附近 ±20% 随机抖动
+    """
+    def __init__(self, n_customers, low=0.1, high=0.4, start=None, patience=10, step=1.2):
+        self.n = n_customers
+        self.low, self.high = low, high
+        self.degree = (low + high) / 2 if start is None else start
+        self.patience = patience
+        self.step = step
+        self.stall = 0
+
+    def sample(self):
+        q = self.degree * self.n * random.uniform(0.8, 1.2)
+        return max(1, min(self.n, int(round(q))))
+
+    def update(self, new_best):
+        if new_best:
+            self.stall = 0
+            self.degree = max(self.low, self.degree / self.step)
+            return
+        self.stall += 1
+        if self.stall >= self.patience:
+            self.stall = 0
+            self.degree = min(self.high, self.degree * self.step)
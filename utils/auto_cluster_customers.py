@@ -1,69 +1,135 @@
-import pandas as pd
+"""
+自动确定客户聚类数：对 K 做并行扫描，按轮廓系数选优
+大规模实例可启用 MiniBatchKMeans 与抽样轮廓系数，避免 O(n²) 的完整计算
+
+命令行（在包的上级目录执行）：
+    python -m <包名>.utils.auto_cluster_customers data/C101network_charge_test.txt --plot-dir out
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.metrics import silhouette_score
-import matplotlib.pyplot as plt
-
-# === 1. 读取数据 ===
-df = pd.read_csv(r'C:\Users\12448\OneDrive - MasterWai\Code\ALNS2\data\C101network_charge_test.txt')
-
-# === 2. 去除充电站点 ===
-df_customers = df[df['TYPE'] != 'charging_station'].copy()
-df_customers = df_customers.fillna('')
-X = df_customers[['XCOORD', 'YCOORD']].values
-
-# === 3. 自动确定最佳聚类数 ===
-sse = []  # 总平方误差
-silhouette_scores = []
-K_range = range(2, 11)  # 测试簇数 2~10，可自行调整
-
-for k in K_range:
-    kmeans = KMeans(n_clusters=k, random_state=0, n_init='auto')
-    labels = kmeans.fit_predict(X)
-    sse.append(kmeans.inertia_)
-    sil_score = silhouette_score(X, labels)
-    silhouette_scores.append(sil_score)
-
-# === 4. 根据轮廓系数选最优簇数 ===
-best_k = K_range[np.argmax(silhouette_scores)]
-print(f"最优聚类数（基于轮廓系数）为：{best_k}")
-
-# === 5. 最终聚类 ===
-final_kmeans = KMeans(n_clusters=best_k, random_state=0, n_init='auto')
-df_customers['Cluster'] = final_kmeans.fit_predict(X)
-centers = final_kmeans.cluster_centers_
-
-# === 6. 输出结果 ===
-print("\n=== 聚类中心点坐标 ===")
-for i, (x, y) in enumerate(centers):
-    members = df_customers[df_customers['Cluster'] == i]['CUST NO'].tolist()
-    print(f"簇 {i+1}: 中心=({x:.2f}, {y:.2f})，客户数量={len(members)}，客户={members}")
-
-# === 7. 可视化评估曲线 ===
-plt.figure(figsize=(12,5))
-plt.subplot(1,2,1)
-plt.plot(K_range, sse, 'o-', label='SSE（肘部法）')
-plt.xlabel('簇数 K')
-plt.ylabel('SSE')
-plt.title('肘部法判断聚类数')
-plt.grid(True)
-
-plt.subplot(1,2,2)
-plt.plot(K_range, silhouette_scores, 'o-', color='orange', label='轮廓系数')
-plt.xlabel('簇数 K')
-plt.ylabel('Silhouette Score')
-plt.title('轮廓系数判断聚类数')
-plt.grid(True)
-plt.tight_layout()
-plt.show()
-
-# === 8. 聚类可视化 ===
-plt.figure(figsize=(8,6))
-plt.scatter(df_customers['XCOORD'], df_customers['YCOORD'], c=df_customers['Cluster'], cmap='tab10', s=50)
-plt.scatter(centers[:,0], centers[:,1], c='red', marker='x', s=150, label='中心点')
-plt.title(f'客户聚类结果（K={best_k}）')
-plt.xlabel('X 坐标')
-plt.ylabel('Y 坐标')
-plt.legend()
-plt.grid(True)
-plt.show()
+
+
+def _fit_k(X, k, minibatch, sample_size, random_state):
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.metrics import silhouette_score
+
+    if minibatch:
+        model = MiniBatchKMeans(n_clusters=k, random_state=random_state, n_init='auto',
+                                batch_size=min(len(X), 4096))
+    else:
+        model = KMeans(n_clusters=k, random_state=random_state, n_init='auto')
+    labels = model.fit_predict(X)
+    if sample_size is not None and sample_size < len(X):
+        score = silhouette_score(X, labels, sample_size=sample_size, random_state=random_state)
+    else:
+        score = silhouette_score(X, labels)
+    return k, model.inertia_, score, model.cluster_centers_, labels
+
+
+def select_cluster_count(coords, k_range=range(2, 11), minibatch=None, sample_size=None,
+                         workers=None, random_state=0):
+    """
+    按轮廓系数选择最优聚类数
+    参数：
+        coords: 客户坐标 (n, 2)
+        minibatch: 是否使用 MiniBatchKMeans，默认在 n > 5000 时启用
+        sample_size: 轮廓系数抽样规模，默认在 n > 5000 时取 5000
+        workers: 并行线程数（KMeans 计算在原生代码中执行，线程即可并行）
+    返回：
+        best_k, centers, labels, scores（{k: {'sse', 'silhouette'}}）
+    """
+    X = np.asarray(coords, dtype=float)
+    n = len(X)
+    ks = [k for k in k_range if 2 <= k < n]
+    if not ks:
+        raise ValueError(f"客户数 {n} 不足以在 {list(k_range)} 中选择聚类数")
+    if minibatch is None:
+        minibatch = n > 5000
+    if sample_size is None and n > 5000:
+        sample_size = 5000
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda k: _fit_k(X, k, minibatch, sample_size, random_state), ks))
+
+    scores = {k: {'sse': float(sse), 'silhouette': float(sil)} for k, sse, sil, _, _ in results}
+    best = max(results, key=lambda r: r[2])
+    return best[0], best[3], best[4], scores
+
+
+def plot_cluster_selection(coords, best_k, centers, labels, scores, save_dir):
+    """保存肘部法/轮廓系数曲线与聚类结果图（Agg 画布，不弹窗）"""
+    import os
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    os.makedirs(save_dir, exist_ok=True)
+    ks = sorted(scores)
+
+    # === 评估曲线 ===
+    fig = Figure(figsize=(12, 5))
+    FigureCanvasAgg(fig)
+    ax1, ax2 = fig.subplots(1, 2)
+    ax1.plot(ks, [scores[k]['sse'] for k in ks], 'o-', label='SSE')
+    ax1.set_xlabel('K')
+    ax1.set_ylabel('SSE')
+    ax1.set_title('Elbow')
+    ax1.grid(True)
+    ax2.plot(ks, [scores[k]['silhouette'] for k in ks], 'o-', color='orange', label='Silhouette')
+    ax2.set_xlabel('K')
+    ax2.set_ylabel('Silhouette Score')
+    ax2.set_title('Silhouette')
+    ax2.grid(True)
+    fig.tight_layout()
+    fig.savefig(os.path.join(save_dir, 'cluster_k_selection.png'), dpi=150)
+
+    # === 聚类结果 ===
+    coords = np.asarray(coords)
+    fig = Figure(figsize=(8, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.scatter(coords[:, 0], coords[:, 1], c=labels, cmap='tab10', s=50)
+    ax.scatter(centers[:, 0], centers[:, 1], c='red', marker='x', s=150, label='Centers')
+    ax.set_title(f'K={best_k}')
+    ax.legend()
+    ax.grid(True)
+    fig.savefig(os.path.join(save_dir, 'cluster_result.png'), dpi=150)
+
+
+def main(argv=None):
+    from ..data_process import read_node_table
+
+    parser = argparse.ArgumentParser(description="自动确定客户聚类数")
+    parser.add_argument('file', help="节点数据文件或实例名（车场与换电站不参与聚类）")
+    parser.add_argument('--k-min', type=int, default=2)
+    parser.add_argument('--k-max', type=int, default=10)
+    parser.add_argument('--minibatch', action='store_true')
+    parser.add_argument('--sample-size', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--plot-dir', default=None, help="保存评估曲线与聚类结果图的目录")
+    args = parser.parse_args(argv)
+
+    # === 1. 读取数据（统一列名），只保留客户 ===
+    df = read_node_table(args.file)
+    df_customers = df[df['TYPE'] == 'customer'].copy()
+    X = df_customers[['XCOORD', 'YCOORD']].values
+
+    # === 2. 自动确定最佳聚类数 ===
+    best_k, centers, labels, scores = select_cluster_count(
+        X, range(args.k_min, args.k_max + 1), args.minibatch or None, args.sample_size, args.workers)
+    print(f"最优聚类数（基于轮廓系数）为：{best_k}")
+
+    # === 3. 输出结果 ===
+    df_customers['Cluster'] = labels
+    print("\n=== 聚类中心点坐标 ===")
+    for i, (x, y) in enumerate(centers):
+        members = df_customers[df_customers['Cluster'] == i]['CUST NO'].tolist()
+        print(f"簇 {i+1}: 中心=({x:.2f}, {y:.2f})，客户数量={len(members)}，客户={members}")
+
+    if args.plot_dir:
+        plot_cluster_selection(X, best_k, centers, labels, scores, args.plot_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+能耗模型：弧 (i -> j) 能耗 = dist[i, j] × (α + β × payload(到达 j 并卸货后的剩余载重))
+直接读取实例的距离矩阵（编译实例为只读内存映射），不另建 n × n 系数矩阵，整条路径的能耗为一次向量化计算。
+通过 cfg.energy_model 选择模型，新增模型只需注册到 ENERGY_MODELS，算子无需改动。
+"""
+import numpy as np
+
+
+class LinearEnergyModel:
+    """线性模型：距离 × (α + β × 载重)，即原 route_feasibility_check 中的公式"""
+    name = 'linear'
+    is_linear = True  # RouteState / RouteScreen 的增量公式仅对线性模型成立
+
+    def __init__(self, data, cfg):
+        # asarray 对 float64 的内存映射不复制，多进程仍共享同一份距离矩阵
+        dist = np.asarray(data.dist_matrix, dtype=float)
+        self.battery_cap = cfg.battery_cap
+        self.dist = dist
+        self.alpha = cfg.base_energy
+        self.beta = cfg.load_energy
+        self.demand = np.zeros(len(dist))
+        customers = np.asarray(data.customer_ids, dtype=int)
+        self.demand[customers] = np.asarray(data.demands, dtype=float)[customers]
+        self.is_charge = np.zeros(len(dist), dtype=bool)
+        self.is_charge[np.asarray(data.charge_ids, dtype=int)] = True
+
+    def payload(self, load):
+        return load
+
+    def arc_energy(self, i, j, load):
+        return self.dist[i, j] * (self.alpha + self.beta * self.payload(load))
+
+    def route_arc_energy(self, route):
+        """路径各弧能耗数组（长度为 len(route) - 1）"""
+        r = np.asarray(route, dtype=int)
+        q = self.demand[r]
+        loads = q.sum() - np.cumsum(q)[1:]  # 到达 r[k] 并卸货后的载重
+        return self.dist[r[:-1], r[1:]] * (self.alpha + self.beta * self.payload(loads))
+
+    def route_check(self, route, capacity):
+        """
+        一次完成容量与电量检查（能耗非负，各电量段的最低电量即段末电量）
+        返回：(是否可行, 回场时剩余电量)；超载时剩余电量为 None
+        """
+        r = np.asarray(route, dtype=int)
+        q = self.demand[r]
+        cum = np.cumsum(q)
+        if cum[-1] > capacity:
+            return False, None
+        a, b = r[:-1], r[1:]
+        energy = self.dist[a, b] * (self.alpha + self.beta * self.payload(cum[-1] - cum[1:]))
+        charge = self.is_charge[b]
+        if not charge.any():
+            used = energy.sum()
+            return bool(used <= self.battery_cap), self.battery_cap - float(used)
+        starts = np.concatenate(([0], np.flatnonzero(charge[:-1]) + 1))
+        used = np.add.reduceat(energy, starts)
+        final = self.battery_cap if charge[-1] else self.battery_cap - float(used[-1])
+        return bool(used.max() <= self.battery_cap), final
+
+    def energy_profile(self, route):
+        """每条弧结束时的剩余电量（换电站处重置前），换电站后从满电重新累计"""
+        energy = self.route_arc_energy(route)
+        used = np.cumsum(energy)
+        reset = np.where(self.is_charge[np.asarray(route[1:], dtype=int)], used, 0.0)
+        offset = np.concatenate(([0.0], np.maximum.accumulate(reset)[:-1]))
+        return self.battery_cap - (used - offset)
+
+
+class PayloadCurveEnergyModel(LinearEnergyModel):
+    """
+    非线性载重曲线：距离 × (α + β × 载重^γ / 容量^(γ-1))
+    γ = 1 时退化为线性模型；γ > 1 表示重载时能耗增长更快
+    """
+    name = 'payload_curve'
+    is_linear = False
+
+    def __init__(self, data, cfg):
+        super().__init__(data, cfg)
+        self.gamma = getattr(cfg, 'payload_exponent', 1.5)
+        self.scale = float(cfg.car_capacity) ** (self.gamma - 1)
+
+    def payload(self, load):
+        return np.power(np.maximum(load, 0.0), self.gamma) / self.scale
+
+
+ENERGY_MODELS = {
+    LinearEnergyModel.name: LinearEnergyModel,
+    PayloadCurveEnergyModel.name: PayloadCurveEnergyModel,
+}
+
+
+def get_energy_model(data, cfg):
+    """按 cfg 取实例的能耗模型（缓存，参数变化时重新预计算）"""
+    name = getattr(cfg, 'energy_model', 'linear')
+    if name not in ENERGY_MODELS:
+        raise ValueError(f"未知能耗模型: {name}（可选 {list(ENERGY_MODELS)}）")
+    key = (name, cfg.base_energy, cfg.load_energy, cfg.battery_cap, cfg.car_capacity,
+           getattr(cfg, 'payload_exponent', None))
+    cache = data.__dict__.setdefault('_energy_models', {})
+    if key not in cache:
+        cache[key] = ENERGY_MODELS[name](data, cfg)
+    return cache[key]
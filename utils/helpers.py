@@ -1,41 +1,28 @@
 import copy
 from copy import deepcopy
 
+from .energy_model import get_energy_model
+from .time_windows import get_time_windows
+
 def route_feasibility_check(data, cfg, route):
     """路径可行性验证"""
     # 1. 检查路径首尾是否为车场
     if route[0] != data.depot_id or route[-1] != data.depot_id:
         return (False, None)
     
-    # 2. 检查车辆容量
-    total_demand = sum(data.demands[node] for node in route if node in data.customer_ids)
-    if total_demand > cfg.car_capacity:
+    # 2. 检查车辆容量与电量：能耗由能耗模型一次向量化计算，换电站处电量重置
+    if len(route) < 2:
+        return (True, 1.0)
+    feasible, final_energy = get_energy_model(data, cfg).route_check(route, cfg.car_capacity)
+    if final_energy is None:
         return (False, None)
-    
-    # 3. 初始化负载与能量
-    current_load = total_demand
-    current_energy = cfg.battery_cap
-    min_energy = float('inf')
-    
-    for i in range(1, len(route)):
-        prev_node = route[i-1]
-        curr_node = route[i]
-        
-        # 到达客户点时卸货
-        if curr_node in data.customer_ids:
-            current_load -= data.demands[curr_node]
-        
-        # 计算能耗
-        distance = data.dist_matrix[prev_node][curr_node]
-        energy_cost = distance * (cfg.base_energy + cfg.load_energy * current_load)
-        current_energy -= energy_cost
-        min_energy = min(min_energy, current_energy)
-        
-        # 充电站充电
-        if curr_node in data.charge_ids:
-            current_energy = cfg.battery_cap
-    
-    return (min_energy >= 0, current_energy / cfg.battery_cap)
+
+    # 3. 时间窗（cfg.time_windows 开启时）
+    if feasible:
+        tw = get_time_windows(data, cfg)
+        if tw is not None and not tw.route_check(route):
+            feasible = False
+    return (feasible, final_energy / cfg.battery_cap)
 
 def charging_insert(data, cfg, route):
     """最近换电站插入修复"""
@@ -92,6 +79,21 @@ def solution_cost(data, cfg, solution):
     total_cost += charging_count * cfg.charging_cost
     return total_cost
 
+def cost_breakdown(data, cfg, solution):
+    """解的成本构成：车辆数、行驶距离、充电次数及各项费用"""
+    used_vehicles = sum(1 for r in solution if len(r) > 2)
+    total_distance = sum(data.dist_matrix[r[i-1]][r[i]] for r in solution for i in range(1, len(r)))
+    charging_count = sum(1 for route in solution for node in route if node in data.charge_ids)
+    return {
+        'vehicles': used_vehicles,
+        'distance': float(total_distance),
+        'charges': charging_count,
+        'vehicle_cost': used_vehicles * cfg.vehicle_fixed_cost,
+        'distance_cost': float(total_distance * cfg.distance_cost),
+        'charging_cost': charging_count * cfg.charging_cost,
+        'total_cost': float(solution_cost(data, cfg, solution)),
+    }
+
 def handle_unassigned_customers(data, cfg, solution):
     """
     #1122 目前新车安排的逻辑还是比较牵强。
@@ -105,50 +107,44 @@ def handle_unassigned_customers(data, cfg, solution):
         has_unassigned: 是否仍有未分配客户（布尔值）
     """
     # 步骤1：检查未分配客户
+    customers = set(data.customer_ids)
     assigned = set()
     for route in solution:
-        assigned.update(node for node in route if node in data.customer_ids)
-    unassigned = list(set(data.customer_ids) - assigned)
+        assigned.update(node for node in route if node in customers)
+    unassigned = list(customers - assigned)
     if not unassigned:
         return solution, False  # 无未分配客户，直接返回
 
-    # 步骤2：统计当前已用车辆数（非空车）
-    used_vehicles = sum(1 for route in solution if len(route) > 2)
-    max_vehicles = cfg.vehicle_num
-
-    # 步骤3：若有剩余车辆额度，尝试用新车安排
-    if used_vehicles < max_vehicles:
-        # 为未分配客户创建初始路径（车场->客户->车场）
-        new_route = [data.depot_id] + unassigned + [data.depot_id]
-        feasible, _ = route_feasibility_check(data, cfg, new_route)
+    # 步骤2：找出所有空车位置
+    empty_slots = [i for i, route in enumerate(solution) if len(route) <= 2]
+    if not empty_slots:
+        return solution, True  # 无剩余车辆，返回原解决方案
 
-        # 若路径不可行，按最近邻拆分客户
-        if not feasible:
-            from ..initial_solution import nearest_neighbor_sort
-            sorted_unassigned = nearest_neighbor_sort(data, unassigned, data.depot_id)
-            # 逐步减少客户数量直到路径可行
-            for k in range(len(sorted_unassigned), 0, -1):
-                partial_route = [data.depot_id] + sorted_unassigned[:k] + [data.depot_id]
-                if route_feasibility_check(data, cfg, partial_route)[0]:
-                    new_route = partial_route
-                    unassigned = sorted_unassigned[k:]  # 更新剩余未分配客户
-                    break
-            else:
-                # 即使单客户也不可行（极端情况），返回原解决方案
-                return solution, True
-
-        # 将新车路径插入解决方案（替换第一个空车位置）
-        processed_solution = copy.deepcopy(solution)
-        empty_veh_idx = next(i for i, r in enumerate(processed_solution) if len(r) <= 2)
-        processed_solution[empty_veh_idx] = new_route
-
-        # 递归处理剩余未分配客户（若仍有剩余且车辆充足）
-        if unassigned and (used_vehicles + 1) < max_vehicles:
-            return handle_unassigned_customers(data, cfg, processed_solution)
-        return processed_solution, bool(unassigned)
-
-    # 步骤4：无剩余车辆，返回原解决方案
-    return solution, True
+    # 步骤3：按最近邻顺序单遍扫描，用累计载重/电量装填空车；
+    # 电量不足时经由最近换电站补能，容量或电量无法满足时换下一辆空车
+    from ..initial_solution import nearest_neighbor_sort
+    from .route_state import RouteState
+    processed_solution = list(solution)
+    remaining = []
+    slots = iter(empty_slots)
+    slot = next(slots)
+    state = RouteState(data, cfg)
+    for cust in nearest_neighbor_sort(data, unassigned, data.depot_id):
+        if slot is None:
+            remaining.append(cust)
+            continue
+        if state.try_append(cust):
+            continue
+        if not state.is_empty:
+            processed_solution[slot] = state.route()
+            slot = next(slots, None)
+            state = RouteState(data, cfg)
+            if slot is not None and state.try_append(cust):
+                continue
+        remaining.append(cust)  # 单客户也不可行（极端情况）或车辆用尽
+    if slot is not None and not state.is_empty:
+        processed_solution[slot] = state.route()
+    return processed_solution, bool(remaining)
 
 def check_unassigned_customers(data, solution):
     """检查是否有未分配的客户"""
@@ -245,17 +241,23 @@ def adjust_charge_stations(data, cfg, route):
     # 4. 调整失败，尝试插入新站点
     return charging_insert(data, cfg, original_route)
 
-def evaluate_insertion_with_cs(data, cfg, route, customer, pos):
+def evaluate_insertion_with_cs(data, cfg, route, customer, pos, screen=None):
     """
     评估在路径 route 的 pos 位置插入 customer 的成本。
     如果因电量不可行，自动尝试插入换电站。
+    screen: 可选的 RouteScreen，先用 O(1) 下界排除必不可行的候选
     返回: (cost, new_route) 如果不可行返回 (float('inf'), None)
     """
-    # 1. 尝试直接插入
+    level = 2 if screen is None else screen.check(customer, pos)
+    if level == 0:
+        return float('inf'), None
+
+    # 1. 尝试直接插入（下界已判定直接插入不可行时跳过）
     new_route = route[:pos] + [customer] + route[pos:]
-    feasible, _ = route_feasibility_check(data, cfg, new_route)
-    if feasible:
-        return solution_cost(data, cfg, [new_route]), new_route
+    if level == 2:
+        feasible, _ = route_feasibility_check(data, cfg, new_route)
+        if feasible:
+            return solution_cost(data, cfg, [new_route]), new_route
     
     # 2. 如果直接插入不可行，大概率是电量问题，尝试调整或加入换电站
     # 注意：这里调用你现有的 adjust_charge_stations 函数
@@ -319,44 +321,11 @@ def calculate_redundancy(data, cfg, route, charge_pos):
     - 前向冗余：到达换电站时的剩余电量（相对于最低安全阈值）
     - 后向冗余：离开换电站后到终点的剩余电量（相对于最低安全阈值）
     """
-    # 前向计算：从起点到换电站的电量变化
-    current_energy = cfg.battery_cap
-    current_load = sum(data.demands[node] for node in route if node in data.customer_ids)
-    
-    for i in range(1, charge_pos + 1):
-        prev_node = route[i-1]
-        curr_node = route[i]
-        
-        # 到达客户点时卸货（降低负载）
-        if curr_node in data.customer_ids:
-            current_load -= data.demands[curr_node]
-        
-        # 计算能耗
-        distance = data.dist_matrix[prev_node][curr_node]
-        energy_cost = distance * (cfg.base_energy + cfg.load_energy * current_load)
-        current_energy -= energy_cost
-        
-        # 到达换电站时停止计算
-        if i == charge_pos:
-            break
-    
-    # 前向冗余：实际剩余电量 - 安全阈值（预留10%电量）
-    pre_redundancy = current_energy - (cfg.battery_cap * 0.1)
-
-    # 后向计算：从换电站到终点的电量变化（从满电开始）
-    current_energy = cfg.battery_cap  # 换电站后电量重置为满电
-    for i in range(charge_pos + 1, len(route)):
-        prev_node = route[i-1]
-        curr_node = route[i]
-        
-        if curr_node in data.customer_ids:
-            current_load -= data.demands[curr_node]
-        
-        distance = data.dist_matrix[prev_node][curr_node]
-        energy_cost = distance * (cfg.base_energy + cfg.load_energy * current_load)
-        current_energy -= energy_cost
-    
-    # 后向冗余：实际剩余电量 - 安全阈值
-    post_redundancy = current_energy - (cfg.battery_cap * 0.1)
-    
-    return (max(pre_redundancy, 0), max(post_redundancy, 0))  # 负冗余按0计算
\ No newline at end of file
+    energy = get_energy_model(data, cfg).route_arc_energy(route)
+
+    # 前向：从起点到换电站的能耗；后向：换电站后从满电开始到终点的能耗
+    # 冗余 = 实际剩余电量 - 安全阈值（预留10%电量）
+    pre_redundancy = cfg.battery_cap - energy[:charge_pos].sum() - cfg.battery_cap * 0.1
+    post_redundancy = cfg.battery_cap - energy[charge_pos:].sum() - cfg.battery_cap * 0.1
+
+    return (max(float(pre_redundancy), 0), max(float(post_redundancy), 0))  # 负冗余按0计算
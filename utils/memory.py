@@ -0,0 +1,105 @@
+"""
+按求解阶段统计内存分配（tracemalloc，cfg.memory_profile 开启时生效，默认关闭）
+用法与 PhaseTimer 相同：在每个阶段结束处调用 profiler.lap('阶段名')，
+记录自上次 lap 以来的分配峰值（相对阶段开始时的增量）与净增量。
+前 cfg.memory_snapshots 次 lap 额外拍摄快照，与上一快照比较得到各阶段分配最多的代码行
+（快照只反映阶段结束时仍存活的分配，阶段内已释放的临时对象只体现在峰值中）。
+同一进程中已有运行中的分析器时（如批量作业先分析实例加载再进入求解器），复用该分析器。
+"""
+import json
+import tracemalloc
+
+MB = 1024 * 1024
+MEMORY_COLUMNS = ['job_id', 'phase', 'calls', 'peak_mb', 'peak_delta_mb', 'net_mb', 'top_sites']
+
+_ACTIVE = None
+
+
+class MemoryProfiler:
+    """按阶段累计的内存峰值、净增量与分配最多的代码行"""
+    def __init__(self, top=10, snapshots=20, frames=1):
+        self.top = top
+        self.snapshots = snapshots
+        self.stats = {}   # 阶段 -> {'calls', 'peak', 'peak_delta', 'net'}
+        self.sites = {}   # 阶段 -> {代码行: 累计净分配字节}
+        self._owns_tracing = not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start(frames)
+        tracemalloc.reset_peak()
+        self._entry = tracemalloc.get_traced_memory()[0]
+        self._snapshot = self._take_snapshot() if snapshots else None
+        self._laps = 0
+
+    @staticmethod
+    def _take_snapshot():
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    def lap(self, phase):
+        current, peak = tracemalloc.get_traced_memory()
+        s = self.stats.setdefault(phase, {'calls': 0, 'peak': 0, 'peak_delta': 0, 'net': 0})
+        s['calls'] += 1
+        s['peak'] = max(s['peak'], peak)
+        s['peak_delta'] = max(s['peak_delta'], peak - self._entry)
+        s['net'] += current - self._entry
+
+        self._laps += 1
+        if self._snapshot is not None:
+            snapshot = self._take_snapshot()
+            sites = self.sites.setdefault(phase, {})
+            for diff in snapshot.compare_to(self._snapshot, 'lineno'):
+                if diff.size_diff > 0:
+                    frame = diff.traceback[0]
+                    key = f"{frame.filename}:{frame.lineno}"
+                    sites[key] = sites.get(key, 0) + diff.size_diff
+            self._snapshot = snapshot if self._laps < self.snapshots else None
+
+        tracemalloc.reset_peak()
+        self._entry = tracemalloc.get_traced_memory()[0]
+
+    def top_sites(self, phase):
+        sites = sorted(self.sites.get(phase, {}).items(), key=lambda kv: -kv[1])[:self.top]
+        return [(site, round(size / 1024, 1)) for site, size in sites]
+
+    def summary(self):
+        """每个阶段一行，字段见 MEMORY_COLUMNS（job_id 由调用方填写）"""
+        return [{
+            'phase': phase,
+            'calls': s['calls'],
+            'peak_mb': round(s['peak'] / MB, 3),
+            'peak_delta_mb': round(s['peak_delta'] / MB, 3),
+            'net_mb': round(s['net'] / MB, 3),
+            'top_sites': json.dumps(self.top_sites(phase), ensure_ascii=False),
+        } for phase, s in self.stats.items()]
+
+    def report(self):
+        lines = ["内存分析（峰值为进程内已追踪总量，增量相对阶段开始）："]
+        for row in self.summary():
+            lines.append(f"  {row['phase']}: {row['calls']} 次，峰值 {row['peak_mb']:.2f}MB，"
+                         f"最大增量 {row['peak_delta_mb']:.2f}MB，累计净增 {row['net_mb']:.2f}MB")
+            for site, kb in self.top_sites(row['phase'])[:3]:
+                lines.append(f"      {site}  +{kb}KB")
+        return '\n'.join(lines)
+
+    def stop(self):
+        global _ACTIVE
+        if _ACTIVE is self:
+            _ACTIVE = None
+        if self._owns_tracing:
+            tracemalloc.stop()
+
+
+def start_memory_profile(cfg):
+    """
+    cfg.memory_profile 开启时返回 (分析器, 是否为新建)；已有运行中的分析器时返回 (该分析器, False)
+    关闭时返回 (None, False)，求解器不产生任何额外开销
+    """
+    global _ACTIVE
+    if not getattr(cfg, 'memory_profile', False):
+        return None, False
+    if _ACTIVE is not None:
+        return _ACTIVE, False
+    _ACTIVE = MemoryProfiler(top=getattr(cfg, 'memory_top', 10), snapshots=getattr(cfg, 'memory_snapshots', 20))
+    return _ACTIVE, True
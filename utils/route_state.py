@@ -0,0 +1,267 @@
+from .energy_model import get_energy_model
+from .helpers import route_feasibility_check
+from .time_windows import EPS, get_time_windows
+
+
+class RouteState:
+    """
+    增量维护的路径电量状态，用于构造类算法在路径末尾追加客户/合并路径时 O(换电段数) 判断可行性。
+    与 route_feasibility_check 的能耗模型一致：
+        弧 (i -> j) 能耗 = 距离 × (α + β × 到达 j 并卸货后的剩余载重)，到达换电站时电量重置
+    由于追加的客户位于路径末尾，之前所有弧的载重都增加其需求量 q，
+    因此每个换电段只需记录 距离和 D 与能耗和 E，追加后 E += β·q·D。
+    nodes 不含末尾回场的车场；segs 中各段不含回场弧，回场弧载重为 0，能耗为 α × 距离。
+    能耗模型非线性时（cfg.energy_model），增量公式不成立，各判断退回完整的 route_feasibility_check。
+    开启时间窗时，time 为 nodes[1:] 的时间窗片段概括（见 utils/time_windows.py），追加/合并的检查均为 O(1)。
+    """
+    __slots__ = ('data', 'cfg', 'nodes', 'load', 'segs', 'linear', 'tw', 'time')
+
+    def __init__(self, data, cfg):
+        self.data = data
+        self.cfg = cfg
+        self.linear = get_energy_model(data, cfg).is_linear
+        self.nodes = [data.depot_id]
+        self.load = 0.0
+        self.segs = [[0.0, 0.0]]  # 每段 [距离和 D, 能耗和 E]
+        self.tw = get_time_windows(data, cfg)
+        self.time = None
+
+    @classmethod
+    def from_route(cls, data, cfg, route):
+        """由完整路径（首尾为车场）构建状态"""
+        state = cls(data, cfg)
+        customers = set(data.customer_ids)
+        charges = set(data.charge_ids)
+        demands = [data.demands[n] if n in customers else 0.0 for n in route]
+        state.load = float(sum(demands))
+        load = state.load
+        dist = data.dist_matrix
+        alpha, beta = cfg.base_energy, cfg.load_energy
+        for i in range(1, len(route) - 1):
+            load -= demands[i]
+            d = dist[route[i-1]][route[i]]
+            seg = state.segs[-1]
+            seg[0] += d
+            seg[1] += d * (alpha + beta * load)
+            if route[i] in charges:
+                state.segs.append([0.0, 0.0])
+        state.nodes = list(route[:-1])
+        if state.tw is not None and len(route) > 2:
+            state.time = state.tw.sequence(route[1:-1])
+        return state
+
+    def copy(self):
+        state = RouteState.__new__(RouteState)
+        state.data, state.cfg, state.linear = self.data, self.cfg, self.linear
+        state.tw, state.time = self.tw, self.time
+        state.nodes = list(self.nodes)
+        state.load = self.load
+        state.segs = [list(s) for s in self.segs]
+        return state
+
+    @property
+    def last(self):
+        return self.nodes[-1]
+
+    @property
+    def is_empty(self):
+        return len(self.nodes) == 1
+
+    def route(self):
+        """完整路径（含回场车场）"""
+        return self.nodes + [self.data.depot_id]
+
+    def closing_energy(self, node=None):
+        node = self.last if node is None else node
+        return self.cfg.base_energy * self.data.dist_matrix[node][self.data.depot_id]
+
+    def _closed_ok(self, extra_load):
+        # 除最后一段外，各段在所有弧载重增加 extra_load 后仍不超过电池容量
+        if not self.linear:
+            return True
+        cap, beta = self.cfg.battery_cap, self.cfg.load_energy
+        return all(E + beta * extra_load * D <= cap for D, E in self.segs[:-1])
+
+    def _time_ok(self, tail=(), other=None):
+        """末尾追加 tail 中的节点（及路径 other）并回场后是否满足时间窗"""
+        tw = self.tw
+        if tw is None:
+            return True
+        depot = self.data.depot_id
+        seg, last = tw.node(depot), depot
+        if self.time is not None:
+            seg, last = tw.concat(seg, depot, self.time, self.nodes[1]), self.last
+        for n in tail:
+            seg, last = tw.concat(seg, last, tw.node(n), n), n
+        if other is not None and other.time is not None:
+            seg, last = tw.concat(seg, last, other.time, other.nodes[1]), other.last
+        return tw.concat(seg, last, tw.node(depot), depot)[1] <= EPS
+
+    def _extend_time(self, nodes):
+        """追加节点前更新时间窗片段概括"""
+        if self.tw is None:
+            return
+        last = self.last
+        for n in nodes:
+            node = self.tw.node(n)
+            self.time = node if self.time is None else self.tw.concat(self.time, last, node, n)
+            last = n
+
+    def _exact(self, route):
+        return route_feasibility_check(self.data, self.cfg, route)[0]
+
+    def is_feasible(self):
+        if not self.linear:
+            return self.load <= self.cfg.car_capacity and self._exact(self.route())
+        cap = self.cfg.battery_cap
+        if self.load > self.cfg.car_capacity or not self._closed_ok(0.0) or not self._time_ok():
+            return False
+        return self.segs[-1][1] + self.closing_energy() <= cap
+
+    def energy_ratio(self):
+        """回场时剩余电量比，对应 route_feasibility_check 的第二个返回值"""
+        if not self.linear:
+            return route_feasibility_check(self.data, self.cfg, self.route())[1]
+        return (self.cfg.battery_cap - self.segs[-1][1] - self.closing_energy()) / self.cfg.battery_cap
+
+    def append_delta(self, cust):
+        """
+        在末尾追加客户的可行性与增量距离
+        返回：(是否可行, 新增距离)
+        """
+        q = self.data.demands[cust]
+        if self.load + q > self.cfg.car_capacity or not self._closed_ok(q):
+            return False, float('inf')
+        dist, depot = self.data.dist_matrix, self.data.depot_id
+        alpha, beta = self.cfg.base_energy, self.cfg.load_energy
+        D, E = self.segs[-1]
+        d_in, d_out = dist[self.last][cust], dist[cust][depot]
+        if not self.linear:
+            if not self._exact(self.nodes + [cust, depot]):
+                return False, float('inf')
+        elif E + beta * q * D + alpha * (d_in + d_out) > self.cfg.battery_cap:
+            return False, float('inf')
+        if not self._time_ok((cust,)):
+            return False, float('inf')
+        return True, d_in + d_out - dist[self.last][depot]
+
+    def append(self, cust):
+        """在末尾追加客户（不做可行性检查）"""
+        q = self.data.demands[cust]
+        beta = self.cfg.load_energy
+        for seg in self.segs:
+            seg[1] += beta * q * seg[0]
+        d = self.data.dist_matrix[self.last][cust]
+        self.segs[-1][0] += d
+        self.segs[-1][1] += self.cfg.base_energy * d
+        self.load += q
+        self._extend_time([cust])
+        self.nodes.append(cust)
+
+    def station_append_delta(self, station, cust):
+        """
+        先前往换电站 station 再追加客户的可行性与增量距离
+        返回：(是否可行, 新增距离)
+        """
+        q = self.data.demands[cust]
+        if self.load + q > self.cfg.car_capacity or not self._closed_ok(q):
+            return False, float('inf')
+        dist, depot = self.data.dist_matrix, self.data.depot_id
+        alpha, beta, cap = self.cfg.base_energy, self.cfg.load_energy, self.cfg.battery_cap
+        D, E = self.segs[-1]
+        d_ls, d_sc, d_out = dist[self.last][station], dist[station][cust], dist[cust][depot]
+        if not self.linear:
+            if not self._exact(self.nodes + [station, cust, depot]):
+                return False, float('inf')
+        # 到达换电站时车上仍载有客户 cust 的货物
+        elif E + beta * q * D + (alpha + beta * q) * d_ls > cap or alpha * (d_sc + d_out) > cap:
+            return False, float('inf')
+        if not self._time_ok((station, cust)):
+            return False, float('inf')
+        return True, d_ls + d_sc + d_out - dist[self.last][depot]
+
+    def append_with_station(self, station, cust):
+        q = self.data.demands[cust]
+        alpha, beta = self.cfg.base_energy, self.cfg.load_energy
+        for seg in self.segs:
+            seg[1] += beta * q * seg[0]
+        d = self.data.dist_matrix[self.last][station]
+        self.segs[-1][0] += d
+        self.segs[-1][1] += (alpha + beta * q) * d
+        d = self.data.dist_matrix[station][cust]
+        self.segs.append([d, alpha * d])
+        self.load += q
+        self._extend_time([station, cust])
+        self.nodes.extend([station, cust])
+
+    def try_append(self, cust, allow_station=True):
+        """
+        尝试在末尾追加客户；直接追加不可行时，尝试经由最近换电站后再追加
+        候选换电站为当前末尾节点与该客户各自的最近换电站，取增量距离最小者
+        返回：是否追加成功
+        """
+        ok, _ = self.append_delta(cust)
+        if ok:
+            self.append(cust)
+            return True
+        if not allow_station or self.last in self.data.charge_ids:
+            return False
+        best, best_delta = None, float('inf')
+        for station in {self.data.nearest_charge.get(self.last), self.data.nearest_charge.get(cust)}:
+            if station is None:
+                continue
+            ok, delta = self.station_append_delta(station, cust)
+            if ok and delta < best_delta:
+                best, best_delta = station, delta
+        if best is None:
+            return False
+        self.append_with_station(best, cust)
+        return True
+
+    def merge_delta(self, other):
+        """
+        将 other 的路径接在本路径之后（本路径末尾 -> other 首个节点）的可行性与节省距离
+        返回：(是否可行, 节省距离)
+        """
+        Q = other.load
+        if self.load + Q > self.cfg.car_capacity or not self._closed_ok(Q) or not self._time_ok(other=other):
+            return False, float('-inf')
+        dist, depot = self.data.dist_matrix, self.data.depot_id
+        alpha, beta, cap = self.cfg.base_energy, self.cfg.load_energy, self.cfg.battery_cap
+        first = other.nodes[1]
+        if not self.linear:
+            if not self._exact(self.nodes + other.nodes[1:] + [depot]):
+                return False, float('-inf')
+            return True, dist[self.last][depot] + dist[depot][first] - dist[self.last][first]
+        # other 第一条弧(车场 -> first)的载重即其到达 first 后的剩余载重
+        first_load = Q - (0.0 if first in self.data.charge_ids else self.data.demands[first])
+        d_link, d_open = dist[self.last][first], dist[depot][first]
+        D, E = self.segs[-1]
+        mid_E = E + beta * Q * D + (alpha + beta * first_load) * (d_link - d_open) + other.segs[0][1]
+        if len(other.segs) == 1:
+            if mid_E + other.closing_energy() > cap:
+                return False, float('-inf')
+        elif mid_E > cap or any(E2 > cap for _, E2 in other.segs[1:-1]) \
+                or other.segs[-1][1] + other.closing_energy() > cap:
+            return False, float('-inf')
+        return True, dist[self.last][depot] + d_open - d_link
+
+    def merge(self, other):
+        """将 other 接在本路径之后（不做可行性检查）"""
+        Q = other.load
+        dist, depot = self.data.dist_matrix, self.data.depot_id
+        alpha, beta = self.cfg.base_energy, self.cfg.load_energy
+        first = other.nodes[1]
+        first_load = Q - (0.0 if first in self.data.charge_ids else self.data.demands[first])
+        d_link, d_open = dist[self.last][first], dist[depot][first]
+        for seg in self.segs:
+            seg[1] += beta * Q * seg[0]
+        mid = self.segs[-1]
+        mid[0] += d_link - d_open + other.segs[0][0]
+        mid[1] += (alpha + beta * first_load) * (d_link - d_open) + other.segs[0][1]
+        self.segs.extend([list(s) for s in other.segs[1:]])
+        self.load += Q
+        if self.tw is not None and other.time is not None:
+            self.time = other.time if self.time is None else \
+                self.tw.concat(self.time, self.last, other.time, other.nodes[1])
+        self.nodes.extend(other.nodes[1:])
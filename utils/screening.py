@@ -0,0 +1,160 @@
+"""
+插入候选的 O(1) 下界筛选：在完整仿真（route_feasibility_check / adjust_charge_stations）之前
+排除必然不可行的插入位置。各下界均基于路径中的客户序列（忽略换电站）计算，
+因而对换电站的插入、移动同样成立：
+- 容量：路径载重 + 客户需求 > 车辆容量
+- 可达：客户往返最近补能点（车场/换电站）的最低能耗 2α·d_min > 电池容量
+- 电量：经过换电站绕行只会增加距离，且弧载重不低于客户序列中对应弧的载重，
+        故客户序列能耗是实际能耗的下界；路径含 m 个换电站时至多 m+1 段、
+        每段不超过电池容量。下界超过 (m+1)·容量 时直接插入必不可行，
+        超过 (m+2)·容量 时 adjust_charge_stations（移动现有站或再插入一站）也无法修复
+- 时间窗（cfg.time_windows）：换电站只增加行驶与停留时间，故客户序列的时间窗违反
+        意味着任何换电站调整都不可行；原路径（含换电站）上违反则直接插入不可行
+电量与可达下界按线性能耗模型推导，非线性模型（cfg.energy_model）下不使用。
+"""
+import numpy as np
+
+from .energy_model import get_energy_model
+from .time_windows import get_time_windows
+
+SCREEN_STATS = {'candidates': 0, 'capacity': 0, 'reach': 0, 'energy_direct': 0, 'energy': 0,
+                'time_direct': 0, 'time': 0}
+
+
+def reset_screen_stats():
+    for key in SCREEN_STATS:
+        SCREEN_STATS[key] = 0
+
+
+def screen_stats():
+    """当前累计的筛选统计（候选数与各条件剪枝数）"""
+    return dict(SCREEN_STATS)
+
+
+def format_screen_stats(stats=None):
+    stats = SCREEN_STATS if stats is None else stats
+    pruned = stats['capacity'] + stats['reach'] + stats['energy'] + stats['time']
+    return (f"候选 {stats['candidates']}，剪枝 {pruned}（容量 {stats['capacity']}，可达 {stats['reach']}，"
+            f"电量 {stats['energy']}，时间窗 {stats['time']}），"
+            f"跳过直接插入仿真 {stats['energy_direct'] + stats['time_direct']}")
+
+
+def _refuel_reach(data, cfg):
+    """每个节点往返最近补能点的最低能耗 2α·d_min（缓存在 data 上）"""
+    reach = getattr(data, '_refuel_reach', None)
+    if reach is None:
+        dist = np.asarray(data.dist_matrix, dtype=float)
+        points = [data.depot_id] + list(data.charge_ids)
+        reach = 2 * dist[:, points].min(axis=1)
+        data._refuel_reach = reach
+    return cfg.base_energy * reach
+
+
+class RouteScreen:
+    """
+    单条路径的插入筛选器：构建 O(路径长度)，每个候选位置的判断 O(1)
+    用法：
+        screen = RouteScreen(data, cfg, route)
+        if screen.reject_route(customer): 跳过整条路径
+        level = screen.check(customer, pos)  # 0 不可行 / 1 仅可能经换电站调整可行 / 2 可直接尝试
+    """
+    __slots__ = ('data', 'cfg', 'dist', 'linear', 'seq', 'load', 'n_stations', 'energy', 'prev', 'next', 'prefix', 'remain',
+                 'tw', 'route', 'seq_fwd', 'seq_bwd', 'fwd', 'bwd')
+
+    def __init__(self, data, cfg, route):
+        self.data = data
+        self.cfg = cfg
+        self.dist = data.dist_matrix
+        self.linear = get_energy_model(data, cfg).is_linear
+        charges = set(data.charge_ids)
+        demands = data.demands
+        self.seq = seq = [n for n in route if n not in charges]  # 客户序列（首尾为车场）
+        self.n_stations = len(route) - len(seq)
+        self.load = float(sum(demands[n] for n in seq[1:-1]))
+
+        # prefix[k]: 车场到 seq[k] 的累计距离；remain[k]: 离开 seq[k] 时的载重
+        alpha, beta = cfg.base_energy, cfg.load_energy
+        self.prefix = [0.0] * len(seq)
+        self.remain = [0.0] * len(seq)
+        load, energy = self.load, 0.0
+        self.remain[0] = load
+        for k in range(1, len(seq)):
+            if k < len(seq) - 1:
+                load -= demands[seq[k]]
+            d = self.dist[seq[k-1]][seq[k]]
+            energy += d * (alpha + beta * load)
+            self.prefix[k] = self.prefix[k-1] + d
+            self.remain[k] = load
+        self.energy = energy
+
+        # 原路径插入位置 pos（插在 route[pos] 之前）对应的客户序列前后节点
+        # route[pos] 为换电站时，后继为换电站之后的下一个客户序列节点
+        self.prev = [0] * len(route)
+        self.next = [0] * len(route)
+        k = 0
+        for pos in range(1, len(route)):
+            self.prev[pos] = k
+            self.next[pos] = k + 1
+            if route[pos] not in charges:
+                k += 1
+
+        # 时间窗：客户序列与原路径的前缀 / 后缀片段概括，插入检查 O(1)
+        self.route = route
+        self.tw = get_time_windows(data, cfg)
+        if self.tw is not None:
+            self.seq_fwd, self.seq_bwd = self.tw.prefixes(seq), self.tw.suffixes(seq)
+            self.fwd, self.bwd = self.tw.prefixes(route), self.tw.suffixes(route)
+
+    def reject_route(self, customer):
+        """容量或可达性不满足时，整条路径的所有位置都不可行"""
+        q = self.data.demands[customer]
+        n_pos = len(self.prev) - 1
+        if self.load + q > self.cfg.car_capacity:
+            SCREEN_STATS['candidates'] += n_pos
+            SCREEN_STATS['capacity'] += n_pos
+            return True
+        if self.linear and _refuel_reach(self.data, self.cfg)[customer] > self.cfg.battery_cap:
+            SCREEN_STATS['candidates'] += n_pos
+            SCREEN_STATS['reach'] += n_pos
+            return True
+        return False
+
+    def energy_bound(self, customer, pos):
+        """在 pos 处插入 customer 后客户序列能耗（实际能耗下界）"""
+        i, j = self.prev[pos], self.next[pos]
+        p, n = self.seq[i], self.seq[j]
+        alpha, beta, dist = self.cfg.base_energy, self.cfg.load_energy, self.dist
+        q = self.data.demands[customer]
+        r = self.remain[i]  # 弧 p -> customer 的载重（卸下 customer 后）
+        r_next = self.remain[j]  # 弧 customer -> n 的载重
+        return (self.energy + beta * q * self.prefix[i]
+                + (alpha + beta * r) * dist[p][customer]
+                + (alpha + beta * r_next) * (dist[customer][n] - dist[p][n]))
+
+    def check(self, customer, pos):
+        """
+        返回：
+            0: 必不可行（含换电站调整）
+            1: 直接插入必不可行，仅可能经换电站调整修复
+            2: 下界未排除，需完整仿真
+        """
+        SCREEN_STATS['candidates'] += 1
+        level = 2
+        if self.linear:
+            bound = self.energy_bound(customer, pos)
+            cap = self.cfg.battery_cap
+            if bound > (self.n_stations + 2) * cap:
+                SCREEN_STATS['energy'] += 1
+                return 0
+            if bound > (self.n_stations + 1) * cap:
+                SCREEN_STATS['energy_direct'] += 1
+                level = 1
+        if self.tw is not None:
+            i = self.prev[pos]
+            if not self.tw.insertion_ok(self.seq_fwd, self.seq_bwd, self.seq, customer, i + 1):
+                SCREEN_STATS['time'] += 1
+                return 0
+            if level == 2 and not self.tw.insertion_ok(self.fwd, self.bwd, self.route, customer, pos):
+                SCREEN_STATS['time_direct'] += 1
+                level = 1
+        return level
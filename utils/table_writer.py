@@ -0,0 +1,115 @@
+import csv
+import json
+import os
+from pathlib import Path
+
+
+class TableWriter:
+    """
+    结果表的缓冲写入器，按文件后缀选择格式：
+    - .csv / .jsonl：追加写入，每次 flush 后即落盘，适合长时间运行时断点续跑
+    - .parquet：依赖 pyarrow，按行组写入临时文件，close 时替换目标文件。
+      并非流式写入：追加时先整表读入已有文件，结果在 close 之前不可见，进程崩溃则本次写入全部丢失；
+      长时间运行或需要断点续跑时请用 .csv / .jsonl，结束后再转换为 parquet
+    """
+    def __init__(self, path, columns=None, buffer_size=100, append=True):
+        self.path = Path(path)
+        self.fmt = self.path.suffix.lower().lstrip('.')
+        if self.fmt not in ('csv', 'jsonl', 'parquet'):
+            raise ValueError(f"不支持的结果格式: {self.path.suffix}（可选 .csv / .jsonl / .parquet）")
+        self.columns = list(columns) if columns else None
+        self.buffer_size = max(1, int(buffer_size))
+        self.append = append
+        self._buffer = []
+        self._parquet_writer = None
+        self._parquet_tmp = None
+        self._closed = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not append and self.fmt != 'parquet' and self.path.exists():
+            self.path.unlink()
+
+    def write(self, record: dict):
+        if self.columns is None:
+            self.columns = list(record.keys())
+        self._buffer.append(record)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        if self.fmt == 'csv':
+            write_header = not self.path.exists() or self.path.stat().st_size == 0
+            with open(self.path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=self.columns, extrasaction='ignore')
+                if write_header:
+                    writer.writeheader()
+                writer.writerows(rows)
+        elif self.fmt == 'jsonl':
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False, default=_json_default) + '\n')
+        else:
+            self._write_parquet(rows)
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            os.replace(self._parquet_tmp, self.path)
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _write_parquet(self, rows):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("写入 .parquet 需要安装 pyarrow，或改用 .csv / .jsonl") from e
+
+        table = pa.Table.from_pylist([{c: row.get(c) for c in self.columns} for row in rows])
+        if self._parquet_writer is None:
+            self._parquet_tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+            existing = None
+            if self.append and self.path.exists():
+                existing = pq.read_table(self.path)
+                table = table.cast(existing.schema) if existing.schema.names == table.schema.names else table
+            self._parquet_writer = pq.ParquetWriter(self._parquet_tmp, table.schema)
+            if existing is not None:
+                self._parquet_writer.write_table(existing)
+        self._parquet_writer.write_table(table)
+
+
+def read_table(path) -> list:
+    """读取 TableWriter 写出的结果表，返回记录列表；文件不存在时返回空列表"""
+    path = Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        return []
+    fmt = path.suffix.lower().lstrip('.')
+    if fmt == 'csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+    if fmt == 'jsonl':
+        with open(path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(path).to_pylist()
+    raise ValueError(f"不支持的结果格式: {path.suffix}")
+
+
+def _json_default(obj):
+    # numpy 标量等对象转为 Python 原生类型
+    if hasattr(obj, 'item'):
+        return obj.item()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"无法序列化的对象: {type(obj)}")
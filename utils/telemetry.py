@@ -0,0 +1,64 @@
+"""
+求解过程逐迭代遥测：每轮一条紧凑记录，经 TableWriter 缓冲写入 .jsonl / .parquet / .csv，
+内存中最多保留 buffer_size 条记录，适合长时间调参后离线分析。
+"""
+import hashlib
+import re
+import time
+
+from .table_writer import TableWriter
+
+TELEMETRY_COLUMNS = [
+    'run', 'iteration', 'elapsed', 'destroy', 'repair', 'q',
+    'current_cost', 'new_cost', 'best_cost', 'temperature', 'accepted', 'new_best',
+    'vehicles', 'charges',
+    't_destroy', 't_repair', 't_local', 't_post',
+]
+
+
+def open_telemetry(cfg):
+    """
+    按 cfg.telemetry_path 打开遥测写入器；未配置时返回 None（求解器不产生任何额外开销）
+    路径中的 {run} 替换为 run_file_tag(cfg.telemetry_run)，多进程批量运行时各任务写入各自的文件
+    """
+    path = getattr(cfg, 'telemetry_path', None)
+    if not path:
+        return None
+    path = str(path).replace('{run}', run_file_tag(getattr(cfg, 'telemetry_run', None)))
+    return TableWriter(path, TELEMETRY_COLUMNS, buffer_size=getattr(cfg, 'telemetry_buffer', 100))
+
+
+def run_file_tag(run):
+    """
+    可用作文件名的运行标识：非字母数字字符替换为 _（批量作业的 job_id 含 |，Windows 文件名不允许），
+    替换后附加原标识的短哈希以免不同作业撞名；未设置时使用当前时间戳
+    """
+    if run is None:
+        return time.strftime('%Y%m%d-%H%M%S')
+    run = str(run)
+    safe = re.sub(r'[^\w.-]+', '_', run).strip('._') or 'run'
+    if safe != run:
+        safe = f"{safe}-{hashlib.sha1(run.encode('utf-8')).hexdigest()[:8]}"
+    return safe
+
+
+def solution_stats(data, solution):
+    """解中使用的车辆数与换电次数"""
+    charges = set(data.charge_ids)
+    vehicles = sum(1 for r in solution if len(r) > 2)
+    visits = sum(1 for r in solution for n in r[1:-1] if n in charges)
+    return vehicles, visits
+
+
+class PhaseTimer:
+    """按阶段累计耗时：timer.lap('destroy') 记录自上次 lap 以来的时间"""
+    __slots__ = ('times', '_last')
+
+    def __init__(self):
+        self.times = {}
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.times[phase] = now - self._last
+        self._last = now
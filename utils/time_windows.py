@@ -0,0 +1,93 @@
+"""
+时间窗约束（cfg.time_windows 开启时生效）：
+    行驶时间 = 距离 / cfg.speed；客户服务时间取实例 SERVICE TIME，换电站停留 cfg.swap_time；
+    早到等待，晚于 DUE TIME 开始服务即不可行；最终须在车场 DUE TIME 前回场。
+路径片段以 (D, W, E, L) 概括（Vidal 等的时间窗片段拼接）：
+    D 片段总时长（含服务与等待），W 超时量（可行时为 0），
+    E 最早开始时间（前向：首节点最早何时开始才不产生多余等待），
+    L 最晚开始时间（后向松弛：首节点晚于 L 开始则后续必有超时）。
+两个片段的拼接为 O(1)，因此插入位置的检查只需路径前缀 / 后缀的片段概括（RouteScreen）。
+"""
+import numpy as np
+
+EPS = 1e-6
+
+
+class TimeWindows:
+    """实例的时间窗数据与片段运算"""
+    __slots__ = ('ready', 'due', 'service', 'travel')
+
+    def __init__(self, data, cfg):
+        n = len(data.dist_matrix)
+        self.ready = _node_column(data, 'ready_times', 'READY TIME', n, 0.0)
+        self.due = _node_column(data, 'due_times', 'DUE TIME', n, np.inf)
+        self.service = _node_column(data, 'service_times', 'SERVICE TIME', n, 0.0)
+        self.service[np.asarray(data.charge_ids, dtype=int)] = cfg.swap_time
+        self.service[data.depot_id] = 0.0
+        self.travel = np.asarray(data.dist_matrix, dtype=float) / cfg.speed
+        # 转为列表：逐元素访问远快于 numpy 标量
+        self.ready, self.due, self.service = self.ready.tolist(), self.due.tolist(), self.service.tolist()
+        self.travel = self.travel.tolist()
+
+    def node(self, i):
+        """单个节点的片段概括"""
+        return (self.service[i], 0.0, self.ready[i], self.due[i])
+
+    def concat(self, a, i, b, j):
+        """片段 a（末节点 i）后接片段 b（首节点 j）"""
+        D1, W1, E1, L1 = a
+        D2, W2, E2, L2 = b
+        delta = D1 - W1 + self.travel[i][j]
+        wait = max(E2 - delta - L1, 0.0)
+        warp = max(E1 + delta - L2, 0.0)
+        return (D1 + D2 + self.travel[i][j] + wait, W1 + W2 + warp,
+                max(E2 - delta, E1) - wait, min(L2 - delta, L1) + warp)
+
+    def sequence(self, route):
+        """整段节点序列的片段概括"""
+        seg = self.node(route[0])
+        for k in range(1, len(route)):
+            seg = self.concat(seg, route[k-1], self.node(route[k]), route[k])
+        return seg
+
+    def prefixes(self, route):
+        """fwd[k] 为 route[:k+1] 的片段概括"""
+        fwd = [self.node(route[0])]
+        for k in range(1, len(route)):
+            fwd.append(self.concat(fwd[-1], route[k-1], self.node(route[k]), route[k]))
+        return fwd
+
+    def suffixes(self, route):
+        """bwd[k] 为 route[k:] 的片段概括"""
+        bwd = [self.node(route[-1])]
+        for k in range(len(route) - 2, -1, -1):
+            bwd.append(self.concat(self.node(route[k]), route[k], bwd[-1], route[k+1]))
+        return bwd[::-1]
+
+    def insertion_ok(self, fwd, bwd, route, customer, pos):
+        """O(1)：在 route[pos] 之前插入 customer 后是否满足时间窗"""
+        seg = self.concat(fwd[pos-1], route[pos-1], self.node(customer), customer)
+        return self.concat(seg, customer, bwd[pos], route[pos])[1] <= EPS
+
+    def route_check(self, route):
+        return self.sequence(route)[1] <= EPS
+
+
+def _node_column(data, attr, column, n, default):
+    values = getattr(data, attr, None)
+    if values is not None and len(values) == n:
+        return np.asarray(values, dtype=float).copy()
+    if data.node_df is not None and column in data.node_df:
+        return data.node_df[column].to_numpy(dtype=float, copy=True)
+    return np.full(n, default)
+
+
+def get_time_windows(data, cfg):
+    """cfg.time_windows 开启时返回实例的时间窗模型（缓存），否则返回 None"""
+    if not getattr(cfg, 'time_windows', False):
+        return None
+    key = (cfg.speed, cfg.swap_time)
+    cache = data.__dict__.setdefault('_time_windows', {})
+    if key not in cache:
+        cache[key] = TimeWindows(data, cfg)
+    return cache[key]
@@ -0,0 +1,364 @@
+"""
+优化实现与参考实现的差分校验
+1. 求解时抽样校验（cfg.verify_rate > 0 时开启，默认关闭）：
+   求解期间将包内各模块引用的 route_feasibility_check / solution_cost / charging_insert /
+   adjust_charge_stations 及 RouteScreen.check 替换为校验包装，按比例抽样与参考实现比较，
+   结束时恢复原函数并汇报不一致。关闭时不做任何替换，求解路径没有额外开销。
+2. 随机性质测试：在 data/ 下的实例上随机生成路径，逐项比较优化实现与参考实现
+       python -m <包名>.utils.verify --instances C101_Strategy1_Centers.txt --routes 500
+参考实现为逐弧循环的原始公式，不使用能耗模型的向量化计算、增量状态与下界筛选。
+"""
+import argparse
+import contextlib
+import math
+import random
+import sys
+
+from . import helpers
+from .energy_model import get_energy_model
+from .route_state import RouteState
+from .screening import RouteScreen
+from .time_windows import EPS, get_time_windows
+
+TOL = 1e-9
+MAX_EXAMPLES = 20  # 每个函数最多保留的不一致样例数
+
+_ORIGINALS = {
+    'route_feasibility_check': helpers.route_feasibility_check,
+    'solution_cost': helpers.solution_cost,
+    'charging_insert': helpers.charging_insert,
+    'adjust_charge_stations': helpers.adjust_charge_stations,
+}
+
+
+# ---------- 参考实现 ----------
+
+def reference_route_feasibility(data, cfg, route):
+    """逐弧模拟的可行性检查，返回值与 route_feasibility_check 相同"""
+    if route[0] != data.depot_id or route[-1] != data.depot_id:
+        return (False, None)
+    if len(route) < 2:
+        return (True, 1.0)
+    customers, charges = set(data.customer_ids), set(data.charge_ids)
+    load = sum(data.demands[n] for n in route if n in customers)
+    if load > cfg.car_capacity:
+        return (False, None)
+
+    payload = get_energy_model(data, cfg).payload
+    feasible, used = True, 0.0
+    for a, b in zip(route, route[1:]):
+        if b in customers:
+            load -= data.demands[b]
+        used += data.dist_matrix[a][b] * (cfg.base_energy + cfg.load_energy * float(payload(load)))
+        if used > cfg.battery_cap:
+            feasible = False
+        if b in charges:
+            used = 0.0
+
+    tw = get_time_windows(data, cfg)
+    if feasible and tw is not None:
+        t = tw.ready[route[0]]
+        for a, b in zip(route, route[1:]):
+            t = max(t + tw.travel[a][b], tw.ready[b])
+            if t > tw.due[b] + EPS:
+                feasible = False
+                break
+            t += tw.service[b]
+    return (feasible, (cfg.battery_cap - used) / cfg.battery_cap)
+
+
+def reference_sequence_energy(data, cfg, route):
+    """去掉换电站后客户序列的线性能耗（RouteScreen 电量下界的参考值）"""
+    customers = set(data.customer_ids)
+    seq = [n for n in route if n not in set(data.charge_ids)]
+    load = sum(data.demands[n] for n in seq if n in customers)
+    energy = 0.0
+    for a, b in zip(seq, seq[1:]):
+        if b in customers:
+            load -= data.demands[b]
+        energy += data.dist_matrix[a][b] * (cfg.base_energy + cfg.load_energy * load)
+    return energy
+
+
+def reference_solution_cost(data, cfg, solution):
+    charges = set(data.charge_ids)
+    cost = 0.0
+    for route in solution:
+        if len(route) > 2:
+            cost += cfg.vehicle_fixed_cost
+        for a, b in zip(route, route[1:]):
+            cost += data.dist_matrix[a][b] * cfg.distance_cost
+        cost += cfg.charging_cost * sum(1 for n in route if n in charges)
+    return cost
+
+
+@contextlib.contextmanager
+def reference_evaluators():
+    """在该上下文中，helpers 内的换电站修复函数改用参考可行性检查与成本"""
+    saved = helpers.route_feasibility_check, helpers.solution_cost
+    helpers.route_feasibility_check = reference_route_feasibility
+    helpers.solution_cost = reference_solution_cost
+    try:
+        yield
+    finally:
+        helpers.route_feasibility_check, helpers.solution_cost = saved
+
+
+def _close(a, b):
+    if a is None or b is None:
+        return a is b
+    return math.isclose(a, b, rel_tol=TOL, abs_tol=TOL)
+
+
+def _same_feasibility(res, ref):
+    return res[0] == ref[0] and _close(res[1], ref[1])
+
+
+def _same_repair(data, cfg, res, ref):
+    """修复结果一致：成功标志与路径相同，或两条路径成本相同（等价并列的选择）"""
+    if res[0] != ref[0]:
+        return False
+    return res[1] == ref[1] or _close(reference_solution_cost(data, cfg, [res[1]]),
+                                      reference_solution_cost(data, cfg, [ref[1]]))
+
+
+# ---------- 求解时抽样校验 ----------
+
+class Verifier:
+    """
+    抽样差分校验器：install() 替换包内各模块对被测函数的引用，uninstall() 恢复
+    抽样使用独立的随机数生成器，不影响求解器的随机序列
+    """
+    def __init__(self, rate, seed=0, strict=False):
+        self.rate = rate
+        self.strict = strict
+        self.rng = random.Random(seed)
+        self.stats = {name: [0, 0] for name in list(_ORIGINALS) + ['screen_check']}  # [抽样数, 不一致数]
+        self.examples = []
+        self._busy = False
+        self._patched = []
+        self._screen_check = None
+
+    def _sample(self):
+        return not self._busy and self.rng.random() < self.rate
+
+    def _record(self, name, ok, detail):
+        self.stats[name][0] += 1
+        if ok:
+            return
+        self.stats[name][1] += 1
+        if len(self.examples) < MAX_EXAMPLES:
+            self.examples.append((name, detail))
+        if self.strict:
+            raise AssertionError(f"差分校验不一致: {name} {detail}")
+
+    def _reference(self, func, *args):
+        self._busy = True
+        try:
+            with reference_evaluators():
+                return func(*args)
+        finally:
+            self._busy = False
+
+    def _wrap_feasibility(self, orig):
+        def route_feasibility_check(data, cfg, route):
+            res = orig(data, cfg, route)
+            if self._sample():
+                ref = reference_route_feasibility(data, cfg, route)
+                self._record('route_feasibility_check', _same_feasibility(res, ref), (list(route), res, ref))
+            return res
+        return route_feasibility_check
+
+    def _wrap_cost(self, orig):
+        def solution_cost(data, cfg, solution):
+            res = orig(data, cfg, solution)
+            if self._sample():
+                ref = reference_solution_cost(data, cfg, solution)
+                self._record('solution_cost', _close(res, ref), (res, ref))
+            return res
+        return solution_cost
+
+    def _wrap_repair(self, name, orig):
+        def wrapper(data, cfg, route):
+            sample = self._sample()
+            res = orig(data, cfg, route)
+            if sample:
+                ref = self._reference(orig, data, cfg, route)
+                self._record(name, _same_repair(data, cfg, res, ref), (list(route), res, ref))
+            return res
+        wrapper.__name__ = name
+        return wrapper
+
+    def _wrap_screen(self, orig):
+        verifier = self
+
+        def check(screen, customer, pos):
+            level = orig(screen, customer, pos)
+            if level < 2 and verifier._sample():
+                # 下界判定直接插入不可行时，参考实现也必须不可行
+                route = screen.route
+                ref = reference_route_feasibility(screen.data, screen.cfg, route[:pos] + [customer] + route[pos:])
+                verifier._record('screen_check', not ref[0], (list(route), customer, pos, level))
+            return level
+        return check
+
+    def install(self):
+        wrappers = {
+            'route_feasibility_check': self._wrap_feasibility(_ORIGINALS['route_feasibility_check']),
+            'solution_cost': self._wrap_cost(_ORIGINALS['solution_cost']),
+            'charging_insert': self._wrap_repair('charging_insert', _ORIGINALS['charging_insert']),
+            'adjust_charge_stations': self._wrap_repair('adjust_charge_stations', _ORIGINALS['adjust_charge_stations']),
+        }
+        root = __name__.split('.')[0]
+        for mod_name, module in list(sys.modules.items()):
+            if module is None or not (mod_name == root or mod_name.startswith(root + '.')):
+                continue
+            for name, orig in _ORIGINALS.items():
+                if getattr(module, name, None) is orig:
+                    setattr(module, name, wrappers[name])
+                    self._patched.append((module, name, orig))
+        self._screen_check = RouteScreen.check
+        RouteScreen.check = self._wrap_screen(self._screen_check)
+        return self
+
+    def uninstall(self):
+        for module, name, orig in self._patched:
+            setattr(module, name, orig)
+        self._patched = []
+        if self._screen_check is not None:
+            RouteScreen.check = self._screen_check
+            self._screen_check = None
+
+    def report(self):
+        lines = [f"差分校验（抽样比例 {self.rate}）："]
+        for name, (checked, wrong) in self.stats.items():
+            lines.append(f"  {name}: 抽样 {checked}，不一致 {wrong}")
+        for name, detail in self.examples:
+            lines.append(f"  [不一致] {name}: {detail}")
+        return '\n'.join(lines)
+
+    @property
+    def mismatches(self):
+        return sum(wrong for _, wrong in self.stats.values())
+
+
+def start_verification(cfg):
+    """cfg.verify_rate > 0 时安装并返回校验器，否则返回 None"""
+    rate = getattr(cfg, 'verify_rate', 0.0)
+    if not rate:
+        return None
+    return Verifier(rate, seed=getattr(cfg, 'verify_seed', 0), strict=getattr(cfg, 'verify_strict', False)).install()
+
+
+# ---------- 随机性质测试 ----------
+
+def random_route(data, rng, max_customers=12, station_prob=0.2):
+    """随机路径：随机客户子序列，客户之间以 station_prob 的概率插入随机换电站"""
+    k = rng.randint(0, min(max_customers, len(data.customer_ids)))
+    route = [data.depot_id]
+    for c in rng.sample(data.customer_ids, k):
+        route.append(c)
+        if data.charge_ids and rng.random() < station_prob:
+            route.append(rng.choice(data.charge_ids))
+    route.append(data.depot_id)
+    return route
+
+
+def check_properties(data, cfg, n_routes=200, seed=0):
+    """
+    在随机路径上检查各性质，返回 {性质: [检查数, 失败数]} 与失败样例
+    - feasibility / cost：优化实现与参考实现一致
+    - charging_insert / adjust：与参考模式下的结果一致；成功时结果参考可行且客户顺序不变
+    - route_state：增量状态的可行性判断与参考一致，try_append 成功后路径参考可行
+    - screen：下界判定不可行的插入位置参考实现也不可行；线性模型下电量下界等于客户序列能耗
+    """
+    rng = random.Random(seed)
+    stats, examples = {}, []
+    customers = set(data.customer_ids)
+
+    def record(name, ok, detail):
+        s = stats.setdefault(name, [0, 0])
+        s[0] += 1
+        if not ok:
+            s[1] += 1
+            if len(examples) < MAX_EXAMPLES:
+                examples.append((name, detail))
+
+    linear = get_energy_model(data, cfg).is_linear
+    for _ in range(n_routes):
+        route = random_route(data, rng)
+        ref = reference_route_feasibility(data, cfg, route)
+        record('feasibility', _same_feasibility(helpers.route_feasibility_check(data, cfg, route), ref), route)
+        solution = [route, random_route(data, rng)]
+        record('cost', _close(helpers.solution_cost(data, cfg, solution),
+                              reference_solution_cost(data, cfg, solution)), solution)
+
+        for name in ('charging_insert', 'adjust_charge_stations'):
+            func = getattr(helpers, name)
+            res = func(data, cfg, route)
+            with reference_evaluators():
+                expect = func(data, cfg, route)
+            ok = _same_repair(data, cfg, res, expect)
+            if ok and res[0]:
+                ok = reference_route_feasibility(data, cfg, res[1])[0] and \
+                    [n for n in res[1] if n in customers] == [n for n in route if n in customers]
+            record(name, ok, route)
+
+        state = RouteState.from_route(data, cfg, route)
+        record('route_state', state.is_feasible() == ref[0], route)
+        if ref[0] and linear:
+            record('route_state_ratio', _close(state.energy_ratio(), ref[1]), route)
+        free = [c for c in data.customer_ids if c not in set(route)]
+        if ref[0] and free:
+            cust = rng.choice(free)
+            if state.try_append(cust):
+                record('route_state_append', reference_route_feasibility(data, cfg, state.route())[0],
+                       (route, cust))
+
+        if free:
+            cust = rng.choice(free)
+            screen = RouteScreen(data, cfg, route)
+            if not screen.reject_route(cust):
+                for pos in range(1, len(route)):
+                    new_route = route[:pos] + [cust] + route[pos:]
+                    if linear:
+                        record('screen_bound', _close(screen.energy_bound(cust, pos),
+                                                      reference_sequence_energy(data, cfg, new_route)),
+                               (route, cust, pos))
+                    if screen.check(cust, pos) < 2:
+                        record('screen', not reference_route_feasibility(data, cfg, new_route)[0],
+                               (route, cust, pos))
+    return stats, examples
+
+
+def main(argv=None):
+    from ..config import DataConfig
+    from ..data_process import load_instance
+
+    parser = argparse.ArgumentParser(description="优化实现与参考实现的随机差分测试")
+    parser.add_argument('--instances', nargs='+', default=['C101_Strategy0.txt', 'C101_Strategy1_Centers.txt',
+                                                             'C101_Strategy2_Ring.txt'])
+    parser.add_argument('--routes', type=int, default=200, help="每个实例、每种配置的随机路径数")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for inst in args.instances:
+        data = load_instance(inst)
+        for label, overrides in (('linear', {}), ('payload_curve', {'energy_model': 'payload_curve'}),
+                                 ('time_windows', {'time_windows': True})):
+            cfg = DataConfig()
+            for key, value in overrides.items():
+                setattr(cfg, key, value)
+            stats, examples = check_properties(data, cfg, args.routes, args.seed)
+            summary = '，'.join(f"{k} {n - w}/{n}" for k, (n, w) in stats.items())
+            print(f"{inst} [{label}] {summary}")
+            for name, detail in examples:
+                print(f"  [失败] {name}: {detail}")
+            failed += sum(w for _, w in stats.values())
+    print("全部通过" if not failed else f"共 {failed} 项失败")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,94 +1,168 @@
-import matplotlib.pyplot as plt
-import random
+from __future__ import annotations
+from typing import TYPE_CHECKING
 from .data_structure import VRPData
-from .solver import ALNSSolver
-from .utils.helpers import solution_cost, route_feasibility_check
- 
-def visualize_solution(data: VRPData, solution: list[list[int]], save_path: str = None):
-    """整合路径绘制的可视化函数"""
-    import matplotlib.pyplot as plt
-    import random
+from .utils.helpers import route_feasibility_check, cost_breakdown
+
+if TYPE_CHECKING:
+    # 仅用于类型标注，避免导入可视化模块时连带加载求解器
+    from .solver import ALNSSolver
 
-    plt.figure(figsize=(10, 7))
-    plt.xlabel("X Coordinate", fontfamily='serif')
-    plt.ylabel("Y Coordinate", fontfamily='serif')
-    plt.title(f"{len(data.customer_ids)} Customers, {sum(1 for r in solution if len(r)>2)} Vehicles Used",
-             fontfamily='serif', fontsize=14)
+def _draw_solution(ax, data: VRPData, solution: list[list[int]], labels: bool = True):
+    """在给定坐标轴上绘制节点与路径（所有路径合并为一个 LineCollection）"""
+    from matplotlib.collections import LineCollection
+    import matplotlib
+
+    ax.set_xlabel("X Coordinate", fontfamily='serif')
+    ax.set_ylabel("Y Coordinate", fontfamily='serif')
+    ax.set_title(f"{len(data.customer_ids)} Customers, {sum(1 for r in solution if len(r)>2)} Vehicles Used",
+                 fontfamily='serif', fontsize=14)
 
     # ===== 基础节点绘制 =====
     # 车场节点
     depot_x, depot_y = data.coords[0]
-    plt.scatter(depot_x, depot_y, 
-                c='blue', alpha=1, marker=',', s=30,
-                linewidths=2, label='Depot', zorder=5)
+    ax.scatter(depot_x, depot_y,
+               c='blue', alpha=1, marker='s', s=30,
+               linewidths=2, label='Depot', zorder=5)
 
     # 客户节点
     customers = [i for i in data.customer_ids if i != 0]
     cust_x = [data.coords[i][0] for i in customers]
     cust_y = [data.coords[i][1] for i in customers]
-    plt.scatter(cust_x, cust_y,
-                c='black', alpha=1, marker='o', s=30,
-                linewidths=1, label='Customer', zorder=5)
+    ax.scatter(cust_x, cust_y,
+               c='black', alpha=1, marker='o', s=30,
+               linewidths=1, label='Customer', zorder=5)
 
     # 充电站节点
     if data.charge_ids:
         charge_x = [data.coords[i][0] for i in data.charge_ids]
         charge_y = [data.coords[i][1] for i in data.charge_ids]
-        plt.scatter(charge_x, charge_y,
-                    c='red', alpha=1, marker='s', s=50,
-                    linewidths=1, label='Charging Station', zorder=5)
+        ax.scatter(charge_x, charge_y,
+                   c='red', alpha=1, marker='s', s=50,
+                   linewidths=1, label='Charging Station', zorder=5)
 
     # ===== 节点标注 =====
-    for node_id in [0] + data.customer_ids + data.charge_ids:
-        x, y = data.coords[node_id]
-        plt.text(x, y, str(node_id),
-                family='serif', style='italic', fontsize=10,
-                verticalalignment="bottom", 
-                horizontalalignment='left',
-                color='k')
+    if labels:
+        for node_id in [0] + data.customer_ids + data.charge_ids:
+            x, y = data.coords[node_id]
+            ax.text(x, y, str(node_id),
+                    family='serif', style='italic', fontsize=10,
+                    verticalalignment="bottom",
+                    horizontalalignment='left',
+                    color='k')
 
     # ===== 路径绘制 =====
-    for route in solution:
-        if len(route) <= 2:  # 跳过空路径
-            continue
-        
-        # 生成随机颜色
-        red = random.randint(50, 200)
-        green = random.randint(50, 200)
-        blue = random.randint(50, 200)
-        
-        # 绘制路径线段
-        for i in range(len(route)-1):
-            start = route[i]
-            end = route[i+1]
-            plt.plot([data.coords[start][0], data.coords[end][0]],
-                    [data.coords[start][1], data.coords[end][1]],
-                    color=(red/255, green/255, blue/255),
-                    linewidth=1.5,
-                    alpha=0.7,
-                    zorder=3)
+    # 每条路径一条折线，颜色按调色板循环取用（结果可复现）
+    routes = [r for r in solution if len(r) > 2]  # 跳过空路径
+    if routes:
+        cmap = matplotlib.colormaps['tab20']
+        lines = [[data.coords[n] for n in route] for route in routes]
+        colors = [cmap(i % cmap.N) for i in range(len(routes))]
+        ax.add_collection(LineCollection(lines, colors=colors, linewidths=1.5, alpha=0.7, zorder=3))
 
     # ===== 样式调整 =====
-    plt.grid(False)
-    plt.legend(loc='best', prop={'family':'serif', 'size':12})
-    plt.tight_layout()
+    ax.grid(False)
+    ax.legend(loc='best', prop={'family':'serif', 'size':12})
+
+
+def visualize_solution(data: VRPData, solution: list[list[int]], save_path: str = None):
+    """整合路径绘制的可视化函数"""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 7))
+    _draw_solution(ax, data, solution)
+    fig.tight_layout()
 
     if save_path:
-        plt.savefig(save_path, bbox_inches='tight', dpi=300)
+        fig.savefig(save_path, bbox_inches='tight', dpi=300)
     else:
         plt.show()
 
+
+def render_solution(data: VRPData, solution: list[list[int]], save_path: str, dpi: int = 150, labels: bool = True):
+    """无界面渲染路径图（Agg 画布，不依赖 pyplot 全局状态，可在工作进程中调用）"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(10, 7))
+    FigureCanvasAgg(fig)
+    _draw_solution(fig.add_subplot(), data, solution, labels)
+    fig.tight_layout()
+    fig.savefig(save_path, bbox_inches='tight', dpi=dpi)
+    return save_path
+
+
+def decimate_history(history: list, max_points: int = 2000):
+    """
+    收敛曲线抽稀：保留首尾点与最优值变化点，仍超出 max_points 时再均匀抽样
+    返回：(迭代序号列表, 成本列表)
+    """
+    n = len(history)
+    if n <= max_points:
+        return list(range(n)), list(history)
+    keep = [0] + [i for i in range(1, n) if history[i] != history[i-1]] + [n - 1]
+    keep = sorted(set(keep))
+    if len(keep) > max_points:
+        step = len(keep) / (max_points - 1)
+        keep = sorted({keep[int(k * step)] for k in range(max_points - 1)} | {n - 1})
+    return keep, [history[i] for i in keep]
+
+
+def render_convergence(history: list, save_path: str, max_points: int = 2000, dpi: int = 150):
+    """无界面渲染收敛曲线，长历史按 decimate_history 抽稀后以阶梯线绘制"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    xs, ys = decimate_history(history, max_points)
+    fig = Figure(figsize=(10, 5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.step(xs, ys, where='post', label='Best Cost', color='blue', linewidth=2)
+    ax.set_xlabel("Iteration", fontsize=12)
+    ax.set_ylabel("Total Operational Cost", fontsize=12)
+    ax.set_title("ALNS Convergence Curve", fontsize=14)
+    ax.grid(True, linestyle='--', alpha=0.6)
+    ax.legend()
+    fig.savefig(save_path, bbox_inches='tight', dpi=dpi)
+    return save_path
+
+
+def _render_result_row(row: dict, out_dir: str, dpi: int, labels: bool):
+    import json
+    import os
+    from .data_process import load_instance
+
+    stations = row.get('stations')
+    data = load_instance(row['instance'], stations=None if stations in (None, '', '-') else stations)
+    name = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in str(row['job_id']))
+    return render_solution(data, json.loads(row['routes']), os.path.join(out_dir, f"{name}.png"), dpi, labels)
+
+
+def render_results(results_path: str, out_dir: str, workers: int = None, dpi: int = 150, labels: bool = False):
+    """
+    批量渲染 batch.py 结果表中所有成功作业的路径图（进程池并行）
+    返回：生成的图片路径列表
+    """
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    from .utils.table_writer import read_table
+
+    rows = [r for r in read_table(results_path) if r.get('status') == 'ok' and r.get('routes')]
+    os.makedirs(out_dir, exist_ok=True)
+    if workers == 1:
+        return [_render_result_row(r, out_dir, dpi, labels) for r in rows]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_render_result_row, r, out_dir, dpi, labels) for r in rows]
+        return [f.result() for f in futures]
+
 # 输出解决方案的详细成本构成
 def print_cost_breakdown(solver: ALNSSolver, solution: list[list[int]]):
-    used_vehicles = sum(1 for r in solution if len(r) > 2)
-    total_distance = sum(solver.data.dist_matrix[i][j] for route in solution for i,j in zip(route[:-1], route[1:]))
-    charging_count = sum(1 for r in solution for n in r if n in solver.data.charge_ids)
+    breakdown = cost_breakdown(solver.data, solver.cfg, solution)
     
     print(f"[成本分析]")
-    print(f"车辆使用数: {used_vehicles} × {solver.cfg.vehicle_fixed_cost} = {used_vehicles * solver.cfg.vehicle_fixed_cost}元")
-    print(f"行驶距离: {total_distance:.1f}km × {solver.cfg.distance_cost} = {total_distance * solver.cfg.distance_cost:.1f}元")
-    print(f"充电次数: {charging_count} × {solver.cfg.charging_cost} = {charging_count * solver.cfg.charging_cost}元")
-    print(f"总运营成本: {solution_cost(solver.data, solver.cfg, solution):.1f}元")
+    print(f"车辆使用数: {breakdown['vehicles']} × {solver.cfg.vehicle_fixed_cost} = {breakdown['vehicle_cost']}元")
+    print(f"行驶距离: {breakdown['distance']:.1f}km × {solver.cfg.distance_cost} = {breakdown['distance_cost']:.1f}元")
+    print(f"充电次数: {breakdown['charges']} × {solver.cfg.charging_cost} = {breakdown['charging_cost']}元")
+    print(f"总运营成本: {breakdown['total_cost']:.1f}元")
 
 
 def print_routes(solver: ALNSSolver, solution: list[list[int]]):
@@ -109,24 +183,7 @@ def print_routes(solver: ALNSSolver, solution: list[list[int]]):
         print(f"车辆 {idx+1}: 路径: {route_str}")
         print(f"  距离: {dist:.1f} km, 充电次数: {ch_count}, 结束电量比: {bat_ratio:.2f}, 可行: {feasible}")
 
-def plot_convergence(history: list, save_path: str = "convergence_curve.png"):
-    """绘制并保存收敛曲线图，不直接显示"""
-    # 切换为 Agg 后端，这样不会弹出窗口
-    import matplotlib
-    matplotlib.use('Agg') 
-    import matplotlib.pyplot as plt
-
-    plt.figure(figsize=(10, 5))
-    plt.plot(history, label='Best Cost', color='blue', linewidth=2)
-    plt.xlabel("Iteration", fontsize=12)
-    plt.ylabel("Total Operational Cost", fontsize=12)
-    plt.title("ALNS Convergence Curve", fontsize=14)
-    plt.grid(True, linestyle='--', alpha=0.6)
-    plt.legend()
-    
-    # 保存图片
-    plt.savefig(save_path, bbox_inches='tight', dpi=300)
+def plot_convergence(history: list, save_path: str = "convergence_curve.png", max_points: int = 2000):
+    """绘制并保存收敛曲线图，不直接显示（Agg 画布，长历史自动抽稀）"""
+    render_convergence(history, save_path, max_points=max_points, dpi=300)
     print(f"收敛曲线已保存至: {save_path}")
-    
-    # 关闭画布，释放内存
-    plt.close()
\ No newline at end of file